@@ -7,68 +7,60 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Hypergraph-Generator'))
 
 from LLM_MAS_Hypergraph_Configuration import *
+from persona_scoring import PersonaScorer, top_k, gumbel_top_k, numpy_rng
+import numpy as np
 
 class HeuristicGeneratorAgent(BaseAgent):
     """Heuristic-based generator without LLM"""
     
+    def __init__(self, agent_id: str, model: str = "gpt-3.5-turbo", backend: LLMBackend = None):
+        super().__init__(agent_id, model, backend)
+        self._scorer = None
+        self._np_rng = None
+    
     def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
         person_id = context['person_id']
-        person_data = context['person_data']
         existing_hyperedges = context['existing_hyperedges']
         personas = context['personas']
         target_size = context.get('target_edge_size', 3)
         
-        # Calculate node degrees for preferential attachment
-        node_degrees = {}
-        for edge in existing_hyperedges:
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
-        
-        # Heuristic scoring for candidates
-        candidates = []
-        for other_id, other_data in personas.items():
-            if other_id == person_id:
-                continue
-            
-            score = 0
-            
-            # Feature similarity (moderate weight)
-            if other_data['gender'] == person_data['gender']:
-                score += 2
-            if other_data['race/ethnicity'] == person_data['race/ethnicity']:
-                score += 3
-            if abs(int(other_data['age']) - int(person_data['age'])) <= 10:
-                score += 2
-            if other_data['religion'] == person_data['religion']:
-                score += 2
-            if other_data['political affiliation'] == person_data['political affiliation']:
-                score += 2
-            
-            # Preferential attachment (strong weight)
-            degree_score = node_degrees.get(other_id, 0)
-            score += degree_score * 3
-            
-            # Diversity bonus (weak weight)
-            if other_data['gender'] != person_data['gender']:
-                score += 1
-            
-            candidates.append((other_id, score))
+        # Encoded personas: the generator's scorer, or encoded once here when used on its own
+        scorer = context.get('persona_scorer')
+        if scorer is None:
+            if self._scorer is None or self._scorer.personas is not personas:
+                self._scorer = PersonaScorer(personas)
+            scorer = self._scorer
+        if self._np_rng is None:
+            self._np_rng = numpy_rng()
         
-        # Weighted random selection from top candidates
-        candidates.sort(key=lambda x: x[1], reverse=True)
-        top_k = min(len(candidates), max(10, target_size * 3))
-        top_candidates = candidates[:top_k]
+        # Calculate node degrees for preferential attachment
+        node_degrees = context.get('node_degrees')
+        if node_degrees is not None and context.get('persona_scorer') is not None:
+            degrees = scorer.degrees
+        else:
+            if node_degrees is None:
+                node_degrees = {}
+                for edge in existing_hyperedges:
+                    for node in edge:
+                        node_degrees[node] = node_degrees.get(node, 0) + 1
+            degrees = scorer.degree_array(node_degrees)
         
-        selected = []
-        weights = [max(1, score) for _, score in top_candidates]
+        # Heuristic scores of all candidates at once
+        row = scorer.row(person_id)
+        same_gender = scorer.equal('gender', row)
+        scores = (2 * same_gender                                 # feature similarity (moderate weight)
+                  + 3 * scorer.equal('race/ethnicity', row)
+                  + 2 * scorer.age_within(row, 10)
+                  + 2 * scorer.equal('religion', row)
+                  + 2 * scorer.equal('political affiliation', row)
+                  + 3 * degrees                                   # preferential attachment (strong weight)
+                  + ~same_gender).astype(np.float64)              # diversity bonus (weak weight)
+        scores[row] = -np.inf
         
-        for _ in range(min(target_size - 1, len(top_candidates))):
-            if not top_candidates:
-                break
-            idx = random.choices(range(len(top_candidates)), weights=weights)[0]
-            selected.append(top_candidates[idx][0])
-            top_candidates.pop(idx)
-            weights.pop(idx)
+        # Weighted random selection without replacement from top candidates
+        top_rows = top_k(scores, min(len(scores) - 1, max(10, target_size * 3)))
+        picks = gumbel_top_k(np.maximum(scores[top_rows], 1), target_size - 1, self._np_rng)
+        selected = scorer.person_ids(top_rows[picks])
         
         return {
             'action': 'generate',
@@ -87,6 +79,22 @@ class HeuristicGeneratorMAS(ProtectedMASHypergraphGenerator):
         super().__init__(*args, **kwargs)
         self.agents['generator'] = HeuristicGeneratorAgent('heuristic_generator', self.model)
         print("🔧 Generator replaced with heuristic algorithm")
+    
+    def _rebuild_edge_indexes(self):
+        """Edge indexes plus the encoded personas and degree array of the vectorized scorer"""
+        super()._rebuild_edge_indexes()
+        self.persona_scorer = PersonaScorer(self.personas, hyperedges=self.hyperedges)
+        self._edge_indexes.append(self.persona_scorer)
+    
+    def _build_generator_context(self, all_persons: List[str], target_edge_size: int) -> Dict[str, Any]:
+        context = super()._build_generator_context(all_persons, target_edge_size)
+        context['persona_scorer'] = self.persona_scorer
+        return context
+    
+    def _build_evolution_generator_context(self, all_persons: List[str]) -> Dict[str, Any]:
+        context = super()._build_evolution_generator_context(all_persons)
+        context['persona_scorer'] = self.persona_scorer
+        return context
 
 
 if __name__ == "__main__":
@@ -100,6 +108,7 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
     
@@ -112,6 +121,7 @@ if __name__ == "__main__":
         iterations=args.iterations,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
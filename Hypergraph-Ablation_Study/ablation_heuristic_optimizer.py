@@ -19,10 +19,12 @@ class HeuristicOptimizerAgent(BaseAgent):
             return self._strategy("INCREASE_CONNECTIONS", "Empty network")
         
         # Calculate network metrics
-        node_degrees = {}
-        for edge in all_hyperedges:
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
+        node_degrees = context.get('node_degrees')
+        if node_degrees is None:
+            node_degrees = {}
+            for edge in all_hyperedges:
+                for node in edge:
+                    node_degrees[node] = node_degrees.get(node, 0) + 1
         
         total_nodes = len(personas)
         connected_nodes = len(node_degrees)
@@ -137,6 +139,7 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
     
@@ -149,6 +152,7 @@ if __name__ == "__main__":
         iterations=args.iterations,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
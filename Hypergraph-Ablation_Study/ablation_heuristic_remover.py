@@ -25,21 +25,23 @@ class HeuristicRemoverAgent(BaseAgent):
             }
         
         # Calculate node degrees
-        node_degrees = {}
-        for edge in all_hyperedges:
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
+        node_degrees = context.get('node_degrees')
+        if node_degrees is None:
+            node_degrees = {}
+            for edge in all_hyperedges:
+                for node in edge:
+                    node_degrees[node] = node_degrees.get(node, 0) + 1
         
-        # Score each edge for removal
+        # Score each edge for removal (keyed by stable edge ID)
         edge_scores = []
-        for idx, edge in enumerate(all_hyperedges):
+        for edge_id, edge in all_hyperedges.items():
             score = 0
             
             # Rule 1: Invalid edges (high priority removal)
             valid_members = [m for m in edge if m in personas]
             if len(valid_members) < 2:
                 score -= 1000
-                edge_scores.append((idx, score))
+                edge_scores.append((edge_id, score))
                 continue
             
             # Rule 2: Redundancy check (overlapping members)
@@ -66,14 +68,14 @@ class HeuristicRemoverAgent(BaseAgent):
             if len(edge) < 2 or len(edge) > 8:
                 score -= 10
             
-            edge_scores.append((idx, score))
+            edge_scores.append((edge_id, score))
         
         # Sort by score (lowest = most likely to remove)
         edge_scores.sort(key=lambda x: x[1])
         
         # Remove bottom 10% or at least 1
         num_to_remove = max(1, len(all_hyperedges) // 10)
-        edges_to_remove = [idx for idx, score in edge_scores[:num_to_remove] if score < 0]
+        edges_to_remove = [edge_id for edge_id, score in edge_scores[:num_to_remove] if score < 0]
         
         return {
             'action': 'remove',
@@ -103,6 +105,7 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
     
@@ -115,6 +118,7 @@ if __name__ == "__main__":
         iterations=args.iterations,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
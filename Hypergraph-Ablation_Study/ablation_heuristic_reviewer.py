@@ -91,6 +91,7 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
     
@@ -103,6 +104,7 @@ if __name__ == "__main__":
         iterations=args.iterations,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
@@ -7,84 +7,232 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Hypergraph-Generator'))
 
 from LLM_MAS_Hypergraph_Configuration import *
+from persona_scoring import PersonaScorer, top_k, gumbel_top_k, numpy_rng
+import numpy as np
 import random
-from collections import Counter
+import multiprocessing
+from collections import Counter, deque
+
+
+def statistical_members(scorer: PersonaScorer, person_id: str, target_size: int, rng, np_rng) -> List[str]:
+    """
+    Members of a statistically generated hyperedge around person_id: score every persona by
+    similarity * (degree + 1), draw ~80% of the members weighted from the 50 best and fill up
+    uniformly at random
+    """
+    row = scorer.row(person_id)
+    
+    # similarity * (degree + 1) for every persona at once
+    similarity = (1 + scorer.equal('gender', row) + 2 * scorer.equal('race/ethnicity', row)
+                  + scorer.age_within(row, 10) + scorer.equal('religion', row)
+                  + scorer.equal('political affiliation', row))
+    scores = (similarity * (scorer.degrees + 1)).astype(np.float64)
+    scores[row] = -np.inf
+    num_candidates = len(scores) - 1
+    if num_candidates <= 0:
+        return [person_id]
+    
+    num_to_select = min(target_size - 1, num_candidates)
+    num_high_score = max(1, int(num_to_select * 0.8))
+    
+    # Weighted draw without replacement among the 50 best candidates
+    top_rows = top_k(scores, min(50, num_candidates))
+    picks = gumbel_top_k(np.maximum(scores[top_rows], 1), num_high_score, np_rng)
+    selected_rows = top_rows[picks].tolist()
+    
+    remaining_needed = num_to_select - len(selected_rows)
+    if remaining_needed > 0:
+        # Uniform draw among all other candidates: a random subset large enough to
+        # still hold remaining_needed rows after dropping the used ones
+        used_rows = set(selected_rows) | {row}
+        pool = rng.sample(range(len(scores)), min(len(scores), remaining_needed + len(used_rows)))
+        selected_rows.extend([r for r in pool if r not in used_rows][:remaining_needed])
+    
+    return [person_id] + scorer.person_ids(selected_rows)
+
+
+def _statistical_shard(connection, personas, seed: int, attachment_probability: float, max_attempts: int):
+    """
+    Worker process of the sharded building phase. Keeps its own copy of the degrees and of
+    the known hyperedges (committed ones plus its own proposals), applies the hyperedges
+    exchanged with every round and proposes one hyperedge per requested size, retrying
+    proposals that duplicate a known hyperedge.
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    scorer = PersonaScorer(personas)
+    degree_index = DegreeIndex()
+    known_edges = EdgeDedupIndex()
+    indexes = (degree_index, scorer, known_edges)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        sizes, added_edges, dropped_edges = message
+        for edge in added_edges:
+            for index in indexes:
+                index.add(edge)
+        for edge in dropped_edges:
+            for index in indexes:
+                index.remove(edge)
+        
+        edges = []
+        for size in sizes:
+            for _ in range(max_attempts):
+                # Preferential attachment on the local degrees, as in the single-process building phase
+                if len(degree_index) and rng.random() < attachment_probability:
+                    person_id = degree_index.sample(rng)
+                else:
+                    person_id = scorer.person_ids([rng.randrange(len(scorer))])[0]
+                edge = statistical_members(scorer, person_id, size, rng, np_rng)
+                if len(set(edge)) == len(edge) >= 2 and edge not in known_edges:
+                    break
+            for index in indexes:
+                index.add(edge)
+            edges.append(edge)
+        connection.send(edges)
+    connection.close()
+
 
 class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
     """Hypergraph generator using only statistical information (no LLM)"""
     
-    def __init__(self, *args, **kwargs):
+    # Attempts of a worker to avoid a duplicate, and of the merger to replace a rejected
+    # proposal before the sharded building phase leaves the rest to the single-process iterations
+    SHARD_MAX_REJECTIONS = 100
+    
+    def __init__(self, *args, workers: int = 1, exchange_interval: int = 500, **kwargs):
+        """
+        :param workers: Worker processes of the building phase (1: single process, groups_per_iteration per iteration)
+        :param exchange_interval: Hyperedges each worker proposes between two degree exchanges
+        """
         super().__init__(*args, **kwargs)
+        self.workers = max(1, workers)
+        self.exchange_interval = max(1, exchange_interval)
+        self._np_rng = None
         print("🚫 Ablation: LLM disabled, using pure statistical methods")
+        if self.workers > 1:
+            print(f"🧩 Sharded building phase: {self.workers} worker processes, degree exchange every {self.exchange_interval} hyperedges per worker")
+    
+    def _rebuild_edge_indexes(self):
+        """Edge indexes plus the encoded personas and degree array of the vectorized scorer"""
+        super()._rebuild_edge_indexes()
+        self.persona_scorer = PersonaScorer(self.personas, hyperedges=self.hyperedges)
+        self._edge_indexes.append(self.persona_scorer)
     
     def _statistical_generate(self, person_id: str, target_size: int) -> List[str]:
-        """Statistical relationship generation (replaces LLM generator) - optimized version"""
-        node_degrees = {}
-        for edge in self.hyperedges:
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
-        
-        person_data = self.personas[person_id]
-        candidates = []
-        
-        for other_id, other_data in self.personas.items():
-            if other_id == person_id:
-                continue
-            
-            similarity_score = 1
-            if other_data['gender'] == person_data['gender']:
-                similarity_score += 1
-            if other_data['race/ethnicity'] == person_data['race/ethnicity']:
-                similarity_score += 2
-            if abs(int(other_data['age']) - int(person_data['age'])) <= 10:
-                similarity_score += 1
-            if other_data['religion'] == person_data['religion']:
-                similarity_score += 1
-            if other_data['political affiliation'] == person_data['political affiliation']:
-                similarity_score += 1
-            
-            degree_weight = node_degrees.get(other_id, 0) + 1
-            final_score = similarity_score * degree_weight
-            
-            candidates.append((other_id, final_score))
-        
-        if not candidates:
-            available = [pid for pid in self.personas.keys() if pid != person_id]
-            if len(available) >= target_size - 1:
-                selected = random.sample(available, target_size - 1)
-            else:
-                selected = available
-            return [person_id] + selected
-        
-        candidates.sort(key=lambda x: x[1], reverse=True)
-        
-        selected = []
-        num_to_select = min(target_size - 1, len(candidates))
-        
-        num_high_score = max(1, int(num_to_select * 0.8))
-        top_candidates = candidates[:min(50, len(candidates))]
+        """Statistical relationship generation (replaces LLM generator) - vectorized over all personas"""
+        if self._np_rng is None:
+            self._np_rng = numpy_rng()
+        return statistical_members(self.persona_scorer, person_id, target_size, random, self._np_rng)
+    
+    def _sharded_building(self, iteration_results: Dict[str, Any]) -> int:
+        """
+        Generate the rest of the building phase in worker processes, return the number of added hyperedges.
         
-        weights = [max(1, score) for _, score in top_candidates]
-        high_score_selected = []
-        for _ in range(num_high_score):
-            if not top_candidates:
-                break
-            chosen_idx = random.choices(range(len(top_candidates)), weights=weights)[0]
-            high_score_selected.append(top_candidates[chosen_idx][0])
-            top_candidates.pop(chosen_idx)
-            weights.pop(chosen_idx)
+        Position p of the size sequence belongs to shard p % workers. Every round each shard
+        proposes hyperedges for up to exchange_interval of its positions from its own copy of
+        the degrees and hyperedges; the merger then commits all proposals in sequence order
+        through the normal review and edge index path, so edge_size_sequence[:current_edge_index]
+        always matches the hyperedges and checkpoints stay valid. A proposal rejected by the
+        review (two shards proposed the same hyperedge) is replaced by one the merger generates
+        on the merged state. With the next round every shard receives the hyperedges committed
+        for the other shards and its own rejected proposals, i.e. the degree changes it has not
+        counted yet.
         
-        selected.extend(high_score_selected)
+        Rounds run in lockstep: the merger waits for every shard's proposals and commits them
+        while all workers sit idle, so only proposal generation runs in parallel.
+        """
+        start, end = self.current_edge_index, len(self.edge_size_sequence)
+        workers = min(self.workers, end - start)
+        queues = [deque(range(start + shard, end, workers)) for shard in range(workers)]
+        added = [list(self.hyperedges) for _ in range(workers)]   # per shard: hyperedges to add before the next round
+        dropped = [[] for _ in range(workers)]                    # per shard: own proposals to take back
         
-        remaining_needed = num_to_select - len(selected)
-        if remaining_needed > 0:
-            used_ids = set(selected + [person_id])
-            available = [cid for cid, _ in candidates if cid not in used_ids]
-            if available:
-                random_selected = random.sample(available, min(remaining_needed, len(available)))
-                selected.extend(random_selected)
+        context = multiprocessing.get_context('spawn')
+        connections, processes = [], []
+        for shard in range(workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_statistical_shard, daemon=True,
+                                      args=(child, self.personas, random.getrandbits(64), 0.8,
+                                            self.SHARD_MAX_REJECTIONS))
+            process.start()
+            child.close()
+            connections.append(parent)
+            processes.append(process)
         
-        return [person_id] + selected
+        all_persons = list(self.personas.keys())
+        generated = rounds = 0
+        try:
+            while self.current_edge_index < end:
+                rounds += 1
+                requested = []
+                for shard, connection in enumerate(connections):
+                    positions = [queues[shard].popleft() for _ in range(min(self.exchange_interval, len(queues[shard])))]
+                    connection.send(([self.edge_size_sequence[p] for p in positions], added[shard], dropped[shard]))
+                    requested.append(positions)
+                proposals = {}
+                for shard, connection in enumerate(connections):
+                    for position, edge in zip(requested[shard], connection.recv()):
+                        proposals[position] = (shard, edge)
+                
+                # Commit in sequence order
+                added = [[] for _ in range(workers)]
+                dropped = [[] for _ in range(workers)]
+                round_start, rejected, stuck = self.current_edge_index, 0, False
+                while self.current_edge_index in proposals:
+                    shard, edge = proposals.pop(self.current_edge_index)
+                    if self._statistical_review(edge):
+                        others = [other for other in range(workers) if other != shard]
+                    else:
+                        rejected += 1
+                        dropped[shard].append(edge)
+                        edge = self._replacement_edge(all_persons, self.edge_size_sequence[self.current_edge_index])
+                        if edge is None:
+                            stuck = True
+                            break
+                        others = range(workers)
+                    self._add_hyperedge(edge)
+                    for other in others:
+                        added[other].append(edge)
+                    self.current_edge_index += 1
+                
+                generated += self.current_edge_index - round_start
+                progress = (self.current_edge_index / end) * 100
+                print(f"🧩 Round {rounds}: committed {self.current_edge_index - round_start}, "
+                      f"replaced {rejected} rejected proposals (progress: {progress:.1f}%)")
+                iteration_results['actions'].append({
+                    'action': 'generate',
+                    'agent_id': 'sharded_statistical_generator',
+                    'round': rounds,
+                    'committed': self.current_edge_index - round_start,
+                    'rejected': rejected,
+                    'reasoning': 'Sharded statistical generation based on similarity and preferential attachment'
+                })
+                if stuck:
+                    print(f"⚠️ No acceptable hyperedge for position {self.current_edge_index} after "
+                          f"{self.SHARD_MAX_REJECTIONS} attempts, continuing single-process")
+                    break
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        return generated
+    
+    def _replacement_edge(self, all_persons: List[str], target_size: int) -> List[str]:
+        """Hyperedge generated by the merger for a rejected worker proposal, None if every attempt is rejected"""
+        for _ in range(self.SHARD_MAX_REJECTIONS):
+            main_person = self._select_person_by_degree(all_persons, 0.8, verbose=False)
+            edge = self._statistical_generate(main_person, target_size)
+            if self._statistical_review(edge):
+                return edge
+        return None
     
     def _statistical_review(self, hyperedge: List[str]) -> bool:
         """Statistical relationship review (replaces LLM reviewer) - very lenient version"""
@@ -98,6 +246,9 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
         if len(set(hyperedge)) < len(hyperedge):
             return False
         
+        if self._is_duplicate_hyperedge(hyperedge):
+            return False
+        
         return True
     
     def _statistical_remove(self, iteration: int) -> List[int]:
@@ -106,16 +257,16 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
             return []
         
         edge_scores = []
-        for idx, edge in enumerate(self.hyperedges):
+        for edge_id, edge in self.hyperedges.items():
             if len(edge) < 2:
-                edge_scores.append((idx, -100))
+                edge_scores.append((edge_id, -100))
                 continue
             
             diversity = 0
             valid_members = [m for m in edge if m in self.personas]
             
             if len(valid_members) < 2:
-                edge_scores.append((idx, -100))
+                edge_scores.append((edge_id, -100))
                 continue
             
             ages = [int(self.personas[m]['age']) for m in valid_members]
@@ -125,28 +276,24 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
             races = [self.personas[m]['race/ethnicity'] for m in valid_members]
             
             diversity = len(set(genders)) + len(set(races)) + (age_variance / 10)
-            edge_scores.append((idx, diversity))
+            edge_scores.append((edge_id, diversity))
         
         edge_scores.sort(key=lambda x: x[1])
-        to_remove = [idx for idx, score in edge_scores[:max(1, len(self.hyperedges) // 20)] if score < 0]
+        to_remove = [edge_id for edge_id, score in edge_scores[:max(1, len(self.hyperedges) // 20)] if score < 0]
         
         return to_remove
     
     def _statistical_remove_for_evolution(self, num_to_remove: int) -> List[int]:
-        """Evolution phase removal: remove specified number of low-quality hyperedges"""
+        """Evolution phase removal: edge IDs of the specified number of low-quality hyperedges"""
         if len(self.hyperedges) == 0 or num_to_remove == 0:
             return []
         
         edge_scores = []
-        node_degrees = {}
-        
-        for edge in self.hyperedges:
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
+        node_degrees = self.degree_index.degrees
         
-        for idx, edge in enumerate(self.hyperedges):
+        for edge_id, edge in self.hyperedges.items():
             if len(edge) < 2:
-                edge_scores.append((idx, -1000))
+                edge_scores.append((edge_id, -1000))
                 continue
             
             quality_score = 0
@@ -166,10 +313,10 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
                 
                 quality_score += (gender_diversity + race_diversity * 2 + age_variance / 10) * 0.7
             
-            edge_scores.append((idx, quality_score))
+            edge_scores.append((edge_id, quality_score))
         
         edge_scores.sort(key=lambda x: x[1])
-        to_remove = [idx for idx, score in edge_scores[:num_to_remove]]
+        to_remove = [edge_id for edge_id, score in edge_scores[:num_to_remove]]
         
         return to_remove
     
@@ -178,10 +325,7 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
         if not self.hyperedges:
             return "INCREASE_CONNECTIONS"
         
-        node_degrees = {}
-        for edge in self.hyperedges:
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
+        node_degrees = self.degree_index.degrees
         
         connected_nodes = len(node_degrees)
         total_nodes = len(self.personas)
@@ -236,9 +380,9 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
                 edges_to_remove = self._statistical_remove_for_evolution(num_to_remove)
                 
                 removed_count = 0
-                for edge_idx in sorted(edges_to_remove, reverse=True):
-                    if 0 <= edge_idx < len(self.hyperedges):
-                        removed_edge = self.hyperedges.pop(edge_idx)
+                for edge_id in edges_to_remove:
+                    if self.hyperedges.has_edge(edge_id):
+                        removed_edge = self._remove_hyperedge(edge_id)
                         print(f"🗑️ Evolution removal: {' '.join(removed_edge)}")
                         removed_count += 1
                 
@@ -274,6 +418,10 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
                 all_persons = list(self.personas.keys())
                 generated_count = 0
                 max_attempts = self.groups_per_iteration * 3
+                if self.workers > 1:
+                    # The whole remaining building phase in one iteration, spread over worker processes
+                    generated_count = self._sharded_building(iteration_results)
+                    max_attempts = 0
             
             for attempt in range(max_attempts):
                 if not is_evolution_phase:
@@ -285,20 +433,7 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
                         break
                     target_edge_size = random.choice(available_sizes)
                 
-                if len(self.hyperedges) > 0:
-                    node_degrees = {}
-                    for edge in self.hyperedges:
-                        for node in edge:
-                            node_degrees[node] = node_degrees.get(node, 0) + 1
-                    
-                    if random.random() < 0.8 and node_degrees:
-                        nodes_with_degrees = list(node_degrees.items())
-                        weights = [degree + 1 for _, degree in nodes_with_degrees]
-                        main_person = random.choices([node for node, _ in nodes_with_degrees], weights=weights)[0]
-                    else:
-                        main_person = random.choice(all_persons)
-                else:
-                    main_person = random.choice(all_persons)
+                main_person = self._select_person_by_degree(all_persons, 0.8, verbose=False)
                 
                 new_edge = self._statistical_generate(main_person, target_edge_size)
                 
@@ -309,8 +444,8 @@ class StatisticalOnlyGenerator(ProtectedMASHypergraphGenerator):
                     'reasoning': 'Statistical generation based on similarity and preferential attachment'
                 })
                 
-                if len(new_edge) >= 2 and len(set(new_edge)) == len(new_edge):
-                    self.hyperedges.append(new_edge)
+                if self._statistical_review(new_edge):
+                    self._add_hyperedge(new_edge)
                     
                     if is_evolution_phase:
                         print(f"✅ Evolution generated edge(size {len(new_edge)}): {' '.join(new_edge)}")
@@ -363,8 +498,16 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for the building phase; >1 generates the whole building phase in one sharded iteration")
+    parser.add_argument("--exchange_interval", type=int, default=500,
+                        help="Hyperedges each worker proposes between two degree exchanges")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed (size sequence, selection and worker seeds)")
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
     
     generator = StatisticalOnlyGenerator(
         personas_file=args.personas,
@@ -373,8 +516,11 @@ if __name__ == "__main__":
         groups_per_iteration=args.groups_per_iter,
         max_members_per_group=args.max_members,
         iterations=args.iterations,
-        model=args.model
+        model=args.model,
+        workers=args.workers,
+        exchange_interval=args.exchange_interval
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
@@ -58,18 +58,8 @@ class NoRemoverMASGenerator(ProtectedMASHypergraphGenerator):
                     
                 target_edge_size = self.edge_size_sequence[self.current_edge_index]
                 
-                if is_building_phase and len(self.hyperedges) > 0:
-                    node_degrees = {}
-                    for edge in self.hyperedges:
-                        for node in edge:
-                            node_degrees[node] = node_degrees.get(node, 0) + 1
-                    
-                    if random.random() < 0.85 and node_degrees:
-                        nodes_with_degrees = list(node_degrees.items())
-                        weights = [degree + 1 for _, degree in nodes_with_degrees]
-                        main_person = random.choices([node for node, _ in nodes_with_degrees], weights=weights)[0]
-                    else:
-                        main_person = random.choice(all_persons)
+                if is_building_phase:
+                    main_person = self._select_person_by_degree(all_persons, 0.85, verbose=False)
                 else:
                     main_person = random.choice(all_persons)
                 
@@ -90,17 +80,16 @@ class NoRemoverMASGenerator(ProtectedMASHypergraphGenerator):
                 # 4. Review logic (keep)
                 if len(generator_decision['selected_members']) > 1:
                     if is_building_phase:
-                        self._current_hyperedges = self.hyperedges
                         should_approve = self._lenient_quality_check(generator_decision['selected_members'], self.personas)
                         if should_approve:
-                            self.hyperedges.append(generator_decision['selected_members'])
+                            self._add_hyperedge(generator_decision['selected_members'])
                             print(f"✅ Add edge(NoRemover, size {len(generator_decision['selected_members'])}): {' '.join(generator_decision['selected_members'])}")
                             generated_count += 1
                             self.current_edge_index += 1
                     else:
                         should_approve = self._moderate_llm_review(generator_decision['selected_members'], self.personas, self.hyperedges)
                         if should_approve:
-                            self.hyperedges.append(generator_decision['selected_members'])
+                            self._add_hyperedge(generator_decision['selected_members'])
                             print(f"✅ Add edge(NoRemover, size {len(generator_decision['selected_members'])}): {' '.join(generator_decision['selected_members'])}")
                             generated_count += 1
                             self.current_edge_index += 1
@@ -129,6 +118,7 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
     
@@ -141,6 +131,7 @@ if __name__ == "__main__":
         iterations=args.iterations,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
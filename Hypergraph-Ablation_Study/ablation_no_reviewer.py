@@ -48,10 +48,10 @@ class NoReviewerMASGenerator(ProtectedMASHypergraphGenerator):
                 remover_decision = self.agents['remover'].make_decision(remover_context)
                 iteration_results['actions'].append(remover_decision)
                 
-                edges_to_remove = sorted(remover_decision['edges_to_remove'], reverse=True)[:2]
-                for edge_idx in edges_to_remove:
-                    if 0 <= edge_idx < len(self.hyperedges):
-                        removed_edge = self.hyperedges.pop(edge_idx)
+                edges_to_remove = list(dict.fromkeys(remover_decision['edges_to_remove']))[:2]
+                for edge_id in edges_to_remove:
+                    if self.hyperedges.has_edge(edge_id):
+                        removed_edge = self._remove_hyperedge(edge_id)
                         print(f"🗑️ Remove edge: {' '.join(removed_edge)}")
             
             # 3. Generator agent (keep)
@@ -65,18 +65,8 @@ class NoReviewerMASGenerator(ProtectedMASHypergraphGenerator):
                     
                 target_edge_size = self.edge_size_sequence[self.current_edge_index]
                 
-                if is_building_phase and len(self.hyperedges) > 0:
-                    node_degrees = {}
-                    for edge in self.hyperedges:
-                        for node in edge:
-                            node_degrees[node] = node_degrees.get(node, 0) + 1
-                    
-                    if random.random() < 0.85 and node_degrees:
-                        nodes_with_degrees = list(node_degrees.items())
-                        weights = [degree + 1 for _, degree in nodes_with_degrees]
-                        main_person = random.choices([node for node, _ in nodes_with_degrees], weights=weights)[0]
-                    else:
-                        main_person = random.choice(all_persons)
+                if is_building_phase:
+                    main_person = self._select_person_by_degree(all_persons, 0.85, verbose=False)
                 else:
                     main_person = random.choice(all_persons)
                 
@@ -97,7 +87,7 @@ class NoReviewerMASGenerator(ProtectedMASHypergraphGenerator):
                 # 4. Reviewer disabled - direct approve
                 if len(generator_decision['selected_members']) > 1:
                     print("🚫 Ablation: Reviewer disabled, direct approve")
-                    self.hyperedges.append(generator_decision['selected_members'])
+                    self._add_hyperedge(generator_decision['selected_members'])
                     print(f"✅ Add edge(NoReviewer, size{len(generator_decision['selected_members'])}): {' '.join(generator_decision['selected_members'])}")
                     generated_count += 1
                     self.current_edge_index += 1
@@ -133,6 +123,7 @@ if __name__ == "__main__":
     parser.add_argument("--iterations", type=int, default=10)
     parser.add_argument("--model", type=str, default="gpt-3.5-turbo")
     parser.add_argument("--resume", type=str, default=None)
+    add_backend_arguments(parser)
     
     args = parser.parse_args()
     
@@ -145,6 +136,7 @@ if __name__ == "__main__":
         iterations=args.iterations,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
     
     generator.run(resume_from_dir=args.resume)
 
@@ -9,12 +9,15 @@ Outputs JSON dict keyed by string IDs: {"0": {...}, "1": {...}}
 """
 
 import os
+import sys
 import json
 import argparse
 from typing import Dict, Any, List
-from openai import OpenAI
 import random
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Hypergraph-Generator'))
+from llm_backends import LLMBackend, OpenAIBackend, add_backend_arguments, configure_backend_from_args
+
 
 def load_api_key(api_key_file: str) -> str:
     """Read first non-empty API Key line, avoid multi-line illegal header errors"""
@@ -38,8 +41,8 @@ def load_personas(personas_path: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-def call_llm(client: OpenAI, model: str, system_prompt: str, user_prompt: str, max_tokens: int = 800, temperature: float = 0.7) -> str:
-    resp = client.chat.completions.create(
+def call_llm(backend: LLMBackend, model: str, system_prompt: str, user_prompt: str, max_tokens: int = 800, temperature: float = 0.7) -> str:
+    resp = backend.complete(
         model=model,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -48,7 +51,7 @@ def call_llm(client: OpenAI, model: str, system_prompt: str, user_prompt: str, m
         max_tokens=max_tokens,
         temperature=temperature,
     )
-    return resp.choices[0].message.content
+    return resp.content
 
 
 def ensure_json(text: str) -> Dict[str, Any]:
@@ -147,18 +150,18 @@ def build_single_prompt(entity_type: str) -> str:
     )
 
 
-def prompt_until_json(client: OpenAI, model: str, system_prompt: str, user_prompt: str, retries: int = 3) -> Dict[str, Any]:
+def prompt_until_json(backend: LLMBackend, model: str, system_prompt: str, user_prompt: str, retries: int = 3) -> Dict[str, Any]:
     last_err = None
     for attempt in range(1, retries + 1):
         try:
-            text = call_llm(client, model, system_prompt, user_prompt, max_tokens=400, temperature=0.7)
+            text = call_llm(backend, model, system_prompt, user_prompt, max_tokens=400, temperature=0.7)
             return ensure_json(text)
         except Exception as e:
             last_err = e
     raise last_err
 
 
-def generate_entities(entity_type: str, n: int, model: str, api_key_file: str, base_url: str, personas_path: str = None) -> Dict[str, Any]:
+def generate_entities(entity_type: str, n: int, model: str, api_key_file: str, base_url: str, personas_path: str = None, backend: LLMBackend = None) -> Dict[str, Any]:
     if entity_type == 'personas':
         if not personas_path:
             raise ValueError('personas_path is required when entity_type=personas')
@@ -167,8 +170,8 @@ def generate_entities(entity_type: str, n: int, model: str, api_key_file: str, b
     if entity_type not in TEMPLATES:
         raise ValueError(f'Unsupported entity_type: {entity_type}')
 
-    api_key = load_api_key(api_key_file)
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    if backend is None:
+        backend = OpenAIBackend(api_key=load_api_key(api_key_file), base_url=base_url)
 
     tpl = TEMPLATES[entity_type]
     system_prompt = tpl['system']
@@ -178,7 +181,7 @@ def generate_entities(entity_type: str, n: int, model: str, api_key_file: str, b
     seen_names = set()
     for i in range(n):
         try:
-            obj = prompt_until_json(client, model, system_prompt, single_prompt, retries=3)
+            obj = prompt_until_json(backend, model, system_prompt, single_prompt, retries=3)
             key_for_dup = None
             if entity_type == 'drug':
                 key_for_dup = str(obj.get('drug_name', '')).strip().lower()
@@ -206,9 +209,16 @@ def main():
     parser.add_argument('--base_url', type=str, default='https://api.aigc369.com/v1', help='OpenAI-compatible base url')
     parser.add_argument('--personas_path', type=str, default='Hypergraph-Generator/personas1000.json', help='path to personas json when entity_type=personas')
     parser.add_argument('--output', type=str, default='entities.json', help='output json path')
+    add_backend_arguments(parser)
     args = parser.parse_args()
 
-    data = generate_entities(args.entity_type, args.n, args.model, args.api_key_file, args.base_url, args.personas_path)
+    backend = None
+    if args.entity_type != 'personas':
+        backend = configure_backend_from_args(
+            args, openai_factory=lambda: OpenAIBackend(api_key=load_api_key(args.api_key_file), base_url=args.base_url)
+        )
+
+    data = generate_entities(args.entity_type, args.n, args.model, args.api_key_file, args.base_url, args.personas_path, backend=backend)
     with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False)
     print(f'[OK] Saved {len(data)} entities to {args.output}')
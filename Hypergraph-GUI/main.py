@@ -7,9 +7,12 @@ import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
 import json
 import os
+import shutil
 import sys
 import threading
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 from PIL import Image, ImageTk
 import glob
@@ -753,6 +756,7 @@ class HyperLLMGUI:
     
     def _run_generation(self):
         """Run generation process"""
+        events_dir = None
         try:
             # Ensure API configuration is set
             if self.api_base_url_var.get():
@@ -777,6 +781,11 @@ class HyperLLMGUI:
             if self.file_vars['resume_directory'].get():
                 cmd.extend(["--resume", self.file_vars['resume_directory'].get()])
             
+            # Progress, phase and hyperedges come from the generator's JSONL event stream
+            events_dir = tempfile.mkdtemp(prefix="hyperllm_gui_")
+            events_file = os.path.join(events_dir, "events.jsonl")
+            cmd.extend(["--events", events_file])
+            
             self._log_message(f"Starting generation: {' '.join(cmd)}")
             
             # Set UTF-8 environment for subprocess on Windows
@@ -795,6 +804,10 @@ class HyperLLMGUI:
                 env=env
             )
             
+            events_thread = threading.Thread(target=self._follow_events, args=(events_file, process))
+            events_thread.daemon = True
+            events_thread.start()
+            
             # Read output
             for line in process.stdout:
                 if not self.is_running:
@@ -802,9 +815,9 @@ class HyperLLMGUI:
                     break
                 
                 self._log_message(line.strip())
-                self._parse_output_line(line)
             
             process.wait()
+            events_thread.join(timeout=2)
             
             if self.is_running:
                 self._log_message("Generation completed!")
@@ -814,50 +827,74 @@ class HyperLLMGUI:
             self._log_message(f"Error: {str(e)}")
             messagebox.showerror("Error", str(e))
         finally:
+            # The event stream is only read while the generator runs
+            if events_dir is not None:
+                shutil.rmtree(events_dir, ignore_errors=True)
             self.is_running = False
             self.start_btn.config(state='normal')
             self.stop_btn.config(state='disabled')
     
-    def _parse_output_line(self, line):
-        """Parse output line and update UI"""
-        try:
-            # Detect phase
-            if "Building Phase" in line or "建设阶段" in line:
-                self.root.after(0, lambda: self.phase_label.config(text=self._t("building_phase"), fg="orange"))
-            elif "Evolution Phase" in line or "演化阶段" in line:
-                self.root.after(0, lambda: self.phase_label.config(text=self._t("evolution_phase"), fg="green"))
-            
-            # Detect hyperedge additions
-            if "Added hyperedge" in line or "添加超边" in line or "✅" in line:
-                self.root.after(0, lambda: self._add_hyperedge_display(line))
-            
-            # Update progress
-            if "progress:" in line.lower() or "进度" in line:
-                # Try to extract percentage
-                import re
-                match = re.search(r'(\d+\.?\d*)%', line)
-                if match:
-                    percent = float(match.group(1))
-                    self.root.after(0, lambda p=percent: self.progress_bar.config(value=p))
-        
-        except Exception as e:
-            pass  # Silently ignore parsing errors
+    def _follow_events(self, events_file, process):
+        """Tail the generator's event stream until the process exits, updating the UI once per batch of events"""
+        position = 0
+        partial = ""
+        while True:
+            finished = process.poll() is not None
+            if os.path.exists(events_file):
+                with open(events_file, 'r', encoding='utf-8') as f:
+                    f.seek(position)
+                    chunk = f.read()
+                    position = f.tell()
+                partial += chunk
+                *complete, partial = partial.split('\n')
+                events = []
+                for line in complete:
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass  # Silently ignore malformed lines
+                if events:
+                    self.root.after(0, lambda e=events: self._apply_events(e))
+            if finished or not self.is_running:
+                break
+            time.sleep(0.5)
     
-    def _add_hyperedge_display(self, line):
-        """Add hyperedge to display"""
-        self.edges_text.insert('1.0', line + '\n')
+    def _apply_events(self, events):
+        """Update phase, progress and hyperedge display from run events"""
+        added = []
+        count_delta = 0
+        for event in events:
+            kind = event.get('event')
+            if kind == 'phase_changed':
+                if event['phase'] == 'building':
+                    self.phase_label.config(text=self._t("building_phase"), fg="orange")
+                else:
+                    self.phase_label.config(text=self._t("evolution_phase"), fg="green")
+            elif kind == 'edge_added':
+                added.append(f"#{event['edge_id']} (size {event['size']}): {' '.join(event['edge'])}")
+                count_delta += 1
+            elif kind == 'edge_removed':
+                count_delta -= 1
+            elif kind == 'iteration_done':
+                self.progress_bar.config(value=event['progress'] * 100)
+                self.edges_label.config(text=str(event['hyperedges']))
+                count_delta = 0
+        
+        if added:
+            self._add_hyperedge_display(added[-100:])
+        if count_delta:
+            try:
+                self.edges_label.config(text=str(int(self.edges_label.cget('text')) + count_delta))
+            except ValueError:
+                pass
+    
+    def _add_hyperedge_display(self, lines):
+        """Add hyperedges to display, newest first"""
+        self.edges_text.insert('1.0', '\n'.join(reversed(lines)) + '\n')
         # Keep only last 100 lines
         lines = self.edges_text.get('1.0', 'end').split('\n')
         if len(lines) > 100:
             self.edges_text.delete(f'{len(lines) - 100}.0', 'end')
-        
-        # Update count
-        current = self.edges_label.cget('text')
-        try:
-            count = int(current) + 1
-            self.edges_label.config(text=str(count))
-        except:
-            pass
     
     def _log_message(self, message):
         """Add message to log"""
@@ -4,9 +4,18 @@ Provides real-time plotting and analysis
 """
 
 import json
+import os
+import sys
 from collections import Counter
 from pathlib import Path
 
+# Columnar persona stores (optional, needs numpy)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Hypergraph-Generator'))
+try:
+    from persona_store import PersonaStore, load_personas
+except ImportError:
+    PersonaStore = load_personas = None
+
 
 class HypergraphStats:
     """Calculate and format hypergraph statistics"""
@@ -94,7 +103,7 @@ class PersonasLoader:
     """Load and display persona information"""
     
     def __init__(self, personas_file):
-        """Load personas from JSON file"""
+        """Load personas from JSON file or columnar persona store"""
         self.personas_file = personas_file
         self.personas = {}
         self._load_personas()
@@ -102,8 +111,11 @@ class PersonasLoader:
     def _load_personas(self):
         """Load personas from file"""
         try:
-            with open(self.personas_file, 'r', encoding='utf-8') as f:
-                self.personas = json.load(f)
+            if load_personas is not None:
+                self.personas = load_personas(self.personas_file)
+            else:
+                with open(self.personas_file, 'r', encoding='utf-8') as f:
+                    self.personas = json.load(f)
         except Exception as e:
             print(f"Error loading personas: {e}")
     
@@ -122,25 +134,35 @@ class PersonasLoader:
         race_count = Counter()
         age_ranges = {'18-30': 0, '31-50': 0, '51-70': 0, '70+': 0}
         
-        for persona_id, persona in self.personas.items():
-            gender_count[persona.get('gender', 'unknown')] += 1
-            race_count[persona.get('race/ethnicity', 'unknown')] += 1
+        if PersonaStore is not None and isinstance(self.personas, PersonaStore):
+            # Columnar store: count codes instead of decoding every persona
+            gender_count.update(self.personas.value_counts('gender'))
+            race_count.update(self.personas.value_counts('race/ethnicity'))
+            ages = self.personas.column('age')
+            age_ranges['18-30'] = int(((ages >= 18) & (ages <= 30)).sum())
+            age_ranges['31-50'] = int(((ages >= 31) & (ages <= 50)).sum())
+            age_ranges['51-70'] = int(((ages >= 51) & (ages <= 70)).sum())
+            age_ranges['70+'] = int((ages > 70).sum())
+        else:
+            for persona_id, persona in self.personas.items():
+                gender_count[persona.get('gender', 'unknown')] += 1
+                race_count[persona.get('race/ethnicity', 'unknown')] += 1
             
-            age = persona.get('age', 0)
-            if isinstance(age, str):
-                try:
-                    age = int(age)
-                except:
-                    age = 0
+                age = persona.get('age', 0)
+                if isinstance(age, str):
+                    try:
+                        age = int(age)
+                    except:
+                        age = 0
             
-            if 18 <= age <= 30:
-                age_ranges['18-30'] += 1
-            elif 31 <= age <= 50:
-                age_ranges['31-50'] += 1
-            elif 51 <= age <= 70:
-                age_ranges['51-70'] += 1
-            elif age > 70:
-                age_ranges['70+'] += 1
+                if 18 <= age <= 30:
+                    age_ranges['18-30'] += 1
+                elif 31 <= age <= 50:
+                    age_ranges['31-50'] += 1
+                elif 51 <= age <= 70:
+                    age_ranges['51-70'] += 1
+                elif age > 70:
+                    age_ranges['70+'] += 1
         
         text = "=== Demographics Summary ===\n\n"
         text += f"Total Personas: {len(self.personas)}\n\n"
@@ -2,6 +2,9 @@ import openai
 import argparse
 import os
 
+from llm_backends import (OpenAIBackend, LLMBackendError, get_backend, set_default_backend_factory,
+                          add_backend_arguments, configure_backend_from_args)
+
 
 # API Key
 def load_api_keys(filename="api-key.txt"):
@@ -12,22 +15,25 @@ def load_api_keys(filename="api-key.txt"):
     return openai_key
 
 
-# Load API Key
-openai_key = load_api_keys("api-key.txt")
-
 # Setup OpenAI client
 # IMPORTANT: Replace with your own API base URL
 # Example: "https://api.openai.com/v1" or your custom endpoint
 BASE_URL_OPENAI = os.environ.get("OPENAI_BASE_URL", "PLEASE_SET_YOUR_BASE_URL")
 
-if BASE_URL_OPENAI == "PLEASE_SET_YOUR_BASE_URL":
-    raise ValueError(
-        "Please set OPENAI_BASE_URL environment variable or modify BASE_URL_OPENAI in the code.\n"
-        "Example: export OPENAI_BASE_URL='https://api.openai.com/v1'"
-    )
 
-# Create OpenAI client
-client = openai.OpenAI(api_key=openai_key, base_url=BASE_URL_OPENAI)
+def create_openai_backend() -> OpenAIBackend:
+    """Resolve API key and base URL and create the OpenAI backend (runs on the first LLM call only)"""
+    if BASE_URL_OPENAI == "PLEASE_SET_YOUR_BASE_URL":
+        raise ValueError(
+            "Please set OPENAI_BASE_URL environment variable or modify BASE_URL_OPENAI in the code.\n"
+            "Example: export OPENAI_BASE_URL='https://api.openai.com/v1'"
+        )
+    return OpenAIBackend(api_key=load_api_keys("api-key.txt"), base_url=BASE_URL_OPENAI)
+
+
+# Credentials are only read when an LLM call goes to the OpenAI backend, so --help,
+# --backend stub and --replay work without api-key.txt or OPENAI_BASE_URL
+set_default_backend_factory(create_openai_backend)
 
 
 class HyperGraphGenerator:
@@ -88,7 +94,7 @@ class HyperGraphGenerator:
         prompt = self.create_prompt()
 
         try:
-            response = client.chat.completions.create(
+            response = get_backend().complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a hypergraph generator."},
@@ -98,10 +104,10 @@ class HyperGraphGenerator:
                 temperature=0.7,
             )
 
-            hypergraph_data = response.choices[0].message.content
+            hypergraph_data = response.content
             return hypergraph_data
 
-        except openai.OpenAIError as e:
+        except (openai.OpenAIError, LLMBackendError) as e:
             print(f"OpenAI API call failed: {e}")
             return None
 
@@ -141,6 +147,7 @@ def arg_parse():
                        required=True, help='Directory for simplex per node distribution file')
     parser.add_argument('--file_name', dest='file_name', required=True, help='Output file name')
     parser.add_argument('--output_directory', dest='output_directory', required=True, help='Output directory')
+    add_backend_arguments(parser)
 
     return parser.parse_args()
 
@@ -148,6 +155,7 @@ def arg_parse():
 def main():
     """Main function: initialize generator and generate hypergraph"""
     args = arg_parse()
+    configure_backend_from_args(args)
     generator = HyperGraphGenerator(args)
     hypergraph_data = generator.generate_hypergraph()
     generator.save_hypergraph(hypergraph_data)
@@ -4,6 +4,9 @@ import argparse
 import os
 import random
 
+from llm_backends import (OpenAIBackend, LLMBackendError, get_backend, set_default_backend_factory,
+                          add_backend_arguments, configure_backend_from_args)
+
 # Load OpenAI API Key
 def load_api_keys(filename="api-key.txt"):
     """Load OpenAI API Key"""
@@ -12,20 +15,25 @@ def load_api_keys(filename="api-key.txt"):
     openai_key = lines[0].strip()
     return openai_key
 
-openai_key = load_api_keys("api-key.txt")
-
 # Setup OpenAI client
 # IMPORTANT: Replace with your own API base URL
 # Example: "https://api.openai.com/v1" or your custom endpoint
 BASE_URL_OPENAI = os.environ.get("OPENAI_BASE_URL", "PLEASE_SET_YOUR_BASE_URL")
 
-if BASE_URL_OPENAI == "PLEASE_SET_YOUR_BASE_URL":
-    raise ValueError(
-        "Please set OPENAI_BASE_URL environment variable or modify BASE_URL_OPENAI in the code.\n"
-        "Example: export OPENAI_BASE_URL='https://api.openai.com/v1'"
-    )
 
-client = openai.OpenAI(api_key=openai_key, base_url=BASE_URL_OPENAI)
+def create_openai_backend() -> OpenAIBackend:
+    """Resolve API key and base URL and create the OpenAI backend (runs on the first LLM call only)"""
+    if BASE_URL_OPENAI == "PLEASE_SET_YOUR_BASE_URL":
+        raise ValueError(
+            "Please set OPENAI_BASE_URL environment variable or modify BASE_URL_OPENAI in the code.\n"
+            "Example: export OPENAI_BASE_URL='https://api.openai.com/v1'"
+        )
+    return OpenAIBackend(api_key=load_api_keys("api-key.txt"), base_url=BASE_URL_OPENAI)
+
+
+# Credentials are only read when an LLM call goes to the OpenAI backend, so --help,
+# --backend stub and --replay work without api-key.txt or OPENAI_BASE_URL
+set_default_backend_factory(create_openai_backend)
 
 
 class LLMIterativeLocalHypergraph:
@@ -88,7 +96,7 @@ class LLMIterativeLocalHypergraph:
         """
 
         try:
-            response = client.chat.completions.create(
+            response = get_backend().complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a hypergraph generator"},
@@ -98,13 +106,13 @@ class LLMIterativeLocalHypergraph:
                 temperature=0.7,
             )
 
-            output = response.choices[0].message.content.strip()
+            output = response.content.strip()
             selected_ids = output.split()
             selected_ids = [pid for pid in selected_ids if pid in self.personas and pid != person_id]
 
             return [person_id] + selected_ids
 
-        except openai.OpenAIError as e:
+        except (openai.OpenAIError, LLMBackendError) as e:
             print(f"OpenAI API call failed: {e}")
             return [person_id]
 
@@ -155,6 +163,7 @@ if __name__ == "__main__":
     parser.add_argument("--model", type=str, required=True, 
                         choices=['gpt-3.5-turbo', 'claude-3-sonnet', 'gpt-4-turbo'],
                         help="Select LLM model to use")
+    add_backend_arguments(parser)
 
     args = parser.parse_args()
 
@@ -165,5 +174,6 @@ if __name__ == "__main__":
         max_members_per_group=args.max_members,
         model=args.model
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
 
     generator.run()
@@ -1,13 +1,32 @@
-import openai
 import json
 import argparse
+import asyncio
+import contextlib
+import logging
+import multiprocessing
 import os
 import random
+import re
 import time
 import collections
+import itertools
 import pickle
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+from hypergraph_indexes import DegreeIndex, EdgeDedupIndex, DegreeBuckets, AttributeCounter, NetworkStats
+from hypergraph_store import HyperedgeStore
+from persistence_writer import BackgroundWriter, FSYNC_POLICIES
+from run_metrics import RunMetrics, error_kind
+from persona_codebook import PersonaCodebook
+from persona_store import PersonaStore, load_personas
+from run_events import logger, configure_logging, LOG_LEVELS, ProgressReporter, EventStream
+from run_journal import (RunJournal, SEGMENT_PATTERN, segment_path, base_path, list_files,
+                         latest_base, read_segment, write_base_snapshot, prune)
+from llm_backends import (LLMBackend, LLMResponse, OpenAIBackend, get_backend, set_default_backend_factory, find_backend,
+                          add_backend_arguments, backend_options, configure_backend_from_args, id_line_cutoff, token_cutoff,
+                          OPTIMIZER_STRATEGIES)
 
 # Load OpenAI API Key
 def load_api_keys(filename="api-key.txt"):
@@ -32,28 +51,75 @@ def load_api_keys(filename="api-key.txt"):
         print(f"   - {os.path.abspath(path)}")
     raise FileNotFoundError(f"API key file not found: {filename}")
 
-openai_key = load_api_keys("api-key.txt")
-
 # Setup OpenAI client
 # IMPORTANT: Replace with your own API base URL
 # Example: "https://api.openai.com/v1" or your custom endpoint
 BASE_URL_OPENAI = os.environ.get("OPENAI_BASE_URL", "PLEASE_SET_YOUR_BASE_URL")
 
-if BASE_URL_OPENAI == "PLEASE_SET_YOUR_BASE_URL":
-    raise ValueError(
-        "Please set OPENAI_BASE_URL environment variable or modify BASE_URL_OPENAI in the code.\n"
-        "Example: export OPENAI_BASE_URL='https://api.openai.com/v1'"
-    )
 
-client = openai.OpenAI(api_key=openai_key, base_url=BASE_URL_OPENAI)
+def create_openai_backend() -> OpenAIBackend:
+    """Resolve API key and base URL and create the OpenAI backend (runs on the first LLM call only)"""
+    if BASE_URL_OPENAI == "PLEASE_SET_YOUR_BASE_URL":
+        raise ValueError(
+            "Please set OPENAI_BASE_URL environment variable or modify BASE_URL_OPENAI in the code.\n"
+            "Example: export OPENAI_BASE_URL='https://api.openai.com/v1'"
+        )
+    return OpenAIBackend(api_key=load_api_keys("api-key.txt"), base_url=BASE_URL_OPENAI)
+
+
+# All agents route their LLM calls through the shared backend layer. Nothing is read or
+# created at import time, so statistical and heuristic runs work without credentials.
+set_default_backend_factory(create_openai_backend)
+
+
+# Persona attributes whose most common values in the network steer evolution phase selection
+BACKGROUND_ATTRIBUTES = ('gender', 'race/ethnicity', 'religion')
+
+# Streamed answers are closed as soon as they contain the decision the agent parses. Reviews approve
+# if APPROVE appears anywhere in the answer, so only that word settles the verdict: a REJECT may still
+# be followed by an APPROVE ("I would not reject this ... APPROVE") and is read to the end. Answers whose
+# parse takes the last matching line (optimizer strategy, evolution phase IDs) get no cutoff: their
+# reasoning mentions candidates before the final answer.
+REVIEW_CUTOFF = token_cutoff(["APPROVE"], ignore_case=True, whole_word=True)
 
 
 class BaseAgent:
     """Base agent class"""
-    def __init__(self, agent_id: str, model: str = "gpt-3.5-turbo"):
+    def __init__(self, agent_id: str, model: str = "gpt-3.5-turbo", backend: LLMBackend = None):
         self.agent_id = agent_id
         self.model = model
+        self.backend = backend
         self.decision_history = []
+        # RunMetrics of the run using this agent (attached by the generator)
+        self.metrics = None
+        self._codebook = None
+    
+    def _llm_backend(self) -> LLMBackend:
+        """Backend given to this agent, otherwise the process-wide default"""
+        return self.backend or get_backend()
+    
+    def _complete(self, **request) -> LLMResponse:
+        """Chat request through the agent's backend, recorded in the run metrics if attached"""
+        if self.metrics is None:
+            return self._llm_backend().complete(**request)
+        return self.metrics.timed_complete(self._llm_backend(), self.agent_id, **request)
+    
+    def _persona_codebook(self, personas: Dict) -> PersonaCodebook:
+        """Codebook of the persona collection, built once per collection"""
+        if self._codebook is None or self._codebook.personas is not personas:
+            self._codebook = PersonaCodebook(personas)
+        return self._codebook
+    
+    def _record_fallback(self, error: Exception) -> str:
+        """Count a fall back to the default decision after a failed call, return the error kind"""
+        if self.metrics is None:
+            return error_kind(error)
+        return self.metrics.record_fallback(self.agent_id, error)
+    
+    def _record_parse(self, ok: bool, count: int = 1):
+        """Count agent outputs that could (not) be parsed into a usable decision"""
+        if self.metrics is not None and count:
+            self.metrics.record_parse(self.agent_id, ok, count)
     
     def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Agent decision interface"""
@@ -63,55 +129,27 @@ class BaseAgent:
 class RelationshipGeneratorAgent(BaseAgent):
     """Relationship generator agent - responsible for creating new collaborations"""
     
-    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        person_id = context['person_id']
-        person_data = context['person_data']
-        existing_hyperedges = context['existing_hyperedges']
-        personas = context['personas']
-        max_members = context['max_members']
-        target_size = context.get('target_edge_size', random.randint(2, max_members))
-        
-        is_building_phase = len(existing_hyperedges) < max(10, len(personas) // 100)
-        
-        if is_building_phase:
-            node_degrees = self._calculate_node_degrees(existing_hyperedges)
-            high_degree_candidates = self._get_preferential_attachment_candidates(
-                person_id, personas, node_degrees, person_data
-            )
-            
-            prompt = f"""
+    # Static instructions come first and per-call data last: every request of an agent then
+    # starts with the same bytes, which OpenAI-compatible servers serve from their prefix cache
+    BUILDING_INSTRUCTIONS = """
             You are a relationship generator agent in the network building phase, rapidly establishing basic connections.
             
             Preferential Attachment Mechanism (Rich Get Richer Principle):
             In network evolution, high-degree nodes are more likely to gain new connections, reflecting the real-world "rich get richer" phenomenon.
             Prioritize selecting individuals with more existing connections as collaborators.
             
-            Current Individual Information:
-            - ID: {person_id}
-            - Gender: {person_data['gender']}
-            - Race/Ethnicity: {person_data['race/ethnicity']}
-            - Age: {person_data['age']}
-            - Religion: {person_data['religion']}
-            - Political Affiliation: {person_data['political affiliation']}
-            - Current Degree: {node_degrees.get(person_id, 0)}
-            
-            High-Degree Candidates (Priority Selection):
-            {high_degree_candidates}
-            
             Building Phase Selection Strategy:
             1. Preferential Attachment: Prioritize high-degree individuals
             2. Feature Matching: Select individuals with common features among high-degree nodes
             3. Degree Balance: Appropriately select medium-degree individuals to avoid over-concentration
             4. New Node Opportunity: Give some unconnected nodes opportunities
             
-            Select {target_size - 1} collaborators (target hyperedge size: {target_size})
-            
             Output Format:
             Output only selected individual IDs separated by spaces, e.g.: "3 7 15"
-            Do not include own ID ({person_id}).
+            Do not include the current individual's own ID.
             """
-        else:
-            prompt = f"""
+    
+    EVOLUTION_INSTRUCTIONS = """
             You are a relationship generator agent responsible for creating collaboration groups. Use Chain of Thought reasoning.
 
             Preferential Attachment Mechanism (Rich Get Richer Principle):
@@ -139,17 +177,6 @@ class RelationshipGeneratorAgent(BaseAgent):
                 └── Indirect Synergy
             ```
 
-            **Current Individual Information:**
-            - ID: {person_id}
-            - Gender: {person_data['gender']}
-            - Race/Ethnicity: {person_data['race/ethnicity']}
-            - Age: {person_data['age']}
-            - Religion: {person_data['religion']}
-            - Political Affiliation: {person_data['political affiliation']}
-
-            **Existing Network Structure (recent 5 hyperedges):**
-            {self._format_recent_edges(existing_hyperedges[-5:])}
-
             **Chain of Thought Reasoning Process:**
             
             Step 1 - Individual Feature Analysis:
@@ -165,15 +192,85 @@ class RelationshipGeneratorAgent(BaseAgent):
             Based on collaboration efficiency and management cost, decide optimal group size.
 
             Step 5 - Final Decision:
-            Select {target_size - 1} collaborators (target hyperedge size: {target_size}).
+            Select the number of collaborators requested below.
 
             Output Format:
             Output only selected individual IDs separated by spaces, e.g.: "3 7 15"
+            Do not include the current individual's own ID.
+            """
+    
+    BATCH_INSTRUCTIONS = """
+            You are a relationship generator agent in the network building phase, proposing several collaboration groups at once.
+            
+            Preferential Attachment Mechanism (Rich Get Richer Principle):
+            In network evolution, high-degree nodes are more likely to gain new connections, reflecting the real-world "rich get richer" phenomenon.
+            Prioritize selecting individuals with more existing connections as collaborators.
+            
+            Selection Strategy:
+            1. Preferential Attachment: Prioritize high-degree individuals
+            2. Feature Matching: Select individuals with common features with the item's individual
+            3. Degree Balance: Appropriately select medium-degree individuals to avoid over-concentration
+            4. New Node Opportunity: Give some unconnected nodes opportunities
+            
+            Output Format:
+            Output only a JSON array with one object per item, e.g.:
+            [{"item": 0, "members": ["3", "7"]}, {"item": 1, "members": ["15", "4", "9"]}]
+            "members" lists exactly the requested number of collaborator IDs, without the item's own ID.
+            """
+    
+    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        person_id = context['person_id']
+        person_data = context['person_data']
+        existing_hyperedges = context['existing_hyperedges']
+        personas = context['personas']
+        max_members = context['max_members']
+        target_size = context.get('target_edge_size', random.randint(2, max_members))
+        
+        is_building_phase = len(existing_hyperedges) < max(10, len(personas) // 100)
+        
+        # Bridging slots of a sharded run come with a member from another shard
+        bridge_member = context.get('bridge_member')
+        bridge_line = (f"\n            Cross-group bridge: one of them must be {bridge_member} (another part of the network)"
+                       if bridge_member else "")
+        
+        if is_building_phase:
+            codebook = self._persona_codebook(personas)
+            node_degrees = context.get('node_degrees')
+            if node_degrees is None:
+                node_degrees = self._calculate_node_degrees(existing_hyperedges)
+            high_degree_candidates = self._get_preferential_attachment_candidates(
+                person_id, personas, node_degrees, person_data, context.get('degree_buckets')
+            )
+            
+            prompt = self.BUILDING_INSTRUCTIONS + codebook.legend() + f"""
+            
+            Current Individual: {codebook.encode(person_id)}, degree {node_degrees.get(person_id, 0)}
+            
+            High-Degree Candidates (Priority Selection):
+            {high_degree_candidates}
+            
+            Select {target_size - 1} collaborators (target hyperedge size: {target_size}){bridge_line}
+            Do not include own ID ({person_id}).
+            """
+        else:
+            prompt = self.EVOLUTION_INSTRUCTIONS + f"""
+            **Current Individual Information:**
+            - ID: {person_id}
+            - Gender: {person_data['gender']}
+            - Race/Ethnicity: {person_data['race/ethnicity']}
+            - Age: {person_data['age']}
+            - Religion: {person_data['religion']}
+            - Political Affiliation: {person_data['political affiliation']}
+
+            **Existing Network Structure (recent 5 hyperedges):**
+            {self._format_recent_edges(existing_hyperedges[-5:])}
+
+            Select {target_size - 1} collaborators (target hyperedge size: {target_size}){bridge_line}
             Do not include own ID ({person_id}).
             """
 
         try:
-            response = client.chat.completions.create(
+            response = self._complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a relationship generator agent skilled at analyzing individual features and establishing reasonable collaborations."},
@@ -181,9 +278,15 @@ class RelationshipGeneratorAgent(BaseAgent):
                 ],
                 max_tokens=100,
                 temperature=0.7 if is_building_phase else 0.7,
+                stream_cutoff=(id_line_cutoff(personas, target_size - 1, exclude=[person_id])
+                               if is_building_phase else None),
             )
 
-            output = response.choices[0].message.content.strip()
+            output = response.content
+            if getattr(response, 'cut_off', False):
+                # The chunk that completed the ID line may already carry the start of the next line
+                output = output[:output.rfind('\n') + 1]
+            output = output.strip()
             
             if is_building_phase:
                 selected_ids = output.split()
@@ -196,6 +299,7 @@ class RelationshipGeneratorAgent(BaseAgent):
                         break
             
             selected_ids = [pid for pid in selected_ids if pid in personas and pid != person_id]
+            self._record_parse(len(selected_ids) >= (target_size - 1 if is_building_phase else 1))
             decision = {
                 'action': 'generate',
                 'agent_id': self.agent_id,
@@ -208,7 +312,8 @@ class RelationshipGeneratorAgent(BaseAgent):
             return decision
 
         except Exception as e:
-            print(f"Relationship generator agent call failed: {e}")
+            kind = self._record_fallback(e)
+            logger.warning(f"Relationship generator agent call failed ({kind}), no collaborators selected: {e}")
             return {
                 'action': 'generate',
                 'agent_id': self.agent_id,
@@ -218,6 +323,132 @@ class RelationshipGeneratorAgent(BaseAgent):
                 'phase': 'building' if is_building_phase else 'evolution'
             }
     
+    def make_batch_decision(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Propose one hyperedge per context in a single request (structured JSON output).
+        Every item is validated on its own: a failed item gets selected_members [person_id]
+        and can be re-queued by the caller while the valid items of the batch are kept.
+        """
+        shared = contexts[0]
+        personas = shared['personas']
+        node_degrees = shared.get('node_degrees')
+        if node_degrees is None:
+            node_degrees = self._calculate_node_degrees(shared['existing_hyperedges'])
+        
+        # Candidate pool and instructions are sent once for the whole batch
+        codebook = self._persona_codebook(personas)
+        candidates = self._get_preferential_attachment_candidates(None, personas, node_degrees, None,
+                                                                  shared.get('degree_buckets'))
+        item_lines = []
+        for item, context in enumerate(contexts):
+            person_id = context['person_id']
+            target_size = context['target_edge_size']
+            item_lines.append(
+                f"Item {item}: ID {person_id} ({codebook.encode(person_id)}, degree {node_degrees.get(person_id, 0)}) "
+                f"- select {target_size - 1} collaborators (target hyperedge size: {target_size})"
+                + (f", one of them {context['bridge_member']} (cross-group bridge)" if context.get('bridge_member') else "")
+            )
+        items_text = "\n            ".join(item_lines)
+        
+        prompt = self.BATCH_INSTRUCTIONS + codebook.legend() + f"""
+            
+            Candidate Pool:
+            {candidates}
+            
+            Groups to Create:
+            {items_text}
+            """
+        
+        try:
+            response = self._complete(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a relationship generator agent skilled at analyzing individual features and establishing reasonable collaborations."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=40 + sum(15 + 4 * (context['target_edge_size'] - 1) for context in contexts),
+                temperature=0.7,
+            )
+            output = response.content.strip()
+            proposals = self._parse_batch_output(output)
+        except Exception as e:
+            kind = self._record_fallback(e)
+            logger.warning(f"Relationship generator agent batch call failed ({kind}), no collaborators selected: {e}")
+            output = f"API call failed: {e}"
+            proposals = {}
+        
+        decisions = []
+        for item, context in enumerate(contexts):
+            person_id = context['person_id']
+            wanted = context['target_edge_size'] - 1
+            selected_ids = []
+            for pid in proposals.get(item, []):
+                if pid in personas and pid != person_id and pid not in selected_ids:
+                    selected_ids.append(pid)
+            
+            if len(selected_ids) >= wanted:
+                selected_members = [person_id] + selected_ids[:wanted]
+                reasoning = f"Batch item {item + 1}/{len(contexts)}: {' '.join(selected_ids[:wanted])}"
+            else:
+                # Invalid or missing item: only this one is re-queued
+                selected_members = [person_id]
+                reasoning = f"Batch item {item + 1}/{len(contexts)} invalid: {proposals.get(item)}"
+            
+            decision = {
+                'action': 'generate',
+                'agent_id': self.agent_id,
+                'person_id': person_id,
+                'selected_members': selected_members,
+                'reasoning': reasoning,
+                'phase': 'building'
+            }
+            if len(selected_members) > 1:
+                self.decision_history.append(decision)
+            decisions.append(decision)
+        valid = sum(1 for decision in decisions if len(decision['selected_members']) > 1)
+        self._record_parse(True, valid)
+        self._record_parse(False, len(decisions) - valid)
+        return decisions
+    
+    @staticmethod
+    def _parse_batch_output(output: str) -> Dict[int, List[str]]:
+        """Map item number -> proposed member IDs from a JSON array/object, falling back to 'Item k: ids' lines"""
+        proposals = {}
+        start, end = output.find('['), output.rfind(']')
+        if start != -1 and end > start:
+            try:
+                parsed = json.loads(output[start:end + 1])
+                for position, entry in enumerate(parsed):
+                    if isinstance(entry, dict):
+                        item = int(entry.get('item', position))
+                        members = entry.get('members', [])
+                    else:
+                        item, members = position, entry
+                    if isinstance(members, list):
+                        proposals[item] = [str(m).strip() for m in members]
+                if proposals:
+                    return proposals
+            except (ValueError, TypeError):
+                pass
+        
+        start, end = output.find('{'), output.rfind('}')
+        if start != -1 and end > start:
+            try:
+                parsed = json.loads(output[start:end + 1])
+                for key, members in parsed.items():
+                    if str(key).isdigit() and isinstance(members, list):
+                        proposals[int(key)] = [str(m).strip() for m in members]
+                if proposals:
+                    return proposals
+            except (ValueError, TypeError, AttributeError):
+                pass
+        
+        for line in output.split('\n'):
+            match = re.match(r'\s*Item\s*(\d+)\s*[:\-]\s*(.+)', line, re.IGNORECASE)
+            if match:
+                proposals[int(match.group(1))] = re.findall(r'\d+', match.group(2))
+        return proposals
+    
     def _format_recent_edges(self, edges: List[List[str]]) -> str:
         if not edges:
             return "No existing hyperedges"
@@ -232,47 +463,64 @@ class RelationshipGeneratorAgent(BaseAgent):
         return node_degrees
     
     def _get_preferential_attachment_candidates(self, person_id: str, personas: Dict, 
-                                               node_degrees: Dict[str, int], person_data: Dict) -> str:
-        """Get candidate information for preferential attachment mechanism"""
+                                               node_degrees: Dict[str, int], person_data: Dict,
+                                               degree_buckets: DegreeBuckets = None) -> str:
+        """
+        Get candidate information for preferential attachment mechanism.
+        With the generator's DegreeBuckets the totals and first nodes are read in O(log n);
+        without it they are counted from the degree map.
+        """
         if not node_degrees:
             return "Network initial phase, no high-degree nodes yet, using random selection strategy."
         
-        high_degree_nodes = []
-        medium_degree_nodes = []
-        zero_degree_nodes = []
-        
-        for node_id, node_data in personas.items():
-            if node_id == person_id:
-                continue
-                
-            degree = node_degrees.get(node_id, 0)
-            node_info = f"ID{node_id}(degree{degree}, {node_data['gender']}, {node_data['race/ethnicity']}, age {node_data['age']})"
-            
-            if degree >= 2:
-                high_degree_nodes.append(node_info)
-            elif degree == 1:
-                medium_degree_nodes.append(node_info)
-            else:
-                zero_degree_nodes.append(node_info)
-        
+        if degree_buckets is not None:
+            high_total = degree_buckets.count('high', exclude=person_id)
+            medium_total = degree_buckets.count('medium', exclude=person_id)
+            high_ids = degree_buckets.first('high', 10, exclude=person_id)
+            medium_ids = degree_buckets.first('medium', 5, exclude=person_id)
+        else:
+            high_total = medium_total = 0
+            for node_id, degree in list(node_degrees.items()):
+                if node_id != person_id:
+                    if degree >= 2:
+                        high_total += 1
+                    elif degree == 1:
+                        medium_total += 1
+            high_ids, medium_ids = [], []
+            for node_id in personas:
+                if len(high_ids) >= min(10, high_total) and len(medium_ids) >= min(5, medium_total):
+                    break
+                degree = node_degrees.get(node_id, 0)
+                if node_id == person_id or degree == 0:
+                    continue
+                if degree >= 2:
+                    if len(high_ids) < 10:
+                        high_ids.append(node_id)
+                elif len(medium_ids) < 5:
+                    medium_ids.append(node_id)
+        zero_total = len(personas) - (person_id in personas) - high_total - medium_total
+        
+        # Only the displayed personas are looked up and rendered
+        high_degree_nodes = [(node_id, node_degrees.get(node_id, 0)) for node_id in high_ids]
+        medium_degree_nodes = [(node_id, 1) for node_id in medium_ids]
+        
+        codebook = self._persona_codebook(personas)
         result_parts = []
         
         if high_degree_nodes:
-            high_degree_display = high_degree_nodes[:10]
-            result_parts.append(f"🔥 High-degree nodes (degree≥2, total {len(high_degree_nodes)}):")
-            result_parts.append("   " + ", ".join(high_degree_display))
-            if len(high_degree_nodes) > 10:
-                result_parts.append(f"   ...and {len(high_degree_nodes)-10} other high-degree nodes")
+            result_parts.append(f"🔥 High-degree nodes (degree≥2, total {high_total}):")
+            result_parts.append("   " + ", ".join(f"{codebook.encode(node_id)} d{degree}" for node_id, degree in high_degree_nodes))
+            if high_total > 10:
+                result_parts.append(f"   ...and {high_total-10} other high-degree nodes")
         
         if medium_degree_nodes:
-            medium_degree_display = medium_degree_nodes[:5]
-            result_parts.append(f"📊 Medium-degree nodes (degree=1, total {len(medium_degree_nodes)}):")
-            result_parts.append("   " + ", ".join(medium_degree_display))
-            if len(medium_degree_nodes) > 5:
-                result_parts.append(f"   ...and {len(medium_degree_nodes)-5} other medium-degree nodes")
+            result_parts.append(f"📊 Medium-degree nodes (degree=1, total {medium_total}):")
+            result_parts.append("   " + ", ".join(codebook.encode(node_id) for node_id, _ in medium_degree_nodes))
+            if medium_total > 5:
+                result_parts.append(f"   ...and {medium_total-5} other medium-degree nodes")
         
-        if zero_degree_nodes:
-            result_parts.append(f"🆕 Unconnected nodes (degree=0, total {len(zero_degree_nodes)}): suggest giving connection opportunities")
+        if zero_total:
+            result_parts.append(f"🆕 Unconnected nodes (degree=0, total {zero_total}): suggest giving connection opportunities")
         
         return "\n".join(result_parts) if result_parts else "All nodes have same degree, using feature matching strategy."
 
@@ -280,12 +528,7 @@ class RelationshipGeneratorAgent(BaseAgent):
 class RelationshipReviewerAgent(BaseAgent):
     """Relationship reviewer agent - responsible for reviewing existing relationship rationality"""
     
-    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        hyperedge = context['hyperedge']
-        personas = context['personas']
-        network_stats = context.get('network_stats', {})
-        
-        prompt = f"""
+    INSTRUCTIONS = """
         You are a relationship reviewer agent responsible for assessing the rationality of existing collaborations. Use Chain of Thought analysis.
 
         **Chain of Thought Analysis Framework:**
@@ -311,16 +554,6 @@ class RelationshipReviewerAgent(BaseAgent):
             └── Development Potential
         ```
 
-        **Collaboration to Review:**
-        Hyperedge members: {' '.join(hyperedge)}
-
-        **Member Details:**
-        {self._format_member_details(hyperedge, personas)}
-
-        **Network Statistics:**
-        Total hyperedges: {network_stats.get('total_edges', 0)}
-        Average hyperedge size: {network_stats.get('avg_edge_size', 0):.2f}
-
         **Chain of Thought Reasoning:**
         
         Step 1 - Relationship Consistency Check:
@@ -336,14 +569,40 @@ class RelationshipReviewerAgent(BaseAgent):
         Predict long-term stability and development potential of this relationship.
 
         Step 5 - Review Decision:
-        Give final review result based on above analysis.
+        Give final review result for the collaboration below based on above analysis.
 
         **Output Format:**
         Output only "APPROVE" or "REJECT"
         """
+    
+    BATCH_INSTRUCTIONS = """
+        You are a relationship reviewer agent responsible for assessing the rationality of collaborations.
+        For each candidate check feature match and potential conflicts among members, group dynamics,
+        impact on the overall network structure and long-term sustainability.
+
+        **Output Format:**
+        Output only a JSON array with one "APPROVE" or "REJECT" per candidate, in candidate order, e.g.: ["APPROVE", "REJECT"]
+        """
+    
+    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        hyperedge = context['hyperedge']
+        personas = context['personas']
+        network_stats = context.get('network_stats', {})
+        
+        prompt = self.INSTRUCTIONS + f"""
+        **Collaboration to Review:**
+        Hyperedge members: {' '.join(hyperedge)}
+
+        **Member Details:**
+        {self._format_member_details(hyperedge, personas)}
+
+        **Network Statistics:**
+        Total hyperedges: {network_stats.get('total_edges', 0)}
+        Average hyperedge size: {network_stats.get('avg_edge_size', 0):.2f}
+        """
 
         try:
-            response = client.chat.completions.create(
+            response = self._complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a relationship reviewer agent with strict evaluation standards and fair judgment ability."},
@@ -351,10 +610,12 @@ class RelationshipReviewerAgent(BaseAgent):
                 ],
                 max_tokens=150,
                 temperature=0.3,
+                stream_cutoff=REVIEW_CUTOFF,
             )
 
-            output = response.choices[0].message.content.strip()
+            output = response.content.strip()
             decision = "APPROVE" if "APPROVE" in output.upper() else "REJECT"
+            self._record_parse("APPROVE" in output.upper() or "REJECT" in output.upper())
             
             result = {
                 'action': 'review',
@@ -367,7 +628,8 @@ class RelationshipReviewerAgent(BaseAgent):
             return result
 
         except Exception as e:
-            print(f"Relationship reviewer agent call failed: {e}")
+            kind = self._record_fallback(e)
+            logger.warning(f"Relationship reviewer agent call failed ({kind}), defaulting to approve: {e}")
             return {
                 'action': 'review',
                 'agent_id': self.agent_id,
@@ -376,7 +638,124 @@ class RelationshipReviewerAgent(BaseAgent):
                 'reasoning': f"API call failed, default approve: {e}"
             }
     
-    def _format_member_details(self, hyperedge: List[str], personas: Dict) -> str:
+    def make_batch_decision(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Review many hyperedges in one request, one decision per hyperedge.
+        Hyperedges without a usable verdict (API failure, output of the wrong length) default to APPROVE.
+        """
+        hyperedges = context['hyperedges']
+        personas = context['personas']
+        network_stats = context.get('network_stats', {})
+        
+        codebook = self._persona_codebook(personas)
+        candidates = "\n        ".join(
+            f"Candidate {k}: {self._format_member_details(edge, personas, codebook)}" for k, edge in enumerate(hyperedges)
+        )
+        prompt = self.BATCH_INSTRUCTIONS + codebook.legend() + f"""
+
+        **Collaborations to Review:**
+        {candidates}
+
+        **Network Statistics:**
+        Total hyperedges: {network_stats.get('total_edges', 0)}
+        Average hyperedge size: {network_stats.get('avg_edge_size', 0):.2f}
+        """
+        
+        try:
+            response = self._complete(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a relationship reviewer agent with strict evaluation standards and fair judgment ability."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=20 + 6 * len(hyperedges),
+                temperature=0.3,
+            )
+            output = response.content.strip()
+            verdicts = self.parse_verdicts(output, len(hyperedges))
+            missing = verdicts.count(None)
+            self._record_parse(True, len(verdicts) - missing)
+            self._record_parse(False, missing)
+        except Exception as e:
+            kind = self._record_fallback(e)
+            logger.warning(f"Relationship reviewer agent batch call failed ({kind}), defaulting to approve: {e}")
+            output = f"API call failed, default approve: {e}"
+            verdicts = [None] * len(hyperedges)
+        
+        results = []
+        for hyperedge, verdict in zip(hyperedges, verdicts):
+            result = {
+                'action': 'review',
+                'agent_id': self.agent_id,
+                'hyperedge': hyperedge,
+                'decision': verdict or 'APPROVE',
+                'reasoning': output if verdict else f"No verdict for this candidate, default approve: {output}"
+            }
+            self.decision_history.append(result)
+            results.append(result)
+        return results
+    
+    @staticmethod
+    def parse_verdicts(output: str, count: int) -> List[str]:
+        """
+        Per-item APPROVE/REJECT verdicts of a batch review, None where no verdict can be attributed.
+        Indexed answers ("2: REJECT", {"index": 2, ...}) are matched by index, an item answered twice
+        with different verdicts gets none; a plain sequence of verdicts is only trusted if its length
+        equals count, since a skipped item would shift all others.
+        """
+        def normalize(value):
+            text = str(value).upper()
+            if 'APPROVE' in text:
+                return 'APPROVE'
+            if 'REJECT' in text:
+                return 'REJECT'
+            return None
+        
+        def attribute(indexed, index, verdict):
+            indexed[index] = verdict if indexed.get(index, verdict) == verdict else None
+        
+        def from_indexed(indexed):
+            # Accept 1-based numbering when it is unambiguous
+            if indexed and 0 not in indexed and count in indexed:
+                indexed = {index - 1: verdict for index, verdict in indexed.items()}
+            return [indexed.get(k) for k in range(count)]
+        
+        start, end = output.find('['), output.rfind(']')
+        if start != -1 and end > start:
+            try:
+                parsed = json.loads(output[start:end + 1])
+                if isinstance(parsed, list) and parsed:
+                    if all(isinstance(entry, dict) for entry in parsed):
+                        indexed = {}
+                        for position, entry in enumerate(parsed):
+                            index = entry.get('index', entry.get('candidate', entry.get('item', position)))
+                            attribute(indexed, int(index), normalize(entry.get('decision', entry.get('verdict', ''))))
+                        verdicts = from_indexed(indexed)
+                    else:
+                        verdicts = [normalize(entry) for entry in parsed]
+                        verdicts = verdicts if len(verdicts) == count else [None] * count
+                    # A bracketed list without any verdict (e.g. member IDs in the reasoning) is not the answer
+                    if any(verdicts):
+                        return verdicts
+            except (ValueError, TypeError, AttributeError):
+                pass
+        
+        indexed = {}
+        for index, verdict in re.findall(r'(\d+)\s*[\]:.)\-]+\s*\**\s*(APPROVE|REJECT)', output, re.IGNORECASE):
+            attribute(indexed, int(index), verdict.upper())
+        if indexed:
+            return from_indexed(indexed)
+        
+        verdicts = [verdict.upper() for verdict in re.findall(r'\b(APPROVE|REJECT)\b', output, re.IGNORECASE)]
+        return verdicts if len(verdicts) == count else [None] * count
+    
+    def _format_member_details(self, hyperedge: List[str], personas: Dict, codebook: PersonaCodebook = None) -> str:
+        """
+        Members as persona codes on one line if a codebook is given (its legend must be in the prompt),
+        otherwise one verbose line per member, which is shorter than a legend for a single hyperedge
+        """
+        if codebook is not None:
+            return ", ".join(codebook.encode(member_id) for member_id in hyperedge if member_id in personas)
         details = []
         for member_id in hyperedge:
             if member_id in personas:
@@ -388,20 +767,7 @@ class RelationshipReviewerAgent(BaseAgent):
 class RelationshipRemoverAgent(BaseAgent):
     """Relationship remover agent - responsible for removing unreasonable or outdated relationships"""
     
-    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        all_hyperedges = context['all_hyperedges']
-        personas = context['personas']
-        iteration = context.get('iteration', 0)
-        
-        if not all_hyperedges or iteration < 3:
-            return {
-                'action': 'remove',
-                'agent_id': self.agent_id,
-                'edges_to_remove': [],
-                'reasoning': "Network initial phase, not removing relationships yet"
-            }
-        
-        prompt = f"""
+    INSTRUCTIONS = """
         You are a relationship remover agent responsible for identifying and removing unreasonable collaborations. Use Chain of Thought analysis.
 
         **Chain of Thought Analysis Steps:**
@@ -427,13 +793,6 @@ class RelationshipRemoverAgent(BaseAgent):
             └── Improve Quality
         ```
 
-        **Current Network Status:**
-        Total hyperedges: {len(all_hyperedges)}
-        Current iteration: {iteration}
-
-        **Network Hyperedge Overview (recent 10):**
-        {self._format_recent_edges(all_hyperedges[-10:])}
-
         **Chain of Thought Reasoning Process:**
 
         Step 1 - Network Anomaly Detection:
@@ -449,15 +808,39 @@ class RelationshipRemoverAgent(BaseAgent):
         Predict the impact of removing specific relationships on the overall network.
 
         Step 5 - Removal Decision:
-        Select at most {max(1, len(all_hyperedges) // 10)} hyperedges to remove.
+        Select at most the number of hyperedges to remove given below.
 
         **Output Format:**
-        Output hyperedge indices to remove (starting from 0), space-separated, e.g.: "2 5 8"
+        Output the IDs of hyperedges to remove (the number after "Hyperedge"), space-separated, e.g.: "2 5 8"
         If no relationships need removal, output "NONE"
         """
+    
+    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        all_hyperedges = context['all_hyperedges']
+        personas = context['personas']
+        iteration = context.get('iteration', 0)
+        
+        if not all_hyperedges or iteration < 3:
+            return {
+                'action': 'remove',
+                'agent_id': self.agent_id,
+                'edges_to_remove': [],
+                'reasoning': "Network initial phase, not removing relationships yet"
+            }
+        
+        prompt = self.INSTRUCTIONS + f"""
+        **Current Network Status:**
+        Total hyperedges: {len(all_hyperedges)}
+        Current iteration: {iteration}
+
+        **Network Hyperedge Overview (recent 10):**
+        {self._format_recent_edges(all_hyperedges.recent_items(10))}
+
+        Select at most {max(1, len(all_hyperedges) // 10)} hyperedges to remove.
+        """
 
         try:
-            response = client.chat.completions.create(
+            response = self._complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a relationship remover agent with keen network analysis ability and cautious removal strategy."},
@@ -467,20 +850,24 @@ class RelationshipRemoverAgent(BaseAgent):
                 temperature=0.4,
             )
 
-            output = response.choices[0].message.content.strip()
+            output = response.content.strip()
             
             edges_to_remove = []
+            parsed = False
             lines = output.split('\n')
             for line in reversed(lines):
                 if line.strip() and not line.startswith('Step') and not line.startswith('**'):
                     if "NONE" in line.upper():
+                        parsed = True
                         break
                     try:
                         indices = [int(x) for x in line.strip().split() if x.isdigit()]
-                        edges_to_remove = [i for i in indices if 0 <= i < len(all_hyperedges)]
+                        edges_to_remove = [i for i in indices if all_hyperedges.has_edge(i)]
+                        parsed = bool(indices)
                         break
                     except:
                         continue
+            self._record_parse(parsed)
             
             result = {
                 'action': 'remove',
@@ -492,7 +879,8 @@ class RelationshipRemoverAgent(BaseAgent):
             return result
 
         except Exception as e:
-            print(f"Relationship remover agent call failed: {e}")
+            kind = self._record_fallback(e)
+            logger.warning(f"Relationship remover agent call failed ({kind}), removing nothing: {e}")
             return {
                 'action': 'remove',
                 'agent_id': self.agent_id,
@@ -500,23 +888,16 @@ class RelationshipRemoverAgent(BaseAgent):
                 'reasoning': f"API call failed: {e}"
             }
     
-    def _format_recent_edges(self, edges: List[List[str]]) -> str:
-        if not edges:
+    def _format_recent_edges(self, edge_items: List[tuple]) -> str:
+        if not edge_items:
             return "No hyperedges"
-        return "\n".join([f"Hyperedge{i}: {' '.join(edge)}" for i, edge in enumerate(edges)])
+        return "\n".join([f"Hyperedge{edge_id}: {' '.join(edge)}" for edge_id, edge in edge_items])
 
 
 class NetworkOptimizerAgent(BaseAgent):
     """Network optimizer agent - responsible for optimizing network structure from global perspective"""
     
-    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        all_hyperedges = context['all_hyperedges']
-        personas = context['personas']
-        iteration = context.get('iteration', 0)
-        
-        network_stats = self._calculate_network_stats(all_hyperedges, personas)
-        
-        prompt = f"""
+    INSTRUCTIONS = """
         You are a network optimizer agent responsible for optimizing the entire hypergraph network structure from a global perspective. Use Chain of Thought analysis.
 
         **Chain of Thought Optimization Framework:**
@@ -532,27 +913,15 @@ class NetworkOptimizerAgent(BaseAgent):
         ├── Structural Optimization
         │   ├── Connectivity Enhancement
         │   ├── Clustering Optimization
-        │   └── Degree Distribution Adjustment
-        ├── Diversity Balance
-        │   ├── Feature Distribution
-        │   ├── Group Inclusiveness
-        │   └── Avoid Homogenization
-        └── Efficiency Improvement
-            ├── Reduce Redundancy
-            └── Enhance Synergy
-        ```
-
-        **Current Network Statistics:**
-        Total hyperedges: {network_stats['total_edges']}
-        Total nodes: {network_stats['total_nodes']}
-        Average hyperedge size: {network_stats['avg_edge_size']:.2f}
-        Network density: {network_stats['network_density']:.3f}
-        Largest component size: {network_stats['largest_component_size']}
-
-        **Diversity Metrics:**
-        Gender distribution: {network_stats['gender_diversity']}
-        Race distribution: {network_stats['race_diversity']}
-        Religion distribution: {network_stats['religion_diversity']}
+        │   └── Degree Distribution Adjustment
+        ├── Diversity Balance
+        │   ├── Feature Distribution
+        │   ├── Group Inclusiveness
+        │   └── Avoid Homogenization
+        └── Efficiency Improvement
+            ├── Reduce Redundancy
+            └── Enhance Synergy
+        ```
 
         **Chain of Thought Analysis:**
 
@@ -569,14 +938,36 @@ class NetworkOptimizerAgent(BaseAgent):
         Assess the network's diversity and inclusiveness level.
 
         Step 5 - Optimization Strategy:
-        Propose specific network structure optimization recommendations.
+        Propose specific network structure optimization recommendations for the network below.
 
         **Output Format:**
         Output optimization suggestion type: one of "INCREASE_CONNECTIONS", "ENHANCE_DIVERSITY", "REDUCE_CLUSTERING", "MAINTAIN_CURRENT"
         """
+    
+    def make_decision(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        all_hyperedges = context['all_hyperedges']
+        personas = context['personas']
+        iteration = context.get('iteration', 0)
+        
+        network_stats = context.get('network_stats') or self._calculate_network_stats(all_hyperedges, personas)
+        
+        prompt = self.INSTRUCTIONS + f"""
+        **Current Network Statistics:**
+        Total hyperedges: {network_stats['total_edges']}
+        Total nodes: {network_stats['total_nodes']}
+        Average hyperedge size: {network_stats['avg_edge_size']:.2f}
+        Network density: {network_stats['network_density']:.3f}
+        Largest component size: {network_stats['largest_component_size']}
+        Connected components: {network_stats['connected_components']}
+
+        **Diversity Metrics:**
+        Gender distribution: {network_stats['gender_diversity']}
+        Race distribution: {network_stats['race_diversity']}
+        Religion distribution: {network_stats['religion_diversity']}
+        """
 
         try:
-            response = client.chat.completions.create(
+            response = self._complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a network optimizer agent with deep graph theory knowledge and network analysis capabilities."},
@@ -586,14 +977,17 @@ class NetworkOptimizerAgent(BaseAgent):
                 temperature=0.5,
             )
 
-            output = response.choices[0].message.content.strip()
+            output = response.content.strip()
             
             strategy = "MAINTAIN_CURRENT"
+            parsed = False
             for line in output.split('\n'):
-                for option in ["INCREASE_CONNECTIONS", "ENHANCE_DIVERSITY", "REDUCE_CLUSTERING", "MAINTAIN_CURRENT"]:
+                for option in OPTIMIZER_STRATEGIES:
                     if option in line:
                         strategy = option
+                        parsed = True
                         break
+            self._record_parse(parsed)
             
             result = {
                 'action': 'optimize',
@@ -606,7 +1000,8 @@ class NetworkOptimizerAgent(BaseAgent):
             return result
 
         except Exception as e:
-            print(f"Network optimizer agent call failed: {e}")
+            kind = self._record_fallback(e)
+            logger.warning(f"Network optimizer agent call failed ({kind}), defaulting to MAINTAIN_CURRENT: {e}")
             return {
                 'action': 'optimize',
                 'agent_id': self.agent_id,
@@ -616,51 +1011,48 @@ class NetworkOptimizerAgent(BaseAgent):
             }
     
     def _calculate_network_stats(self, hyperedges: List[List[str]], personas: Dict) -> Dict:
-        if not hyperedges:
-            return {
-                'total_edges': 0, 'total_nodes': 0, 'avg_edge_size': 0,
-                'network_density': 0, 'largest_component_size': 0,
-                'gender_diversity': {}, 'race_diversity': {}, 'religion_diversity': {}
-            }
-        
-        all_nodes = set()
-        for edge in hyperedges:
-            all_nodes.update(edge)
-        
-        gender_count = {}
-        race_count = {}
-        religion_count = {}
-        
-        for node in all_nodes:
-            if node in personas:
-                person = personas[node]
-                gender_count[person['gender']] = gender_count.get(person['gender'], 0) + 1
-                race_count[person['race/ethnicity']] = race_count.get(person['race/ethnicity'], 0) + 1
-                religion_count[person['religion']] = religion_count.get(person['religion'], 0) + 1
-        
-        total_edges = len(hyperedges)
-        total_nodes = len(all_nodes)
-        avg_edge_size = sum(len(edge) for edge in hyperedges) / total_edges if total_edges > 0 else 0
-        network_density = total_edges / (total_nodes * (total_nodes - 1) / 2) if total_nodes > 1 else 0
-        
-        return {
-            'total_edges': total_edges,
-            'total_nodes': total_nodes,
-            'avg_edge_size': avg_edge_size,
-            'network_density': network_density,
-            'largest_component_size': total_nodes,
-            'gender_diversity': gender_count,
-            'race_diversity': race_count,
-            'religion_diversity': religion_count
-        }
+        """Statistics computed from scratch; the generator passes its incrementally maintained ones in the context"""
+        return NetworkStats(personas, BACKGROUND_ATTRIBUTES, hyperedges).stats()
 
 
 class ProtectedMASHypergraphGenerator:
     """Protected Multi-Agent System based Dynamic Hypergraph Generator (Configuration-Driven Version)"""
     
+    # Lenient review prompts, static instructions first (see RelationshipGeneratorAgent)
+    LENIENT_REVIEW_INSTRUCTIONS = """
+            You are a lenient relationship review agent, with the goal of promoting network growth.
+            
+            Please review based on the following principles:
+            1. APPROVE as long as it's not obviously unreasonable
+            2. Prioritize network growth
+            3. Allow diverse collaborative relationships
+            
+            Output format: Only output "APPROVE" or "REJECT"
+            """
+    
+    LENIENT_BATCH_REVIEW_INSTRUCTIONS = """
+            You are a lenient relationship review agent, with the goal of promoting network growth.
+            
+            Please review each relationship based on the following principles:
+            1. APPROVE as long as it's not obviously unreasonable
+            2. Prioritize network growth
+            3. Allow diverse collaborative relationships
+            
+            Output format: Only output a JSON array with one "APPROVE" or "REJECT" per relationship, in order, e.g.: ["APPROVE", "REJECT"]
+            """
+    
+    # Rejections of a bridging slot for not spanning two shards, after which any valid hyperedge fills it
+    BRIDGE_MAX_REJECTIONS = 5
+    
     def __init__(self, personas_file: str, config_hypergraph_file: str, output_path: str,
                  groups_per_iteration: int = 5, max_members_per_group: int = 5, 
-                 iterations: int = 10, model: str = "gpt-3.5-turbo"):
+                 iterations: int = 10, model: str = "gpt-3.5-turbo", concurrency: int = 1,
+                 near_duplicate_threshold: float = None, backend: LLMBackend = None,
+                 snapshot_interval: int = 10, fsync_policy: str = 'commit', max_pending_writes: int = 32,
+                 generation_batch_size: int = 1, review_batch_size: int = 1, events_path: str = None,
+                 events_fd: int = None, progress_interval: float = 2.0, speculative_candidates: int = 1,
+                 hedge_percentile: float = None, hedge_min_samples: int = 20, shards: int = 1,
+                 shard_by: str = 'random', bridge_fraction: float = 0.05, backend_options: Dict[str, Any] = None):
         """
         Initialize protected configuration-based MAS hypergraph generator
         :param personas_file: Personal data JSON file path
@@ -670,6 +1062,25 @@ class ProtectedMASHypergraphGenerator:
         :param max_members_per_group: Maximum members per hyperedge
         :param iterations: Evolution iteration count
         :param model: LLM model
+        :param concurrency: Number of generator requests kept in flight during the building phase
+        :param near_duplicate_threshold: Jaccard similarity at which a new hyperedge counts as a near-duplicate (None: exact duplicates only)
+        :param backend: LLM backend for all agents (None: process-wide default backend)
+        :param snapshot_interval: Iterations between compacted base snapshots (the journal holds the rest)
+        :param fsync_policy: Durability of background writes: 'always', 'commit' (journal commits and base snapshots) or 'never'
+        :param max_pending_writes: Capacity of the background write queue; the run blocks while it is full
+        :param generation_batch_size: Hyperedges proposed per building phase generator request
+        :param review_batch_size: Evolution phase candidates reviewed per lenient review request
+        :param events_path: JSONL file receiving edge_added/edge_removed/phase_changed/iteration_done events
+        :param events_fd: Inherited file descriptor for the event stream (instead of events_path)
+        :param progress_interval: Minimum seconds between building phase progress lines
+        :param speculative_candidates: Parallel generator requests per building slot group, the first valid answer wins
+        :param hedge_percentile: Latency percentile of recent generator requests after which a duplicate request is sent (None: no hedging)
+        :param hedge_min_samples: Observed generator latencies required before hedging starts
+        :param shards: Persona shards whose building phases run in parallel worker processes (1: no sharding)
+        :param shard_by: 'random' partition, or comma-separated attributes whose strata are kept within one shard
+        :param bridge_fraction: Share of the target hyperedges generated across shards after the shards are merged
+        :param backend_options: backend_options() of the command line, the shard workers build their backend from
+                                them with an equal share of the rate limits (None: process-wide default backend)
         """
         self.personas_file = personas_file
         self.config_hypergraph_file = config_hypergraph_file
@@ -677,6 +1088,32 @@ class ProtectedMASHypergraphGenerator:
         self.max_members_per_group = max_members_per_group
         self.num_iterations = iterations
         self.model = model
+        self.concurrency = max(1, concurrency)
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.backend = backend
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.generation_batch_size = max(1, generation_batch_size)
+        self.review_batch_size = max(1, review_batch_size)
+        self.speculative_candidates = max(1, speculative_candidates)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = max(1, hedge_min_samples)
+        self._generator_latencies = collections.deque(maxlen=256)
+        # Building phase generator requests of all iterations share one executor; requests left over from an
+        # earlier building iteration carry an older generation and their answers are dropped
+        self._generation_executor = None
+        self._building_generation = 0
+        self.max_pending_writes = max_pending_writes
+        self.shards = max(1, shards)
+        self.shard_by = shard_by
+        self.bridge_fraction = min(1.0, max(0.0, bridge_fraction))
+        self.backend_options = backend_options
+        
+        # Sharded runs: shard of every persona, the [start, end) slots that must span shards and
+        # how often each of them was rejected for not doing so
+        self.shard_of = None
+        self.shard_members = None
+        self.bridge_slots = None
+        self._bridge_rejections = collections.Counter()
         
         # Create protected timestamped run directory
         self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -708,14 +1145,17 @@ class ProtectedMASHypergraphGenerator:
         self.edge_size_distribution = self.analyze_edge_size_distribution()
         self.edge_size_sequence = self.generate_edge_size_sequence()
         self.total_groups = len(self.edge_size_sequence)
-        self.hyperedges = []
+        self.hyperedges = HyperedgeStore()
+        
+        # Indexes kept in sync with self.hyperedges by _add_hyperedge / _remove_hyperedge
+        self._rebuild_edge_indexes()
         
         # Create agents
         self.agents = {
-            'generator': RelationshipGeneratorAgent('generator', model),
-            'reviewer': RelationshipReviewerAgent('reviewer', model),
-            'remover': RelationshipRemoverAgent('remover', model),
-            'optimizer': NetworkOptimizerAgent('optimizer', model)
+            'generator': RelationshipGeneratorAgent('generator', model, backend),
+            'reviewer': RelationshipReviewerAgent('reviewer', model, backend),
+            'remover': RelationshipRemoverAgent('remover', model, backend),
+            'optimizer': NetworkOptimizerAgent('optimizer', model, backend)
         }
         
         # Decision history and progress tracking
@@ -723,6 +1163,28 @@ class ProtectedMASHypergraphGenerator:
         self.current_edge_index = 0
         self.start_iteration = 0
         
+        # Building phase decisions that arrived ahead of an uncommitted slot (slot -> decision)
+        self._pending_building_decisions = {}
+        
+        # Snapshots, statistics, journal and checkpoints are written by a background thread
+        self.writer = BackgroundWriter(max_pending=max_pending_writes, fsync_policy=fsync_policy)
+        
+        # Write-ahead journal segment, opened by run() once resume is decided
+        self.journal = None
+        self._journaled_decisions = {}
+        
+        # Per-agent call, parse and acceptance telemetry plus stage timings (metrics.jsonl / metrics.prom)
+        self.metrics = RunMetrics(os.path.join(self.protected_run_dir, "metrics.jsonl"),
+                                  os.path.join(self.protected_run_dir, "metrics.prom"), writer=self.writer)
+        self._attach_metrics()
+        
+        # Machine-readable run events for consumers such as the GUI, and the throttled progress line
+        self.events = EventStream(events_path, events_fd)
+        self.progress = ProgressReporter(progress_interval)
+        self._event_phase = None
+        self._event_iteration = None
+        self._replaying = False
+        
         # Save run configuration
         self.save_run_configuration()
         
@@ -740,6 +1202,17 @@ class ProtectedMASHypergraphGenerator:
             'max_members_per_group': self.max_members_per_group,
             'num_iterations': self.num_iterations,
             'model': self.model,
+            'concurrency': self.concurrency,
+            'near_duplicate_threshold': self.near_duplicate_threshold,
+            'snapshot_interval': self.snapshot_interval,
+            'generation_batch_size': self.generation_batch_size,
+            'review_batch_size': self.review_batch_size,
+            'speculative_candidates': self.speculative_candidates,
+            'hedge_percentile': self.hedge_percentile,
+            'shards': self.shards,
+            'shard_by': self.shard_by,
+            'bridge_fraction': self.bridge_fraction,
+            'fsync_policy': self.writer.fsync_policy,
             'run_timestamp': self.run_timestamp,
             'total_target_edges': self.total_groups,
             'edge_size_distribution': self.edge_size_distribution,
@@ -750,29 +1223,123 @@ class ProtectedMASHypergraphGenerator:
         with open(config_path, "w", encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
     
+    def _attach_metrics(self):
+        """Let all agents (including ones replaced after construction) record into the run metrics"""
+        for agent in self.agents.values():
+            agent.metrics = self.metrics
+    
     def save_checkpoint(self, iteration: int):
-        """Save checkpoint"""
+        """Append the iteration's delta to the journal; compact into a base snapshot every snapshot_interval iterations"""
+        with self.metrics.stage('persistence'):
+            self._save_checkpoint(iteration)
+    
+    def _save_checkpoint(self, iteration: int):
+        if self.journal is None:
+            # No open journal segment (run_iteration called outside run()): compact so nothing is lost
+            self.save_base_snapshot(iteration)
+            return
+        
+        for name, agent in self.agents.items():
+            # Leftover generator requests may still append to the history: journal up to a fixed end
+            journaled, end = self._journaled_decisions.get(name, 0), len(agent.decision_history)
+            self.journal.log_decisions(name, agent.decision_history[journaled:end])
+            self._journaled_decisions[name] = end
+        iteration_results = self.evolution_history[-1] if self.evolution_history else None
+        self.journal.commit(iteration, self.current_edge_index, iteration_results)
+        
+        if (iteration + 1) % self.snapshot_interval == 0:
+            self.save_base_snapshot(iteration)
+    
+    def save_base_snapshot(self, iteration: int):
+        """Save compacted full checkpoint after iteration and start a new journal segment on top of it"""
+        # Shallow copies: the writer thread serializes them while the run goes on
         checkpoint = {
             'iteration': iteration,
             'current_edge_index': self.current_edge_index,
-            'hyperedges': self.hyperedges,
-            'evolution_history': self.evolution_history,
-            'agents_history': {name: agent.decision_history for name, agent in self.agents.items()},
+            'hyperedge_store': self.hyperedges.to_state(),
+            'evolution_history': list(self.evolution_history),
+            'agents_history': {name: list(agent.decision_history) for name, agent in self.agents.items()},
+            'edge_size_sequence': list(self.edge_size_sequence),
             'remaining_edge_sizes': self.edge_size_sequence[self.current_edge_index:],
             'timestamp': datetime.now().isoformat()
         }
-        
-        checkpoint_path = os.path.join(self.checkpoints_dir, f"checkpoint_iteration_{iteration:03d}.pkl")
-        with open(checkpoint_path, "wb") as f:
-            pickle.dump(checkpoint, f)
+        self.writer.submit(self._write_checkpoint_files, iteration, checkpoint, self.writer.should_fsync(True))
+        
+        self._close_journal()
+        self.journal = RunJournal(segment_path(self.checkpoints_dir, iteration + 1),
+                                  header={'start_iteration': iteration + 1, 'base_iteration': iteration},
+                                  writer=self.writer)
+        self._journaled_decisions = {name: len(agent.decision_history) for name, agent in self.agents.items()}
+        self.writer.submit(prune, self.checkpoints_dir)
+    
+    def _write_checkpoint_files(self, iteration: int, checkpoint: Dict[str, Any], fsync: bool):
+        """Write base snapshot pickle and its JSON view (runs on the background writer)"""
+        write_base_snapshot(base_path(self.checkpoints_dir, iteration), checkpoint, fsync)
         
         # Also save JSON version for easy viewing
         checkpoint_json_path = os.path.join(self.checkpoints_dir, f"checkpoint_iteration_{iteration:03d}.json")
         json_checkpoint = checkpoint.copy()
         del json_checkpoint['agents_history']
+        del json_checkpoint['hyperedge_store']
+        json_checkpoint['hyperedges'] = HyperedgeStore.state_edges(checkpoint['hyperedge_store'])
         with open(checkpoint_json_path, "w", encoding='utf-8') as f:
             json.dump(json_checkpoint, f, indent=2, ensure_ascii=False)
     
+    def _open_journal(self):
+        """Start the journal segment of a fresh run (resume re-opens the replayed segment instead)"""
+        if self.journal is not None:
+            return
+        header = {'start_iteration': self.start_iteration}
+        if self.start_iteration == 0:
+            header['edge_size_sequence'] = self.edge_size_sequence
+        self.journal = RunJournal(segment_path(self.checkpoints_dir, self.start_iteration), header=header,
+                                  writer=self.writer)
+        self._journaled_decisions = {name: len(agent.decision_history) for name, agent in self.agents.items()}
+    
+    def _close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+    
+    def _replay_journal(self, journal_path: str) -> bool:
+        """Apply the committed iterations of a journal segment on top of the current state"""
+        header, iterations, committed_offset = read_segment(journal_path)
+        if header is None:
+            print(f"❌ Journal segment has no header: {journal_path}")
+            return False
+        
+        if 'edge_size_sequence' in header:
+            # First segment of a run: replay starts from the empty hypergraph
+            self.edge_size_sequence = header['edge_size_sequence']
+            self.hyperedges = HyperedgeStore()
+            self.evolution_history = []
+            self.current_edge_index = 0
+            self.start_iteration = header['start_iteration']
+            self._pending_building_decisions = {}
+            self._rebuild_edge_indexes()
+        
+        self._replaying = True
+        for commit, events in iterations:
+            for event in events:
+                if event['type'] == 'add':
+                    self._add_hyperedge(event['edge'])
+                elif event['type'] == 'remove':
+                    self._remove_hyperedge(event['edge_id'])
+                elif event['type'] == 'decisions' and event['agent'] in self.agents:
+                    self.agents[event['agent']].decision_history.extend(event['decisions'])
+            self.current_edge_index = commit['current_edge_index']
+            if commit['iteration_results'] is not None:
+                self.evolution_history.append(commit['iteration_results'])
+            self.start_iteration = commit['iteration'] + 1
+        self._replaying = False
+        
+        # Continue appending to this segment, dropping events of an interrupted iteration
+        self.journal = RunJournal(journal_path, append_at=committed_offset, writer=self.writer)
+        self._journaled_decisions = {name: len(agent.decision_history) for name, agent in self.agents.items()}
+        print(f"🔁 Replayed {len(iterations)} journaled iterations, will continue from iteration {self.start_iteration}")
+        print(f"📊 Current progress: {len(self.hyperedges)} hyperedges, index {self.current_edge_index}")
+        return True
+    
     def load_checkpoint(self, checkpoint_path: str) -> bool:
         """Load checkpoint"""
         try:
@@ -781,16 +1348,24 @@ class ProtectedMASHypergraphGenerator:
             
             self.start_iteration = checkpoint['iteration'] + 1
             self.current_edge_index = checkpoint['current_edge_index']
-            self.hyperedges = checkpoint['hyperedges']
+            if 'hyperedge_store' in checkpoint:
+                self.hyperedges = HyperedgeStore.from_state(checkpoint['hyperedge_store'])
+            else:
+                self.hyperedges = HyperedgeStore(checkpoint['hyperedges'])
             self.evolution_history = checkpoint['evolution_history']
+            self._pending_building_decisions = {}
+            self._rebuild_edge_indexes()
             
             # Restore agent decision history
             for agent_name, history in checkpoint['agents_history'].items():
                 if agent_name in self.agents:
                     self.agents[agent_name].decision_history = history
             
-            # Restore remaining edge size sequence
-            if 'remaining_edge_sizes' in checkpoint:
+            # Restore edge size sequence: this process drew its own shuffle (and a sharded run reorders it),
+            # so only the saved sequence matches the sizes of the hyperedges built so far
+            if 'edge_size_sequence' in checkpoint:
+                self.edge_size_sequence = list(checkpoint['edge_size_sequence'])
+            elif 'remaining_edge_sizes' in checkpoint:
                 remaining_sizes = checkpoint['remaining_edge_sizes']
                 self.edge_size_sequence = self.edge_size_sequence[:self.current_edge_index] + remaining_sizes
             
@@ -821,16 +1396,25 @@ class ProtectedMASHypergraphGenerator:
                 if not os.path.exists(directory):
                     print(f"❌ Missing required subdirectory: {directory}")
                     return False
+            self._load_shard_layout()
             
-            # Find latest checkpoint
-            latest_checkpoint = self.find_latest_checkpoint()
-            if not latest_checkpoint:
+            # Latest compacted base snapshot plus the journal segment written on top of it
+            base_iteration = latest_base(self.checkpoints_dir)
+            segments = list_files(self.checkpoints_dir, SEGMENT_PATTERN)
+            segment_start = 0 if base_iteration is None else base_iteration + 1
+            if base_iteration is None and segment_start not in segments:
                 print(f"❌ No checkpoint file found in resume directory")
                 return False
             
-            # Load checkpoint
-            print(f"🔄 Found checkpoint: {latest_checkpoint}")
-            return self.load_checkpoint(latest_checkpoint)
+            if base_iteration is not None:
+                latest_checkpoint = base_path(self.checkpoints_dir, base_iteration)
+                print(f"🔄 Found checkpoint: {latest_checkpoint}")
+                if not self.load_checkpoint(latest_checkpoint):
+                    return False
+            
+            if segment_start in segments:
+                return self._replay_journal(segments[segment_start])
+            return True
             
         except Exception as e:
             print(f"❌ Failed to resume from directory: {e}")
@@ -851,7 +1435,7 @@ class ProtectedMASHypergraphGenerator:
         return latest_checkpoint
     
     def load_personas(self) -> Dict:
-        """Load personas.json file"""
+        """Load personas.json file (or its columnar store, see persona_store.py)"""
         # Smart search for personas file path
         possible_paths = [
             self.personas_file,
@@ -864,8 +1448,9 @@ class ProtectedMASHypergraphGenerator:
         for path in possible_paths:
             if os.path.exists(path):
                 print(f"✅ Found personas file: {path}")
-                with open(path, "r", encoding='utf-8') as f:
-                    data = json.load(f)
+                data = load_personas(path)
+                if isinstance(data, PersonaStore):
+                    print(f"🗃️ Using columnar persona store: {data.directory}")
                 return data
         
         # If not found, give clear error message
@@ -929,16 +1514,21 @@ class ProtectedMASHypergraphGenerator:
     
     def save_iteration_snapshot(self, iteration: int, iteration_results: Dict):
         """Save iteration snapshot"""
+        with self.metrics.stage('network_stats'):
+            network_statistics = self.network_stats.stats()
+        with self.metrics.stage('persistence'):
+            self._save_iteration_snapshot(iteration, iteration_results, network_statistics)
+    
+    def _save_iteration_snapshot(self, iteration: int, iteration_results: Dict, network_statistics: Dict):
         snapshot = {
             'iteration': iteration,
             'timestamp': datetime.now().isoformat(),
             'hypergraph_state': {
                 'num_edges': len(self.hyperedges),
-                'edges': self.hyperedges.copy(),
                 'current_edge_index': self.current_edge_index,
                 'progress_percentage': (self.current_edge_index / len(self.edge_size_sequence)) * 100
             },
-            'network_statistics': self.agents['optimizer']._calculate_network_stats(self.hyperedges, self.personas),
+            'network_statistics': network_statistics,
             'iteration_results': iteration_results,
             'agents_decisions': {
                 name: agent.decision_history[-1] if agent.decision_history else None 
@@ -946,26 +1536,24 @@ class ProtectedMASHypergraphGenerator:
             }
         }
         
-        # Save hypergraph state
-        hypergraph_file = os.path.join(self.snapshots_dir, f"iteration_{iteration:03d}_hypergraph.txt")
-        with open(hypergraph_file, "w", encoding='utf-8') as f:
-            for edge in self.hyperedges:
-                f.write(" ".join(map(str, edge)) + "\n")
+        # Save full hypergraph state together with the compacted base snapshots only,
+        # the edges added/removed in between are listed in iteration_results
+        if (iteration + 1) % self.snapshot_interval == 0:
+            hypergraph_file = os.path.join(self.snapshots_dir, f"iteration_{iteration:03d}_hypergraph.txt")
+            self.writer.write_edges(hypergraph_file, self.hyperedges)
         
         # Save detailed snapshot
         snapshot_file = os.path.join(self.snapshots_dir, f"iteration_{iteration:03d}_snapshot.json")
-        with open(snapshot_file, "w", encoding='utf-8') as f:
-            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        self.writer.write_json(snapshot_file, snapshot)
         
         # Save network statistics
         stats_file = os.path.join(self.analysis_dir, f"iteration_{iteration:03d}_stats.json")
-        with open(stats_file, "w", encoding='utf-8') as f:
-            json.dump(snapshot['network_statistics'], f, indent=2, ensure_ascii=False)
+        self.writer.write_json(stats_file, snapshot['network_statistics'])
     
     def run_iteration(self, iteration: int) -> Dict[str, Any]:
         """Run single iteration (distinguish building phase and evolution phase)"""
         try:
-            print(f"\n🔄 Iteration {iteration + 1}/{self.num_iterations}")
+            logger.info(f"\n🔄 Iteration {iteration + 1}/{self.num_iterations}")
             
             iteration_results = {
                 'iteration': iteration,
@@ -979,84 +1567,17 @@ class ProtectedMASHypergraphGenerator:
             # Determine current phase: building vs evolution
             # Building phase: until all target hyperedges are generated
             is_building_phase = self.current_edge_index < len(self.edge_size_sequence)
+            self._event_iteration = iteration
+            self._set_event_phase('building' if is_building_phase else 'evolution')
             
             if is_building_phase:
                 # ==================== Building Phase Logic ====================
                 iteration_results['phase'] = 'building'
-                print(f"🏗️ [Building Phase] Rapid hyperedge generation (progress: {self.current_edge_index}/{len(self.edge_size_sequence)})")
+                logger.info(f"🏗️ [Building Phase] Rapid hyperedge generation (progress: {self.current_edge_index}/{len(self.edge_size_sequence)})")
                 
                 # Building phase: only use generator agent, no review, no removal, no optimization
-                all_persons = list(self.personas.keys())
-                generated_count = 0
                 max_attempts = self.groups_per_iteration * 3
-                
-                for attempt in range(max_attempts):
-                    if self.current_edge_index >= len(self.edge_size_sequence):
-                        print("✅ Building phase complete! All target hyperedges generated")
-                        break
-                    
-                    # Get current target hyperedge size
-                    target_edge_size = self.edge_size_sequence[self.current_edge_index]
-                    
-                    # Use preferential attachment to select main individual (building phase)
-                    if len(self.hyperedges) > 0:
-                        node_degrees = {}
-                        for edge in self.hyperedges:
-                            for node in edge:
-                                node_degrees[node] = node_degrees.get(node, 0) + 1
-                        
-                        # 85% probability select high-degree nodes, 15% random selection
-                        if random.random() < 0.85 and node_degrees:
-                            # Weighted selection from connected nodes by degree
-                            nodes_with_degrees = list(node_degrees.items())
-                            weights = [degree + 1 for _, degree in nodes_with_degrees]
-                            main_person = random.choices(
-                                [node for node, _ in nodes_with_degrees], 
-                                weights=weights
-                            )[0]
-                            print(f"🎯 Preferential attachment selected {main_person} (degree: {node_degrees[main_person]})")
-                        else:
-                            main_person = random.choice(all_persons)
-                            print(f"🎲 Randomly selected {main_person}")
-                    else:
-                        main_person = random.choice(all_persons)
-                    
-                    # Call generator agent
-                    generator_context = {
-                        'person_id': main_person,
-                        'person_data': self.personas[main_person],
-                        'existing_hyperedges': self.hyperedges,
-                        'personas': self.personas,
-                        'max_members': self.max_members_per_group,
-                        'target_edge_size': target_edge_size
-                    }
-                    
-                    generator_decision = self.agents['generator'].make_decision(generator_context)
-                    
-                    # Building phase: lenient quality check (avoid loops, increase diversity)
-                    if len(generator_decision['selected_members']) >= 2:
-                        # Pass current hyperedge info for quality check
-                        self._current_hyperedges = self.hyperedges
-                        should_approve = self._lenient_quality_check(
-                            generator_decision['selected_members'],
-                            self.personas
-                        )
-                        
-                        if should_approve:
-                            new_edge = generator_decision['selected_members']
-                            self.hyperedges.append(new_edge)
-                            print(f"  ✅ Added hyperedge #{len(self.hyperedges)} (size {len(new_edge)}): {' '.join(new_edge)}")
-                            generated_count += 1
-                            self.current_edge_index += 1
-                            
-                            iteration_results['actions'].append({
-                                'action': 'generate',
-                                'edge': new_edge,
-                                'size': len(new_edge),
-                                'phase': 'building'
-                            })
-                        else:
-                            print(f"  ❌ Quality check failed: {' '.join(generator_decision['selected_members'])}")
+                self._run_building_attempts(iteration_results, max_attempts)
                 
                 # Building phase completion check
                 if self.current_edge_index >= len(self.edge_size_sequence):
@@ -1069,39 +1590,46 @@ class ProtectedMASHypergraphGenerator:
             else:
                 # ==================== Evolution Phase Logic ====================
                 iteration_results['phase'] = 'evolution'
-                print(f"🔄 [Evolution Phase] Dynamic network optimization (hyperedges: {len(self.hyperedges)})")
+                logger.info(f"🔄 [Evolution Phase] Dynamic network optimization (hyperedges: {len(self.hyperedges)})")
                 
                 # Evolution phase goal: maintain dynamic balance in hyperedge count
                 # Operations for removal, generation, and optimization are roughly balanced
                 
                 # 1. Network optimizer agent analysis
+                with self.metrics.stage('network_stats'):
+                    network_statistics = self.network_stats.stats()
                 optimizer_context = {
                     'all_hyperedges': self.hyperedges,
                     'personas': self.personas,
-                    'iteration': iteration
+                    'iteration': iteration,
+                    'node_degrees': self.degree_index.degrees,
+                    'network_stats': network_statistics
                 }
-                optimizer_decision = self.agents['optimizer'].make_decision(optimizer_context)
+                with self.metrics.stage('optimizer'):
+                    optimizer_decision = self.agents['optimizer'].make_decision(optimizer_context)
                 iteration_results['actions'].append(optimizer_decision)
-                print(f"  📊 Optimizer suggestion: {optimizer_decision['strategy']}")
+                logger.info(f"  📊 Optimizer suggestion: {optimizer_decision['strategy']}")
                 
                 # 2. Remover agent - identify hyperedges to remove
                 remover_context = {
                     'all_hyperedges': self.hyperedges,
                     'personas': self.personas,
-                    'iteration': iteration
+                    'iteration': iteration,
+                    'node_degrees': self.degree_index.degrees
                 }
-                remover_decision = self.agents['remover'].make_decision(remover_context)
+                with self.metrics.stage('removal'):
+                    remover_decision = self.agents['remover'].make_decision(remover_context)
                 iteration_results['actions'].append(remover_decision)
                 
-                # Execute removal (at most groups_per_iteration hyperedges)
-                edges_to_remove = sorted(remover_decision['edges_to_remove'], reverse=True)
+                # Execute removal by stable edge ID (at most groups_per_iteration hyperedges)
+                edges_to_remove = list(dict.fromkeys(remover_decision['edges_to_remove']))
                 edges_to_remove = edges_to_remove[:self.groups_per_iteration]
                 removed_count = 0
                 
-                for edge_idx in edges_to_remove:
-                    if 0 <= edge_idx < len(self.hyperedges):
-                        removed_edge = self.hyperedges.pop(edge_idx)
-                        print(f"  🗑️ Removed hyperedge: {' '.join(removed_edge)}")
+                for edge_id in edges_to_remove:
+                    if self.hyperedges.has_edge(edge_id):
+                        removed_edge = self._remove_hyperedge(edge_id)
+                        logger.debug(f"  🗑️ Removed hyperedge: {' '.join(removed_edge)}")
                         removed_count += 1
                         iteration_results['actions'].append({
                             'action': 'remove',
@@ -1116,76 +1644,71 @@ class ProtectedMASHypergraphGenerator:
                 target_generate_count = max(removed_count, self.groups_per_iteration // 2)
                 max_attempts = target_generate_count * 2
                 
-                # Generate new hyperedges in evolution phase
-                for attempt in range(max_attempts):
-                    if generated_count >= target_generate_count:
-                        break
-                    
-                    # Randomly select portion of existing hyperedges as context
-                    context_edges = random.sample(self.hyperedges, min(5, len(self.hyperedges)))
-                    
-                    # Select main individual: prioritize same background features
-                    main_person = self._select_person_by_background(all_persons)
-                    
-                    # Randomly select target size based on existing hyperedge size distribution
-                    existing_sizes = [len(e) for e in self.hyperedges]
-                    target_edge_size = random.choice(existing_sizes) if existing_sizes else 3
-                    
-                    generator_context = {
-                        'person_id': main_person,
-                        'person_data': self.personas[main_person],
-                        'existing_hyperedges': context_edges,
-                        'personas': self.personas,
-                        'max_members': self.max_members_per_group,
-                        'target_edge_size': target_edge_size
-                    }
-                    
-                    generator_decision = self.agents['generator'].make_decision(generator_context)
+                # Generate new hyperedges in evolution phase: each round generates the missing number of
+                # candidates, then reviews them together (review_batch_size candidates per request)
+                attempts = 0
+                while generated_count < target_generate_count and attempts < max_attempts:
+                    candidates = []
+                    candidate_keys = set()
+                    while len(candidates) < target_generate_count - generated_count and attempts < max_attempts:
+                        attempts += 1
+                        with self.metrics.stage('generation'):
+                            generator_decision = self.agents['generator'].make_decision(
+                                self._build_evolution_generator_context(all_persons)
+                            )
+                        members = generator_decision['selected_members']
+                        if len(members) < 2:
+                            self.metrics.record_outcome('evolution', 'invalid')
+                            continue
+                        
+                        # Skip duplicates without an LLM call, then use lenient review
+                        if self._is_duplicate_hyperedge(members) or frozenset(members) in candidate_keys:
+                            logger.debug(f"  ❌ Duplicate rejected: {' '.join(members)}")
+                            self.metrics.record_outcome('evolution', 'duplicate')
+                            continue
+                        candidates.append(members)
+                        candidate_keys.add(frozenset(members))
                     
-                    # Evolution phase: use lenient review
-                    if len(generator_decision['selected_members']) >= 2:
-                        should_approve = self._moderate_llm_review(
-                            generator_decision['selected_members'],
-                            self.personas,
-                            self.hyperedges
-                        )
+                    with self.metrics.stage('review'):
+                        verdicts = self._review_candidates(candidates)
+                    for new_edge, should_approve in zip(candidates, verdicts):
+                        if not should_approve:
+                            logger.debug(f"  ❌ Review rejected: {' '.join(new_edge)}")
+                            self.metrics.record_outcome('evolution', 'review_rejected')
+                            continue
+                        if generated_count >= target_generate_count:
+                            break
+                        # A candidate approved in the same round may be a near-duplicate of one just added
+                        if self._is_duplicate_hyperedge(new_edge):
+                            logger.debug(f"  ❌ Duplicate rejected: {' '.join(new_edge)}")
+                            self.metrics.record_outcome('evolution', 'duplicate')
+                            continue
                         
-                        if should_approve:
-                            new_edge = generator_decision['selected_members']
-                            self.hyperedges.append(new_edge)
-                            print(f"  ✅ Added hyperedge (size {len(new_edge)}): {' '.join(new_edge)}")
-                            generated_count += 1
-                            
-                            iteration_results['actions'].append({
-                                'action': 'generate',
-                                'edge': new_edge,
-                                'size': len(new_edge),
-                                'phase': 'evolution'
-                            })
-                        else:
-                            print(f"  ❌ Review rejected: {' '.join(generator_decision['selected_members'])}")
+                        self._add_hyperedge(new_edge)
+                        self.metrics.record_outcome('evolution', 'accepted')
+                        logger.debug(f"  ✅ Added hyperedge (size {len(new_edge)}): {' '.join(new_edge)}")
+                        generated_count += 1
+                        
+                        iteration_results['actions'].append({
+                            'action': 'generate',
+                            'edge': new_edge,
+                            'size': len(new_edge),
+                            'phase': 'evolution'
+                        })
                 
-                print(f"  📊 Evolution stats: Removed {removed_count}, Added {generated_count}, Net change {generated_count - removed_count}")
-            
-            iteration_results['hyperedges_after'] = len(self.hyperedges)
-            self.evolution_history.append(iteration_results)
-            
-            # Save iteration snapshot
-            self.save_iteration_snapshot(iteration, iteration_results)
-            
-            # Save checkpoint
-            self.save_checkpoint(iteration)
+                logger.info(f"  📊 Evolution stats: Removed {removed_count}, Added {generated_count}, Net change {generated_count - removed_count}")
             
+            self._finish_iteration(iteration, iteration_results)
             return iteration_results
             
         except Exception as e:
-            print(f"⚠️ Exception occurred in iteration {iteration}: {e}")
+            logger.warning(f"⚠️ Exception occurred in iteration {iteration}: {e}")
             # Save emergency checkpoint
             try:
                 emergency_checkpoint = {
                     'iteration': iteration,
                     'current_edge_index': self.current_edge_index,
-                    'hyperedges': self.hyperedges,
+                    'hyperedges': list(self.hyperedges),
                     'evolution_history': self.evolution_history,
                     'error': str(e),
                     'timestamp': datetime.now().isoformat()
@@ -1198,7 +1721,379 @@ class ProtectedMASHypergraphGenerator:
                 pass
             raise
     
-    def _lenient_quality_check(self, hyperedge: List[str], personas: Dict) -> bool:
+    def _finish_iteration(self, iteration: int, iteration_results: Dict[str, Any]):
+        """Record a finished iteration: history, snapshot, checkpoint, cost summary and iteration_done event"""
+        iteration_results['hyperedges_after'] = len(self.hyperedges)
+        self.evolution_history.append(iteration_results)
+        
+        # Save iteration snapshot
+        self.save_iteration_snapshot(iteration, iteration_results)
+        
+        # Save checkpoint
+        self.save_checkpoint(iteration)
+        
+        self._summarize_iteration_cost(iteration, iteration_results['phase'])
+        
+        self.events.emit('iteration_done', iteration=iteration, phase=iteration_results['phase'],
+                         hyperedges=len(self.hyperedges),
+                         progress=min(1.0, self.current_edge_index / len(self.edge_size_sequence)))
+        self.events.flush()
+    
+    def _set_event_phase(self, phase: str):
+        if phase != self._event_phase:
+            self._event_phase = phase
+            self.events.emit('phase_changed', phase=phase, iteration=self._event_iteration)
+            self.events.flush()
+    
+    def _summarize_iteration_cost(self, iteration: int, phase: str):
+        """Record the iteration's LLM cost per accepted hyperedge and flush the metrics files"""
+        summary = self.metrics.iteration_summary(iteration, phase)
+        if summary['llm_calls']:
+            per_edge = summary['tokens_per_accepted_edge']
+            logger.info(f"  💰 {summary['llm_calls']} LLM calls, {summary['prompt_tokens'] + summary['completion_tokens']} tokens "
+                  f"({summary['cached_token_ratio'] or 0:.0%} of prompt tokens cached), "
+                  f"{per_edge if per_edge is not None else '-'} tokens per accepted hyperedge")
+        self.metrics.flush()
+    
+    def _run_building_attempts(self, iteration_results: Dict[str, Any], max_attempts: int) -> int:
+        """Run up to max_attempts generator calls for the building phase, return number of hyperedges added"""
+        return asyncio.run(self._run_building_attempts_async(iteration_results, max_attempts))
+    
+    async def _run_building_attempts_async(self, iteration_results: Dict[str, Any], max_attempts: int) -> int:
+        """
+        Building phase engine: keep up to self.concurrency generator request groups in flight.
+        Every group is bound to generation_batch_size slots of edge_size_sequence. Finished decisions are
+        buffered and committed strictly in slot order, so the i-th added hyperedge always has size
+        edge_size_sequence[i] regardless of the order in which responses arrive. A slot whose decision fails
+        is re-issued (alone or in a later batch) while attempts remain; valid decisions of the same batch and
+        decisions waiting behind it are kept, across iterations if necessary. Every slot counts as one attempt.
+        
+        A group consists of speculative_candidates requests with independently drawn main individuals. The
+        first decision for a slot that passes the structural part of the quality check wins; candidates whose
+        slots are all resolved are cancelled, or their answers discarded if they are already running. With
+        hedge_percentile set, a request still running after that percentile of recent generator latencies
+        gets one duplicate request for its unresolved slots, whichever answers first is used. Abandoned
+        requests are never waited for, so the slow original of a hedged pair does not hold back the iteration.
+        
+        Size-1 slots need no generator request: they are resolved on the spot with a main individual alone.
+        """
+        loop = asyncio.get_running_loop()
+        all_persons = list(self.personas.keys())
+        in_flight = {}   # slot -> futures of the requests still covering it
+        requests = {}    # future -> {'slots', 'contexts', 'group', 'started', 'hedged', 'is_hedge'}
+        completed = self._pending_building_decisions
+        group_ids = itertools.count()
+        generation = self._building_generation
+        attempts = 0
+        generated_count = 0
+        
+        def submit(slots, contexts, group, is_hedge=False):
+            future = loop.run_in_executor(executor, self._generate_for_slots, slots, contexts, generation)
+            requests[future] = {'slots': slots, 'contexts': contexts, 'group': group, 'started': time.monotonic(),
+                                'hedged': False, 'is_hedge': is_hedge}
+            for s in slots:
+                in_flight.setdefault(s, set()).add(future)
+        
+        if self._generation_executor is None:
+            # Twice the workers: abandoned requests that are still running must not block new ones
+            workers = self.concurrency * (self.speculative_candidates + (1 if self.hedge_percentile else 0))
+            self._generation_executor = ThreadPoolExecutor(max_workers=2 * workers)
+        executor = self._generation_executor
+        try:
+            while True:
+                # Fill free request groups with the earliest open positions of the size sequence
+                slot = self.current_edge_index
+                while len({r['group'] for r in requests.values()}) < self.concurrency and attempts < max_attempts:
+                    slots = []
+                    while len(slots) < min(self.generation_batch_size, max_attempts - attempts):
+                        while slot in in_flight or slot in completed:
+                            slot += 1
+                        if slot >= len(self.edge_size_sequence):
+                            break
+                        if self.edge_size_sequence[slot] == 1:
+                            completed[slot] = self._singleton_decision(all_persons)
+                        else:
+                            slots.append(slot)
+                        slot += 1
+                    if not slots:
+                        break
+                    group = next(group_ids)
+                    for _ in range(self.speculative_candidates):
+                        submit(slots, [self._build_slot_context(all_persons, s) for s in slots], group)
+                    attempts += len(slots)
+                
+                if not requests and self.current_edge_index not in completed:
+                    break
+                
+                timeout = self._issue_hedges(requests, in_flight, submit)
+                done = set()
+                if requests:
+                    done, _ = await asyncio.wait(set(requests), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                now = time.monotonic()
+                for future in done:
+                    request = requests.pop(future, None)
+                    if request is None or future.cancelled():
+                        continue   # discarded by a candidate that finished in the same round
+                    self._generator_latencies.append(now - request['started'])
+                    decisions = future.result()
+                    for s in request['slots']:
+                        candidates = in_flight.get(s)
+                        if candidates is None or future not in candidates:
+                            continue   # slot already resolved by another candidate
+                        candidates.discard(future)
+                        decision = decisions[s]
+                        if candidates and (len(decision['selected_members']) != self.edge_size_sequence[s]
+                                           or not self._passes_structural_check(decision['selected_members'])):
+                            continue   # other candidates for this slot are still running
+                        completed[s] = decision
+                        del in_flight[s]
+                        if request['is_hedge']:
+                            self.metrics.inc('hedge_wins_total')
+                        self._cancel_resolved(candidates, requests, in_flight)
+                
+                # Commit in deterministic slot order; stop at the first slot that has to be retried
+                while self.current_edge_index in completed:
+                    generator_decision = completed.pop(self.current_edge_index)
+                    if not self._commit_building_decision(generator_decision, iteration_results):
+                        break
+                    generated_count += 1
+                    self.progress.update(lambda: f"  📈 Building progress: {self.current_edge_index}/"
+                                                 f"{len(self.edge_size_sequence)} hyperedges "
+                                                 f"({self.current_edge_index / len(self.edge_size_sequence):.1%})")
+                
+                if self.current_edge_index >= len(self.edge_size_sequence):
+                    print("✅ Building phase complete! All target hyperedges generated")
+                    break
+        finally:
+            # Requests abandoned by _cancel_resolved or left over here are not waited for: the queued ones
+            # are cancelled, and a new generation makes any of them that still starts return at once
+            for future in requests:
+                future.cancel()
+            requests.clear()
+            self._building_generation += 1
+        
+        return generated_count
+    
+    def _singleton_decision(self, all_persons: List[str]) -> Dict[str, Any]:
+        """Building decision of a size-1 slot: the main individual alone, no generator request needed"""
+        person_id = self._select_person_by_degree(all_persons, 0.85, verbose=False)
+        return {
+            'action': 'generate',
+            'agent_id': self.agents['generator'].agent_id,
+            'person_id': person_id,
+            'selected_members': [person_id],
+            'reasoning': "Size-1 hyperedge, no collaborators to select",
+            'phase': 'building'
+        }
+    
+    def _cancel_resolved(self, futures, requests: Dict, in_flight: Dict):
+        """Cancel (or, if running, abandon) the given requests once none of their slots is open any more"""
+        for future in list(futures):
+            request = requests.get(future)
+            if request is None or any(s in in_flight for s in request['slots']):
+                continue
+            future.cancel()
+            del requests[future]
+            self.metrics.inc('speculative_discarded_total')
+    
+    def _hedge_threshold(self):
+        """Latency after which a generator request gets a hedged duplicate (None: hedging off or too few samples)"""
+        if not self.hedge_percentile or len(self._generator_latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self._generator_latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))]
+    
+    def _issue_hedges(self, requests: Dict, in_flight: Dict, submit):
+        """Hedge overdue requests; return seconds until the next request becomes overdue (None: no deadline)"""
+        threshold = self._hedge_threshold()
+        if threshold is None:
+            return None
+        now = time.monotonic()
+        timeout = None
+        for future, request in list(requests.items()):
+            if request['hedged'] or request['is_hedge'] or future.done():
+                continue
+            open_slots = [k for k, s in enumerate(request['slots']) if s in in_flight]
+            if not open_slots:
+                continue
+            due = request['started'] + threshold
+            if due <= now:
+                request['hedged'] = True
+                submit([request['slots'][k] for k in open_slots], [request['contexts'][k] for k in open_slots],
+                       request['group'], is_hedge=True)
+                self.metrics.inc('hedged_requests_total')
+            else:
+                timeout = due - now if timeout is None else min(timeout, due - now)
+        return timeout
+    
+    def _generate_for_slots(self, slots: List[int], contexts: List[Dict[str, Any]],
+                            generation: int = None) -> Dict[int, Dict[str, Any]]:
+        """One generator request for the given slots (runs in an executor thread): slot -> decision"""
+        if generation is not None and generation != self._building_generation:
+            return {}   # the building iteration that issued it has finished, nobody reads the answer
+        generator = self.agents['generator']
+        with self.metrics.stage('generation'):
+            if len(slots) == 1 or not hasattr(generator, 'make_batch_decision'):
+                decisions = {slot: generator.make_decision(context) for slot, context in zip(slots, contexts)}
+            else:
+                decisions = dict(zip(slots, generator.make_batch_decision(contexts)))
+        for slot, context in zip(slots, contexts):
+            if context.get('bridge_member'):
+                decisions[slot] = self._with_bridge_member(decisions[slot], context['bridge_member'])
+        return decisions
+    
+    def _build_slot_context(self, all_persons: List[str], slot: int) -> Dict[str, Any]:
+        """Generator context of a building slot; a bridging slot also gets a member from another shard"""
+        context = self._build_generator_context(all_persons, self.edge_size_sequence[slot])
+        if self._is_bridge_slot(slot):
+            context['bridge_member'] = self._select_bridge_member(context['person_id'])
+        return context
+    
+    def _select_bridge_member(self, person_id: str) -> str:
+        """Persona of another shard than person_id's, by preferential attachment where possible"""
+        own_shard = self.shard_of.get(person_id)
+        other_shards = [index for index, members in enumerate(self.shard_members) if index != own_shard and members]
+        for _ in range(10):
+            candidate = self._select_person_by_degree(self.shard_members[random.choice(other_shards)], 0.85, verbose=False)
+            if self.shard_of.get(candidate) != own_shard:
+                return candidate
+        return random.choice(self.shard_members[random.choice(other_shards)])
+    
+    @staticmethod
+    def _with_bridge_member(decision: Dict[str, Any], bridge_member: str) -> Dict[str, Any]:
+        """Decision whose members include bridge_member, which replaces the last collaborator if missing"""
+        members = decision['selected_members']
+        if bridge_member in members or len(members) < 2:
+            return decision
+        return dict(decision, selected_members=members[:-1] + [bridge_member])
+    
+    def _build_generator_context(self, all_persons: List[str], target_edge_size: int) -> Dict[str, Any]:
+        """Select main individual by preferential attachment and build building-phase generator context"""
+        main_person = self._select_person_by_degree(all_persons, 0.85)
+        
+        return {
+            'person_id': main_person,
+            'person_data': self.personas[main_person],
+            'existing_hyperedges': self.hyperedges,
+            'personas': self.personas,
+            'max_members': self.max_members_per_group,
+            'target_edge_size': target_edge_size,
+            # Live degree index views, only read by the agent
+            'node_degrees': self.degree_index.degrees,
+            'degree_buckets': self.degree_buckets
+        }
+    
+    def _select_person_by_degree(self, all_persons: List[str], attachment_probability: float, verbose: bool = True) -> str:
+        """
+        Preferential attachment: with attachment_probability draw a connected node weighted by degree + 1
+        (O(log n) via the degree index), otherwise pick a random individual
+        """
+        if len(self.degree_index) == 0:
+            return random.choice(all_persons)
+        
+        if random.random() < attachment_probability:
+            main_person = self.degree_index.sample()
+            if verbose:
+                logger.debug(f"🎯 Preferential attachment selected {main_person} (degree: {self.degree_index.degree(main_person)})")
+        else:
+            main_person = random.choice(all_persons)
+            if verbose:
+                logger.debug(f"🎲 Randomly selected {main_person}")
+        return main_person
+    
+    def _add_hyperedge(self, edge: List[str]) -> int:
+        """Add a hyperedge, update all edge indexes, journal the event and return its stable edge ID"""
+        edge_id = self.hyperedges.add(edge)
+        with self.metrics.stage('degree_computation'):
+            for index in self._edge_indexes:
+                index.add(edge)
+        if self.journal is not None:
+            self.journal.log_add(edge_id, edge)
+        if not self._replaying:
+            self.events.emit('edge_added', edge_id=edge_id, edge=edge, size=len(edge),
+                             phase=self._event_phase, iteration=self._event_iteration)
+        return edge_id
+    
+    def _remove_hyperedge(self, edge_id: int) -> List[str]:
+        """Remove hyperedge by stable edge ID, update all edge indexes, journal the event and return it"""
+        removed_edge = self.hyperedges.remove(edge_id)
+        with self.metrics.stage('degree_computation'):
+            for index in self._edge_indexes:
+                index.remove(removed_edge)
+        if self.journal is not None:
+            self.journal.log_remove(edge_id, removed_edge)
+        if not self._replaying:
+            self.events.emit('edge_removed', edge_id=edge_id, edge=removed_edge, size=len(removed_edge),
+                             phase=self._event_phase, iteration=self._event_iteration)
+        return removed_edge
+    
+    def _rebuild_edge_indexes(self):
+        """Rebuild edge indexes from self.hyperedges (on start and after loading a checkpoint)"""
+        self.degree_index = DegreeIndex(self.hyperedges)
+        self.degree_buckets = DegreeBuckets(self.degree_index, self.personas)
+        self.attribute_counter = AttributeCounter(self.personas, BACKGROUND_ATTRIBUTES, self.hyperedges)
+        self.edge_dedup_index = EdgeDedupIndex(self.near_duplicate_threshold)
+        for edge in self.hyperedges:
+            self.edge_dedup_index.add(edge)
+        self.network_stats = NetworkStats(self.personas, BACKGROUND_ATTRIBUTES, self.hyperedges)
+        # DegreeBuckets reads the updated degrees, so it follows the DegreeIndex
+        self._edge_indexes = [self.degree_index, self.degree_buckets, self.attribute_counter,
+                              self.edge_dedup_index, self.network_stats]
+    
+    def _is_duplicate_hyperedge(self, hyperedge: List[str]) -> bool:
+        """Check hyperedge against existing ones (exact, plus near-duplicates if a threshold is configured)"""
+        return self.edge_dedup_index.is_duplicate(hyperedge)
+    
+    def _commit_building_decision(self, generator_decision: Dict[str, Any], iteration_results: Dict[str, Any]) -> bool:
+        """Apply lenient quality check to a generator decision and add it as next hyperedge if approved"""
+        # Members outside the persona collection are dropped by the agent, so the size is checked here
+        if len(generator_decision['selected_members']) != self.edge_size_sequence[self.current_edge_index]:
+            self.metrics.record_outcome('building', 'invalid')
+            return False
+        
+        # A size-1 hyperedge is one individual alone: the collaboration and duplicate checks do not apply
+        if len(generator_decision['selected_members']) == 1:
+            return self._accept_building_decision(generator_decision, iteration_results)
+        
+        if self._is_bridge_slot(self.current_edge_index) and not self._spans_shards(generator_decision['selected_members']):
+            self._bridge_rejections[self.current_edge_index] += 1
+            if self._bridge_rejections[self.current_edge_index] <= self.BRIDGE_MAX_REJECTIONS:
+                logger.debug(f"  ❌ Not a cross-shard hyperedge: {' '.join(generator_decision['selected_members'])}")
+                self.metrics.record_outcome('building', 'not_bridging')
+                return False
+            self.metrics.inc('bridge_requirement_dropped_total')
+        
+        with self.metrics.stage('quality_check'):
+            should_approve = self._lenient_quality_check(
+                generator_decision['selected_members'],
+                self.personas
+            )
+        
+        if not should_approve:
+            logger.debug(f"  ❌ Quality check failed: {' '.join(generator_decision['selected_members'])}")
+            self.metrics.record_outcome('building', 'quality_rejected')
+            return False
+        return self._accept_building_decision(generator_decision, iteration_results)
+    
+    def _accept_building_decision(self, generator_decision: Dict[str, Any], iteration_results: Dict[str, Any]) -> bool:
+        """Add a checked generator decision as the hyperedge of the current slot"""
+        new_edge = generator_decision['selected_members']
+        self._add_hyperedge(new_edge)
+        self.metrics.record_outcome('building', 'accepted')
+        logger.debug(f"  ✅ Added hyperedge #{len(self.hyperedges)} (size {len(new_edge)}): {' '.join(new_edge)}")
+        self.current_edge_index += 1
+        
+        iteration_results['actions'].append({
+            'action': 'generate',
+            'edge': new_edge,
+            'size': len(new_edge),
+            'phase': 'building'
+        })
+        return True
+    
+    def _passes_structural_check(self, hyperedge: List[str], personas: Dict = None) -> bool:
+        """Deterministic part of the lenient quality check: enough existing members, not a duplicate"""
+        personas = self.personas if personas is None else personas
         if len(hyperedge) < 2:
             return False
             
@@ -1212,20 +2107,16 @@ class ProtectedMASHypergraphGenerator:
         if valid_members < len(hyperedge) * 0.5 or valid_members < 2:
             return False
         
-        # Check for complete duplication with existing hyperedges (avoid loops)
-        edge_set = set(hyperedge)
-        for existing_edge in getattr(self, '_current_hyperedges', []):
-            if edge_set == set(existing_edge):
-                return False 
-        
-        # Preferential attachment weighted check: calculate node degree distribution in hyperedge
-        node_degrees = {}
-        for edge in getattr(self, '_current_hyperedges', []):
-            for node in edge:
-                node_degrees[node] = node_degrees.get(node, 0) + 1
+        # Check for duplication with existing hyperedges via hash index (avoid loops)
+        return not self._is_duplicate_hyperedge(hyperedge)
+    
+    def _lenient_quality_check(self, hyperedge: List[str], personas: Dict) -> bool:
+        if not self._passes_structural_check(hyperedge, personas):
+            return False
         
-        high_degree_count = sum(1 for member in hyperedge if node_degrees.get(member, 0) >= 2)
-        medium_degree_count = sum(1 for member in hyperedge if node_degrees.get(member, 0) == 1)
+        # Preferential attachment weighted check: node degrees come from the incremental degree index
+        high_degree_count = sum(1 for member in hyperedge if self.degree_index.degree(member) >= 2)
+        medium_degree_count = sum(1 for member in hyperedge if self.degree_index.degree(member) == 1)
         
         # If contains high-degree nodes, increase pass rate
         if high_degree_count > 0:
@@ -1235,24 +2126,97 @@ class ProtectedMASHypergraphGenerator:
         else:
             return random.random() < 0.7
     
+    def _llm_backend(self) -> LLMBackend:
+        """Backend given to this generator, otherwise the process-wide default"""
+        return self.backend or get_backend()
+    
+    def _build_evolution_generator_context(self, all_persons: List[str]) -> Dict[str, Any]:
+        """Evolution phase generator context: background-driven main individual, random context edges and size"""
+        # Randomly select portion of existing hyperedges as context
+        context_edges = random.sample(self.hyperedges, min(5, len(self.hyperedges)))
+        
+        # Select main individual: prioritize same background features
+        main_person = self._select_person_by_background(all_persons)
+        
+        # Randomly select target size based on existing hyperedge size distribution
+        target_edge_size = len(random.choice(self.hyperedges)) if self.hyperedges else 3
+        
+        return {
+            'person_id': main_person,
+            'person_data': self.personas[main_person],
+            'existing_hyperedges': context_edges,
+            'personas': self.personas,
+            'max_members': self.max_members_per_group,
+            'target_edge_size': target_edge_size
+        }
+    
+    def _scheduler_status(self) -> str:
+        """Queue depth, requests in flight and concurrency limit of the request scheduler, if one is configured"""
+        scheduled = find_backend(self._llm_backend(), 'scheduled')
+        if scheduled is None:
+            return ""
+        stats = scheduled.scheduler.stats()
+        return (f" | 🚦 queue {stats['queue_depth']}, in flight {stats['in_flight']}, "
+                f"limit {stats['concurrency_limit']}, retries {stats['retries']}")
+    
+    def _review_candidates(self, candidates: List[List[str]]) -> List[bool]:
+        """Lenient review of evolution candidates, one request per review_batch_size candidates"""
+        if self.review_batch_size <= 1:
+            return [self._moderate_llm_review(edge, self.personas, self.hyperedges) for edge in candidates]
+        verdicts = []
+        for start in range(0, len(candidates), self.review_batch_size):
+            verdicts.extend(self._moderate_llm_review_batch(candidates[start:start + self.review_batch_size]))
+        return verdicts
+    
+    def _moderate_llm_review_batch(self, hyperedges: List[List[str]], retry_missing: bool = True) -> List[bool]:
+        """
+        Lenient LLM review of several relationships in one request.
+        Relationships without an attributable verdict are re-asked once, then approved like on API failure.
+        """
+        relationships = "\n            ".join(f"Relationship {k}: {' '.join(edge)}" for k, edge in enumerate(hyperedges))
+        try:
+            prompt = self.LENIENT_BATCH_REVIEW_INSTRUCTIONS + f"""
+            Review relationships:
+            {relationships}
+            """
+            
+            response = self.metrics.timed_complete(
+                self._llm_backend(), 'lenient_reviewer',
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a review agent that tends to approve reasonable relationships."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=10 + 5 * len(hyperedges),
+                temperature=0.3,
+            )
+            verdicts = RelationshipReviewerAgent.parse_verdicts(response.content.strip(), len(hyperedges))
+            missing = verdicts.count(None)
+            self.metrics.record_parse('lenient_reviewer', True, len(verdicts) - missing)
+            self.metrics.record_parse('lenient_reviewer', False, missing)
+            
+        except Exception as e:
+            # Default to pass if API fails, counted so that a too high rate limit does not go unnoticed
+            kind = self.metrics.record_fallback('lenient_reviewer', e)
+            logger.warning(f"Batch review API call failed ({kind}), defaulting to approve: {e}")
+            return [True] * len(hyperedges)
+        
+        missing = [k for k, verdict in enumerate(verdicts) if verdict is None]
+        if missing and retry_missing:
+            for k, approved in zip(missing, self._moderate_llm_review_batch([hyperedges[k] for k in missing], False)):
+                verdicts[k] = 'APPROVE' if approved else 'REJECT'
+        return [verdict != 'REJECT' for verdict in verdicts]
+    
     def _moderate_llm_review(self, hyperedge: List[str], personas: Dict, existing_edges: List) -> bool:
         """Lenient LLM review for evolution phase"""
         try:
             # Simplified prompt
-            prompt = f"""
-            You are a lenient relationship review agent, with the goal of promoting network growth.
-            
+            prompt = self.LENIENT_REVIEW_INSTRUCTIONS + f"""
             Review relationship: {' '.join(hyperedge)}
-            
-            Please review based on the following principles:
-            1. APPROVE as long as it's not obviously unreasonable
-            2. Prioritize network growth
-            3. Allow diverse collaborative relationships
-            
-            Output format: Only output "APPROVE" or "REJECT"
             """
             
-            response = client.chat.completions.create(
+            response = self.metrics.timed_complete(
+                self._llm_backend(), 'lenient_reviewer',
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a review agent that tends to approve reasonable relationships."},
@@ -1260,14 +2224,17 @@ class ProtectedMASHypergraphGenerator:
                 ],
                 max_tokens=10,
                 temperature=0.3,
+                stream_cutoff=REVIEW_CUTOFF,
             )
             
-            output = response.choices[0].message.content.strip()
+            output = response.content.strip()
+            self.metrics.record_parse('lenient_reviewer', "APPROVE" in output.upper() or "REJECT" in output.upper())
             return "APPROVE" in output.upper()
             
         except Exception as e:
-            # Default to pass if API fails
-            print(f"Review API call failed, defaulting to approve: {e}")
+            # Default to pass if API fails, counted so that a too high rate limit does not go unnoticed
+            kind = self.metrics.record_fallback('lenient_reviewer', e)
+            logger.warning(f"Review API call failed ({kind}), defaulting to approve: {e}")
             return True
     
     def _select_person_by_background(self, all_persons: List[str]) -> str:
@@ -1278,53 +2245,261 @@ class ProtectedMASHypergraphGenerator:
         if not self.hyperedges or random.random() < 0.3:
             return random.choice(all_persons)
         
-        # Count distribution of background features in existing hyperedges
-        background_counts = {
-            'gender': {},
-            'race': {},
-            'religion': {},
-            'political': {}
+        # Most common background features in existing hyperedges (maintained incrementally)
+        most_common = tuple(self.attribute_counter.most_common(a) for a in BACKGROUND_ATTRIBUTES)
+        
+        # Score whole groups of personas sharing a background instead of every persona
+        classes = {}
+        for background, members in self.attribute_counter.groups.items():
+            score = sum(value == common for value, common in zip(background, most_common))
+            classes.setdefault(score, []).append(members)
+        
+        # Randomly select from top 30%: all personas of the higher score classes, plus a
+        # uniformly drawn share of the score class that crosses the cutoff
+        top_30_percent = max(1, len(self.personas) // 3)
+        higher = []
+        higher_size = 0
+        for score in sorted(classes, reverse=True):
+            class_size = sum(len(members) for members in classes[score])
+            if higher_size + class_size >= top_30_percent:
+                pick = random.randrange(top_30_percent)
+                if pick >= higher_size:
+                    higher, pick = classes[score], random.randrange(class_size)
+                return self._nth_member(higher, pick)
+            higher.extend(classes[score])
+            higher_size += class_size
+        return random.choice(all_persons)
+    
+    @staticmethod
+    def _nth_member(groups: List[List[str]], n: int) -> str:
+        for members in groups:
+            if n < len(members):
+                return members[n]
+            n -= len(members)
+        raise IndexError(n)
+    
+    # ---- Sharded building phase ------------------------------------------------
+    
+    def _partition_personas(self) -> List[List[str]]:
+        """Split the persona IDs into self.shards shards of (almost) equal size"""
+        person_ids = list(self.personas.keys())
+        if self.shard_by == 'random':
+            random.shuffle(person_ids)
+        else:
+            attributes = [name.strip() for name in self.shard_by.split(',') if name.strip()]
+            if isinstance(self.personas, PersonaStore) and all(name in self.personas.vocabularies for name in attributes):
+                strata = list(self.personas.groups(attributes).values())
+            else:
+                groups = {}
+                for person_id, person in self.personas.items():
+                    groups.setdefault(tuple(person.get(name) for name in attributes), []).append(person_id)
+                strata = list(groups.values())
+            print(f"🧩 {len(strata)} strata of {', '.join(attributes)}")
+            # Largest strata first; shards are cut from their concatenation, so only strata at a cut are split
+            person_ids = [person_id for stratum in sorted(strata, key=len, reverse=True) for person_id in stratum]
+        bounds = [len(person_ids) * i // self.shards for i in range(self.shards + 1)]
+        return [person_ids[bounds[i]:bounds[i + 1]] for i in range(self.shards)]
+    
+    def _split_edge_size_sequence(self, shard_sizes: List[int]) -> Tuple[List[List[int]], List[int]]:
+        """Shares of edge_size_sequence: one per shard (proportional to its personas) and the bridging share"""
+        sequence = self.edge_size_sequence
+        bridge_count = min(round(len(sequence) * self.bridge_fraction), sum(size >= 2 for size in sequence))
+        # The sequence is shuffled, so its last hyperedges of size >= 2 are a random sample
+        bridge_positions = set()
+        for position in range(len(sequence) - 1, -1, -1):
+            if len(bridge_positions) >= bridge_count:
+                break
+            if sequence[position] >= 2:
+                bridge_positions.add(position)
+        bridges = [sequence[position] for position in sorted(bridge_positions)]
+        rest = [size for position, size in enumerate(sequence) if position not in bridge_positions]
+        
+        offsets = [0] + list(itertools.accumulate(shard_sizes))
+        bounds = [len(rest) * offset // offsets[-1] for offset in offsets]
+        return [rest[bounds[i]:bounds[i + 1]] for i in range(len(shard_sizes))], bridges
+    
+    def _shard_options(self, index: int, person_ids: List[str], edge_sizes: List[int]) -> Dict[str, Any]:
+        """Everything a shard worker process needs to rebuild this generator for its shard"""
+        options = None
+        if self.backend_options is not None:
+            # One recording per shard: workers must not append to the same file
+            options = dict(self.backend_options)
+            for name in ('record', 'replay'):
+                if options.get(name):
+                    root, extension = os.path.splitext(options[name])
+                    options[name] = f"{root}.shard{index:02d}{extension}"
+            # The provider quota is shared by all shard workers, each gets an equal share. This process sends
+            # no requests until every shard has finished, the bridging slots then use the whole quota again.
+            for name in ('max_rpm', 'max_tpm'):
+                if options.get(name):
+                    options[name] = options[name] / self.shards
+            if options.get('max_llm_concurrency'):
+                options['max_llm_concurrency'] = max(1, options['max_llm_concurrency'] // self.shards)
+        return {
+            'shard': index,
+            'personas_file': self.personas_file,
+            'config_hypergraph_file': self.config_hypergraph_file,
+            'output_path': os.path.join(self.protected_run_dir, "shards", f"shard_{index:02d}"),
+            'person_ids': person_ids,
+            'edge_sizes': edge_sizes,
+            'seed': random.getrandbits(64),
+            'log_level': logging.getLevelName(logger.getEffectiveLevel()).lower(),
+            'backend_options': options,
+            'generator': {
+                'groups_per_iteration': self.groups_per_iteration,
+                'max_members_per_group': self.max_members_per_group,
+                'iterations': self.num_iterations,
+                'model': self.model,
+                'concurrency': self.concurrency,
+                'near_duplicate_threshold': self.near_duplicate_threshold,
+                'snapshot_interval': self.snapshot_interval,
+                'fsync_policy': self.writer.fsync_policy,
+                'max_pending_writes': self.max_pending_writes,
+                'generation_batch_size': self.generation_batch_size,
+                'review_batch_size': self.review_batch_size,
+                'progress_interval': self.progress.interval,
+                'speculative_candidates': self.speculative_candidates,
+                'hedge_percentile': self.hedge_percentile,
+                'hedge_min_samples': self.hedge_min_samples
+            }
         }
-        
-        for edge in self.hyperedges:
-            for node_id in edge:
-                if node_id in self.personas:
-                    person = self.personas[node_id]
-                    background_counts['gender'][person['gender']] = background_counts['gender'].get(person['gender'], 0) + 1
-                    background_counts['race'][person['race/ethnicity']] = background_counts['race'].get(person['race/ethnicity'], 0) + 1
-                    background_counts['religion'][person['religion']] = background_counts['religion'].get(person['religion'], 0) + 1
-                    background_counts['political'][person['political affiliation']] = background_counts['political'].get(person['political affiliation'], 0) + 1
-        
-        # Find most common background features
-        most_common_gender = max(background_counts['gender'], key=background_counts['gender'].get) if background_counts['gender'] else None
-        most_common_race = max(background_counts['race'], key=background_counts['race'].get) if background_counts['race'] else None
-        most_common_religion = max(background_counts['religion'], key=background_counts['religion'].get) if background_counts['religion'] else None
-        
-        # Prioritize individuals with same background features
-        candidates = []
-        for person_id in all_persons:
-            if person_id in self.personas:
-                person = self.personas[person_id]
-                score = 0
-                if person['gender'] == most_common_gender:
-                    score += 1
-                if person['race/ethnicity'] == most_common_race:
-                    score += 1
-                if person['religion'] == most_common_religion:
-                    score += 1
-                candidates.append((person_id, score))
-        
-        # Sort by score, prioritize high scores
-        candidates.sort(key=lambda x: x[1], reverse=True)
-        
-        # Randomly select from top 30%
-        top_30_percent = max(1, len(candidates) // 3)
-        selected = random.choice(candidates[:top_30_percent])
-        
-        return selected[0]
+    
+    def _run_sharded_building(self, iteration: int) -> Dict[str, Any]:
+        """
+        Building phase over persona shards, as one iteration of this run. Every shard builds its share of
+        edge_size_sequence on its own personas in a worker process (see _building_shard), then the shard
+        hyperedges are merged into this generator. The sequence is reordered to committed shard hyperedges,
+        bridging hyperedges, hyperedges a shard left open; the regular building loop continues with the
+        bridging slots and the open ones. A bridging slot is seeded with a member of another shard than its
+        main individual (named in the prompt, enforced by _generate_for_slots), so its hyperedge spans two
+        shards; _commit_building_decision checks this, up to BRIDGE_MAX_REJECTIONS times per slot. The multiset of sizes is unchanged, so the merged hypergraph matches the target
+        distribution exactly.
+        """
+        iteration_results = {
+            'iteration': iteration,
+            'timestamp': datetime.now().isoformat(),
+            'actions': [],
+            'hyperedges_before': len(self.hyperedges),
+            'hyperedges_after': 0,
+            'phase': 'building'
+        }
+        self._event_iteration = iteration
+        self._set_event_phase('building')
+        
+        shards = self._partition_personas()
+        shard_sequences, bridges = self._split_edge_size_sequence([len(shard) for shard in shards])
+        print(f"🧩 Sharded building phase: {len(shards)} shards ({self.shard_by}) of "
+              f"{', '.join(str(len(shard)) for shard in shards)} personas, {len(bridges)} bridging hyperedges")
+        
+        results = [None] * len(shards)
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(_building_shard, self._shard_options(index, shard, shard_sequences[index])): index
+                       for index, shard in enumerate(shards)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    print(f"⚠️ Shard {index} failed, its hyperedges are generated after bridging: {e}")
+                    continue
+                print(f"✅ Shard {index}: {results[index]['committed']}/{len(shard_sequences[index])} hyperedges "
+                      f"(log: {results[index]['log']})")
+        
+        # Merged order: committed shard hyperedges, bridging hyperedges, hyperedges the shards left open
+        merged, left_open = [], []
+        for result, sizes in zip(results, shard_sequences):
+            committed = result['committed'] if result is not None else 0
+            merged.extend(sizes[:committed])
+            left_open.extend(sizes[committed:])
+        self.edge_size_sequence = merged + bridges + left_open
+        self.shard_members = shards
+        self.shard_of = {person_id: index for index, shard in enumerate(shards) for person_id in shard}
+        self.bridge_slots = (len(merged), len(merged) + len(bridges))
+        self._save_shard_layout(shards)
+        
+        # Segment 0 starts over with the reordered size sequence in its header
+        self._close_journal()
+        self._open_journal()
+        for result in results:
+            if result is None:
+                continue
+            for edge in result['hyperedges'][:result['committed']]:
+                self._add_hyperedge(edge)
+                self.current_edge_index += 1
+            iteration_results['actions'].append({
+                'action': 'merge_shard',
+                'shard': result['shard'],
+                'hyperedges': result['committed'],
+                'run_dir': result['run_dir'],
+                'phase': 'building'
+            })
+        print(f"🧩 Merged {self.current_edge_index} shard hyperedges, "
+              f"{len(self.edge_size_sequence) - self.current_edge_index} left for bridging and open slots")
+        
+        self._finish_iteration(iteration, iteration_results)
+        return iteration_results
+    
+    def restrict_to_shard(self, person_ids: List[str], edge_sizes: List[int]):
+        """Limit this generator to one persona shard and its share of the size sequence (shard workers)"""
+        self.personas = {person_id: self.personas[person_id] for person_id in person_ids}
+        self.edge_size_sequence = list(edge_sizes)
+        self.edge_size_distribution = dict(collections.Counter(self.edge_size_sequence))
+        self.total_groups = len(self.edge_size_sequence)
+        self._rebuild_edge_indexes()
+        self.save_run_configuration()
+    
+    def run_building_phase(self):
+        """Only the building phase, within the iteration budget, then save the results (shard workers)"""
+        self.start_iteration = 0
+        self._open_journal()
+        self._attach_metrics()
+        try:
+            iteration = 0
+            while iteration < self.num_iterations and self.current_edge_index < len(self.edge_size_sequence):
+                self.run_iteration(iteration)
+                iteration += 1
+            self.save_final_results()
+        except BaseException:
+            self._handle_interruption()
+            raise
+    
+    def _shutdown_generation_executor(self):
+        """Stop the building phase executor without waiting for leftover requests (their answers are unused)"""
+        if self._generation_executor is not None:
+            self._building_generation += 1
+            self._generation_executor.shutdown(wait=False, cancel_futures=True)
+            self._generation_executor = None
+    
+    def _is_bridge_slot(self, slot: int) -> bool:
+        return self.bridge_slots is not None and self.bridge_slots[0] <= slot < self.bridge_slots[1]
+    
+    def _spans_shards(self, edge: List[str]) -> bool:
+        return len({self.shard_of.get(member) for member in edge} - {None}) > 1
+    
+    def _save_shard_layout(self, shards: List[List[str]]):
+        """Shard assignment and bridging slots, so a resumed run keeps checking the bridging hyperedges"""
+        layout = {'shard_by': self.shard_by, 'bridge_slots': list(self.bridge_slots), 'shards': shards}
+        with open(os.path.join(self.protected_run_dir, "shards.json"), "w", encoding='utf-8') as f:
+            json.dump(layout, f, ensure_ascii=False)
+    
+    def _load_shard_layout(self):
+        path = os.path.join(self.protected_run_dir, "shards.json")
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding='utf-8') as f:
+            layout = json.load(f)
+        self.shard_members = layout['shards']
+        self.shard_of = {person_id: index for index, shard in enumerate(self.shard_members) for person_id in shard}
+        self.bridge_slots = tuple(layout['bridge_slots'])
     
     def save_final_results(self):
         """Save final results and complete evolution history"""
+        self._shutdown_generation_executor()
+        self._close_journal()
+        self.metrics.flush()
+        self.events.close()
+        self.writer.flush()
+        
         # Save final hypergraph to compatible path
         with open(self.output_file, "w", encoding='utf-8') as f:
             for edge in self.hyperedges:
@@ -1358,7 +2533,7 @@ class ProtectedMASHypergraphGenerator:
             'final_hypergraph_size': len(self.hyperedges),
             'target_size': self.total_groups,
             'completion_percentage': (len(self.hyperedges) / self.total_groups) * 100,
-            'final_network_stats': self.agents['optimizer']._calculate_network_stats(self.hyperedges, self.personas)
+            'final_network_stats': self.network_stats.stats()
         }
         
         summary_path = os.path.join(self.protected_run_dir, "run_summary.json")
@@ -1381,6 +2556,8 @@ class ProtectedMASHypergraphGenerator:
         else:
             print("📝 Starting new run")
             self.start_iteration = 0
+        self._open_journal()
+        self._attach_metrics()
         
         print(f"📊 Loaded {len(self.personas)} individuals")
         print(f"📁 Configuration file: {self.config_hypergraph_file}")
@@ -1401,6 +2578,11 @@ class ProtectedMASHypergraphGenerator:
         
         try:
             # ==================== Phase 1: Building Phase ====================
+            if self.shards > 1 and self.start_iteration == 0 and not self.hyperedges:
+                # Shards build in parallel worker processes, merged as iteration 0
+                self._run_sharded_building(0)
+                self.start_iteration = 1
+            
             for iteration in range(self.start_iteration, self.num_iterations):
                 # Check if building phase complete
                 if self.current_edge_index >= len(self.edge_size_sequence):
@@ -1427,13 +2609,13 @@ class ProtectedMASHypergraphGenerator:
                 # Run building phase iteration
                 iteration_result = self.run_iteration(iteration)
                 progress = (self.current_edge_index / len(self.edge_size_sequence)) * 100
-                print(f"   [{iteration_result['phase']}] Iteration {iteration + 1}: {iteration_result['hyperedges_before']} → {iteration_result['hyperedges_after']} hyperedges (progress: {progress:.1f}%)")
+                logger.info(f"   [{iteration_result['phase']}] Iteration {iteration + 1}: {iteration_result['hyperedges_before']} → {iteration_result['hyperedges_after']} hyperedges (progress: {progress:.1f}%){self._scheduler_status()}")
             
             # ==================== Phase 2: Evolution Phase ====================
             evolution_start_iteration = iteration + 1
             for evolution_iteration in range(evolution_start_iteration, self.num_iterations):
                 iteration_result = self.run_iteration(evolution_iteration)
-                print(f"   [{iteration_result['phase']}] Iteration {evolution_iteration + 1}: {iteration_result['hyperedges_before']} → {iteration_result['hyperedges_after']} hyperedges")
+                logger.info(f"   [{iteration_result['phase']}] Iteration {evolution_iteration + 1}: {iteration_result['hyperedges_before']} → {iteration_result['hyperedges_after']} hyperedges{self._scheduler_status()}")
             
             # Save final results
             self.save_final_results()
@@ -1466,6 +2648,16 @@ class ProtectedMASHypergraphGenerator:
         print("🛡️ Protection mechanism activated, saving current state...")
         
         try:
+            # Drain queued snapshot/journal writes so every committed iteration is on disk
+            self._shutdown_generation_executor()
+            self._close_journal()
+            self.metrics.flush()
+            self.events.close()
+            pending = self.writer.pending()
+            self.writer.flush()
+            print(f"💾 Flushed {pending} pending background writes")
+            
+
             # Save final state
             if self.hyperedges:
                 interrupted_path = os.path.join(self.protected_run_dir, "interrupted_hypergraph.txt")
@@ -1524,6 +2716,28 @@ class ProtectedMASHypergraphGenerator:
             print("⚠️ Distribution doesn't completely match, may need to adjust parameters or increase iterations")
 
 
+def _building_shard(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Building phase of one persona shard (runs in a spawned worker process, output goes to its shard.log)"""
+    os.makedirs(options['output_path'], exist_ok=True)
+    log_path = os.path.join(options['output_path'], "shard.log")
+    with open(log_path, "w", encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        configure_logging(options['log_level'], stream=log)
+        random.seed(options['seed'])
+        generator = ProtectedMASHypergraphGenerator(options['personas_file'], options['config_hypergraph_file'],
+                                                    options['output_path'], **options['generator'])
+        generator.restrict_to_shard(options['person_ids'], options['edge_sizes'])
+        if options['backend_options'] is not None:
+            configure_backend_from_args(argparse.Namespace(**options['backend_options']), id_space=options['person_ids'])
+        generator.run_building_phase()
+    return {
+        'shard': options['shard'],
+        'hyperedges': list(generator.hyperedges),
+        'committed': generator.current_edge_index,
+        'run_dir': generator.protected_run_dir,
+        'log': log_path
+    }
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Protected configuration-driven multi-agent system hypergraph generator")
     parser.add_argument("--personas", type=str, required=True, help="Individual data JSON file path")
@@ -1535,8 +2749,43 @@ if __name__ == "__main__":
     parser.add_argument("--model", type=str, choices=['gpt-3.5-turbo', 'claude-3-sonnet', 'gpt-4', 'gpt-4.1-nano'],
                         default="gpt-4", help="Select LLM model to use")
     parser.add_argument("--resume", type=str, default=None, help="Resume from checkpoint in specified directory (provide run directory path)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of generator requests kept in flight during the building phase")
+    parser.add_argument("--near_duplicate_threshold", type=float, default=None,
+                        help="Also reject hyperedges whose Jaccard similarity with an existing one reaches this value (MinHash-LSH)")
+    parser.add_argument("--snapshot_interval", type=int, default=10,
+                        help="Iterations between compacted checkpoint snapshots (iterations in between are journaled)")
+    parser.add_argument("--fsync_policy", type=str, choices=list(FSYNC_POLICIES), default='commit',
+                        help="fsync every background write, only journal commits and base snapshots, or never")
+    parser.add_argument("--max_pending_writes", type=int, default=32,
+                        help="Capacity of the background persistence queue (generation waits while it is full)")
+    parser.add_argument("--generation_batch_size", type=int, default=1,
+                        help="Hyperedges proposed per building phase generator request (JSON output, failed items are re-queued)")
+    parser.add_argument("--review_batch_size", type=int, default=1,
+                        help="Evolution phase candidate hyperedges reviewed per lenient review request")
+    parser.add_argument("--speculative_candidates", type=int, default=1,
+                        help="Parallel generator requests per building slot; the first answer passing validation wins")
+    parser.add_argument("--hedge_percentile", type=float, default=None,
+                        help="Send a duplicate generator request when one runs longer than this latency percentile (e.g. 95)")
+    parser.add_argument("--hedge_min_samples", type=int, default=20,
+                        help="Observed generator latencies required before --hedge_percentile starts hedging")
+    parser.add_argument("--log_level", type=str, choices=list(LOG_LEVELS), default='info',
+                        help="Console verbosity; 'debug' prints one line per added/rejected/removed hyperedge")
+    parser.add_argument("--progress_interval", type=float, default=2.0,
+                        help="Minimum seconds between building phase progress lines")
+    parser.add_argument("--events", type=str, default=None,
+                        help="JSONL file receiving edge_added/edge_removed/phase_changed/iteration_done events")
+    parser.add_argument("--events_fd", type=int, default=None,
+                        help="Write the event stream to this inherited file descriptor instead of a file")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Split the personas into this many shards whose building phases run in parallel processes")
+    parser.add_argument("--shard_by", type=str, default='random',
+                        help="'random' partition, or comma-separated attributes whose strata stay within one shard (e.g. 'race/ethnicity,religion')")
+    parser.add_argument("--bridge_fraction", type=float, default=0.05,
+                        help="Share of the target hyperedges generated across shards after the shards are merged")
+    add_backend_arguments(parser)
 
     args = parser.parse_args()
+    configure_logging(args.log_level)
 
     generator = ProtectedMASHypergraphGenerator(
         personas_file=args.personas,
@@ -1545,8 +2794,26 @@ if __name__ == "__main__":
         groups_per_iteration=args.groups_per_iter,
         max_members_per_group=args.max_members,
         iterations=args.iterations,
-        model=args.model
+        model=args.model,
+        concurrency=args.concurrency,
+        near_duplicate_threshold=args.near_duplicate_threshold,
+        snapshot_interval=args.snapshot_interval,
+        fsync_policy=args.fsync_policy,
+        max_pending_writes=args.max_pending_writes,
+        generation_batch_size=args.generation_batch_size,
+        review_batch_size=args.review_batch_size,
+        events_path=args.events,
+        events_fd=args.events_fd,
+        progress_interval=args.progress_interval,
+        speculative_candidates=args.speculative_candidates,
+        hedge_percentile=args.hedge_percentile,
+        hedge_min_samples=args.hedge_min_samples,
+        shards=args.shards,
+        shard_by=args.shard_by,
+        bridge_fraction=args.bridge_fraction,
+        backend_options=backend_options(args)
     )
+    configure_backend_from_args(args, id_space=list(generator.personas.keys()))
 
     generator.run(resume_from_dir=args.resume)
  
\ No newline at end of file
@@ -0,0 +1,472 @@
+"""
+Incrementally maintained indexes over the hyperedges of a generator run.
+
+Every index exposes add(edge) / remove(edge) and is kept in sync by
+ProtectedMASHypergraphGenerator._add_hyperedge / _remove_hyperedge, so
+no caller has to rescan the full hyperedge list per attempt.
+"""
+import random
+import threading
+import zlib
+from typing import Dict, List, Iterable
+
+from persona_store import PersonaStore
+
+
+class DegreeIndex:
+    """
+    Node degree index with O(log n) preferential-attachment sampling.
+
+    Sampling weights follow the building phase rule: a connected node (degree >= 1)
+    has weight degree + 1, unconnected nodes have weight 0. Weights are stored in a
+    Fenwick tree so a degree update and a weighted draw are both O(log n).
+    """
+
+    def __init__(self, hyperedges: Iterable[List[str]] = ()):
+        self.degrees = {}      # node -> degree (read-only for callers)
+        self._slots = {}       # node -> position in Fenwick tree
+        self._nodes = []       # position -> node
+        self._weights = []     # position -> current sampling weight
+        self._tree = [0]       # 1-based Fenwick tree over _weights
+        self.total_weight = 0
+        for edge in hyperedges:
+            self.add(edge)
+
+    def __len__(self) -> int:
+        """Number of connected nodes (degree >= 1)"""
+        return len(self.degrees)
+
+    def degree(self, node: str) -> int:
+        return self.degrees.get(node, 0)
+
+    def add(self, edge: List[str]):
+        for node in edge:
+            self._update(node, 1)
+
+    def remove(self, edge: List[str]):
+        for node in edge:
+            self._update(node, -1)
+
+    def adjust(self, node: str, delta: int):
+        """Change a degree by delta (e.g. degree changes received from another process)"""
+        self._update(node, delta)
+
+    def sample(self, rng: random.Random = None) -> str:
+        """Draw a connected node with probability proportional to degree + 1"""
+        if self.total_weight <= 0:
+            raise ValueError("Cannot sample from an empty degree index")
+        target = (rng or random).random() * self.total_weight
+
+        # Fenwick tree descent: find first position whose prefix sum exceeds target
+        position = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_position = position + step
+            if next_position < len(self._tree) and self._tree[next_position] <= target:
+                position = next_position
+                target -= self._tree[next_position]
+            step >>= 1
+        return self._nodes[min(position, len(self._nodes) - 1)]
+
+    def _update(self, node: str, delta: int):
+        degree = self.degrees.get(node, 0) + delta
+        if degree < 0:
+            raise ValueError(f"Degree of node {node} would become negative")
+        if degree == 0:
+            self.degrees.pop(node, None)
+        else:
+            self.degrees[node] = degree
+
+        if node not in self._slots:
+            self._append_slot(node)
+        position = self._slots[node]
+        weight = degree + 1 if degree > 0 else 0
+        weight_delta = weight - self._weights[position]
+        if weight_delta:
+            self._weights[position] = weight
+            self.total_weight += weight_delta
+            i = position + 1
+            while i < len(self._tree):
+                self._tree[i] += weight_delta
+                i += i & -i
+
+    def _append_slot(self, node: str):
+        """Append a zero-weight position; its tree cell covers (i - lowbit(i), i]"""
+        self._slots[node] = len(self._nodes)
+        self._nodes.append(node)
+        self._weights.append(0)
+        i = len(self._tree)
+        self._tree.append(self._prefix_sum(i - 1) - self._prefix_sum(i - (i & -i)))
+
+    def _prefix_sum(self, i: int) -> int:
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class EdgeDedupIndex:
+    """
+    Duplicate detection for hyperedges in O(k) per query, independent of edge count.
+
+    Exact duplicates are found through a multiset of canonical frozenset keys.
+    If near_duplicate_threshold is set, a MinHash-LSH index additionally reports
+    edges whose Jaccard similarity with the candidate reaches the threshold.
+    """
+
+    _MERSENNE_PRIME = (1 << 61) - 1
+
+    def __init__(self, near_duplicate_threshold: float = None, num_perm: int = 64, seed: int = 1):
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self._exact = {}   # frozenset -> multiplicity
+        if near_duplicate_threshold is None:
+            return
+        if not 0 < near_duplicate_threshold <= 1:
+            raise ValueError("near_duplicate_threshold must be in (0, 1]")
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, self._MERSENNE_PRIME), rng.randrange(0, self._MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._bands, self._rows = self._choose_bands(near_duplicate_threshold, num_perm)
+        self._buckets = [{} for _ in range(self._bands)]   # band -> band signature -> set of frozensets
+
+    @staticmethod
+    def canonical_key(edge: List[str]) -> frozenset:
+        return frozenset(edge)
+
+    def __contains__(self, edge: List[str]) -> bool:
+        return self.canonical_key(edge) in self._exact
+
+    def add(self, edge: List[str]):
+        key = self.canonical_key(edge)
+        self._exact[key] = self._exact.get(key, 0) + 1
+        if self.near_duplicate_threshold is not None and self._exact[key] == 1:
+            for band, band_key in enumerate(self._band_keys(key)):
+                self._buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, edge: List[str]):
+        key = self.canonical_key(edge)
+        count = self._exact.get(key, 0)
+        if count == 0:
+            return
+        if count > 1:
+            self._exact[key] = count - 1
+            return
+        del self._exact[key]
+        if self.near_duplicate_threshold is not None:
+            for band, band_key in enumerate(self._band_keys(key)):
+                bucket = self._buckets[band].get(band_key)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._buckets[band][band_key]
+
+    def find_near_duplicate(self, edge: List[str]):
+        """Return an indexed edge (as frozenset) with Jaccard similarity >= threshold, or None"""
+        key = self.canonical_key(edge)
+        if key in self._exact:
+            return key
+        if self.near_duplicate_threshold is None or not key:
+            return None
+        for band, band_key in enumerate(self._band_keys(key)):
+            for other in self._buckets[band].get(band_key, ()):
+                # LSH only proposes candidates, verify true Jaccard similarity
+                if len(key & other) / len(key | other) >= self.near_duplicate_threshold:
+                    return other
+        return None
+
+    def is_duplicate(self, edge: List[str]) -> bool:
+        return self.find_near_duplicate(edge) is not None
+
+    def _band_keys(self, key: frozenset) -> List[tuple]:
+        hashes = [zlib.crc32(str(node).encode('utf-8')) for node in key]
+        signature = [min((a * h + b) % self._MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+        return [tuple(signature[band * self._rows:(band + 1) * self._rows]) for band in range(self._bands)]
+
+    @staticmethod
+    def _choose_bands(threshold: float, num_perm: int):
+        """Pick (bands, rows) whose S-curve inflection (1/b)^(1/r) is closest to threshold"""
+        best = None
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            error = abs((1 / bands) ** (1 / rows) - threshold)
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+        return best[1], best[2]
+
+
+class RankedSet:
+    """
+    Subset of the ranks 0..size-1 with O(log n) add/discard and the k smallest
+    members in O(k log n), using a Fenwick tree of membership counts.
+    """
+
+    def __init__(self, size: int):
+        self._present = bytearray(size)
+        self._tree = [0] * (size + 1)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, rank: int) -> bool:
+        return bool(self._present[rank])
+
+    def add(self, rank: int):
+        if not self._present[rank]:
+            self._present[rank] = 1
+            self._count += 1
+            self._update(rank, 1)
+
+    def discard(self, rank: int):
+        if self._present[rank]:
+            self._present[rank] = 0
+            self._count -= 1
+            self._update(rank, -1)
+
+    def smallest(self, k: int) -> List[int]:
+        return [self._kth(j) for j in range(1, min(k, self._count) + 1)]
+
+    def _update(self, rank: int, delta: int):
+        i = rank + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _kth(self, k: int) -> int:
+        """Rank of the k-th smallest member (1-based k)"""
+        position = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_position = position + step
+            if next_position < len(self._tree) and self._tree[next_position] < k:
+                position = next_position
+                k -= self._tree[next_position]
+            step >>= 1
+        return position
+
+
+class DegreeBuckets:
+    """
+    Connected nodes split into degree 1 ('medium') and degree >= 2 ('high'), each in the
+    order of the persona collection, so the preferential-attachment candidate list reads
+    its totals and first entries without scanning all personas.
+
+    Must be updated after the DegreeIndex it reads degrees from. Agents read it from
+    worker threads while edges are committed, so reads and updates take a lock.
+    """
+
+    def __init__(self, degree_index: DegreeIndex, order: Iterable[str]):
+        self.degree_index = degree_index
+        self._nodes = list(order)
+        self._ranks = {node: rank for rank, node in enumerate(self._nodes)}
+        self.buckets = {'medium': RankedSet(len(self._nodes)), 'high': RankedSet(len(self._nodes))}
+        self._lock = threading.Lock()
+        for node, degree in degree_index.degrees.items():
+            self._place(node, degree)
+
+    def add(self, edge: List[str]):
+        with self._lock:
+            for node in edge:
+                self._place(node, self.degree_index.degree(node))
+
+    def remove(self, edge: List[str]):
+        with self._lock:
+            for node in edge:
+                self._place(node, self.degree_index.degree(node))
+
+    def count(self, bucket: str, exclude: str = None) -> int:
+        rank = self._ranks.get(exclude)
+        with self._lock:
+            members = self.buckets[bucket]
+            return len(members) - (rank is not None and rank in members)
+
+    def first(self, bucket: str, k: int, exclude: str = None) -> List[str]:
+        """The first k nodes of a bucket in persona order, without exclude"""
+        with self._lock:
+            ranks = self.buckets[bucket].smallest(k + 1)
+        return [node for node in (self._nodes[rank] for rank in ranks) if node != exclude][:k]
+
+    def _place(self, node: str, degree: int):
+        rank = self._ranks.get(node)
+        if rank is None:
+            return
+        if degree >= 2:
+            self.buckets['medium'].discard(rank)
+            self.buckets['high'].add(rank)
+        elif degree == 1:
+            self.buckets['high'].discard(rank)
+            self.buckets['medium'].add(rank)
+        else:
+            self.buckets['high'].discard(rank)
+            self.buckets['medium'].discard(rank)
+
+
+class AttributeCounter:
+    """
+    Frequency of persona attribute values over all hyperedge memberships, plus the
+    personas grouped by their combination of these attributes (precomputed once).
+    Lets background-based selection find the most common values in O(values) and pick
+    from the best-matching personas without scoring every persona.
+    """
+
+    def __init__(self, personas: Dict[str, Dict], attributes: Iterable[str], hyperedges: Iterable[List[str]] = ()):
+        self.personas = personas
+        self.attributes = tuple(attributes)
+        self.counts = {attribute: {} for attribute in self.attributes}
+        self.groups: Dict[tuple, List[str]] = {}   # attribute values -> persona IDs in persona order
+        if isinstance(personas, PersonaStore):
+            self.groups = personas.groups(self.attributes)
+        else:
+            for person_id, person in personas.items():
+                self.groups.setdefault(tuple(person.get(a) for a in self.attributes), []).append(person_id)
+        for edge in hyperedges:
+            self.add(edge)
+
+    def add(self, edge: List[str]):
+        self._update(edge, 1)
+
+    def remove(self, edge: List[str]):
+        self._update(edge, -1)
+
+    def most_common(self, attribute: str):
+        counts = self.counts[attribute]
+        return max(counts, key=counts.get) if counts else None
+
+    def _update(self, edge: List[str], delta: int):
+        for node in edge:
+            person = self.personas.get(node)
+            if person is None:
+                continue
+            for attribute in self.attributes:
+                counts = self.counts[attribute]
+                value = person.get(attribute)
+                count = counts.get(value, 0) + delta
+                if count > 0:
+                    counts[value] = count
+                else:
+                    counts.pop(value, None)
+
+
+class NetworkStats:
+    """
+    Network statistics of the optimizer prompt and the snapshots, maintained per edge change.
+
+    Edge count, node count, total membership and the attribute distribution of the
+    connected nodes are updated in O(k) per edge. Connected components come from a
+    union-find that is exact under additions; a removal may split a component, so after
+    removals the union-find is rebuilt from the edge source on the next stats() call
+    (at most once per batch of removals instead of once per call).
+    """
+
+    def __init__(self, personas: Dict[str, Dict], attributes: Iterable[str], edges: Iterable[List[str]] = ()):
+        """
+        :param personas: Persona attributes by node
+        :param attributes: Attributes whose distribution over connected nodes is tracked
+        :param edges: Current edges, also the source of rebuilds after removals
+        """
+        self.personas = personas
+        self.attributes = tuple(attributes)
+        self.edges = edges
+        self.total_edges = 0
+        self.total_size = 0
+        self.degrees: Dict[str, int] = {}
+        self.distributions = {attribute: {} for attribute in self.attributes}
+        self._parent: Dict[str, str] = {}
+        self._size: Dict[str, int] = {}   # root -> component size
+        self._stale = False
+        for edge in edges:
+            self.add(edge)
+
+    def add(self, edge: List[str]):
+        self.total_edges += 1
+        self.total_size += len(edge)
+        for node in edge:
+            degree = self.degrees.get(node, 0) + 1
+            self.degrees[node] = degree
+            if degree == 1:
+                self._count_attributes(node, 1)
+        if not self._stale:
+            self._union_edge(edge)
+
+    def remove(self, edge: List[str]):
+        self.total_edges -= 1
+        self.total_size -= len(edge)
+        for node in edge:
+            degree = self.degrees.get(node, 0) - 1
+            if degree > 0:
+                self.degrees[node] = degree
+            elif node in self.degrees:
+                del self.degrees[node]
+                self._count_attributes(node, -1)
+        self._stale = True
+
+    def components(self) -> List[int]:
+        """Sizes of the connected components, largest first"""
+        if self._stale:
+            self._rebuild_components()
+        return sorted(self._size.values(), reverse=True)
+
+    def stats(self) -> Dict:
+        """Statistics in the format of NetworkOptimizerAgent._calculate_network_stats"""
+        total_nodes = len(self.degrees)
+        components = self.components() if self.total_edges else []
+        return {
+            'total_edges': self.total_edges,
+            'total_nodes': total_nodes,
+            'avg_edge_size': self.total_size / self.total_edges if self.total_edges else 0,
+            'network_density': self.total_edges / (total_nodes * (total_nodes - 1) / 2) if total_nodes > 1 else 0,
+            'largest_component_size': components[0] if components else 0,
+            'connected_components': len(components),
+            'gender_diversity': dict(self.distributions.get('gender', {})),
+            'race_diversity': dict(self.distributions.get('race/ethnicity', {})),
+            'religion_diversity': dict(self.distributions.get('religion', {}))
+        }
+
+    def _count_attributes(self, node: str, delta: int):
+        person = self.personas.get(node)
+        if person is None:
+            return
+        for attribute in self.attributes:
+            counts = self.distributions[attribute]
+            value = person.get(attribute)
+            count = counts.get(value, 0) + delta
+            if count > 0:
+                counts[value] = count
+            else:
+                counts.pop(value, None)
+
+    def _rebuild_components(self):
+        self._parent, self._size = {}, {}
+        for edge in self.edges:
+            self._union_edge(edge)
+        self._stale = False
+
+    def _union_edge(self, edge: List[str]):
+        if not edge:
+            return
+        root = self._find(edge[0])
+        for node in edge[1:]:
+            other = self._find(node)
+            if other != root:
+                # Union by size: attach the smaller component
+                if self._size[root] < self._size[other]:
+                    root, other = other, root
+                self._parent[other] = root
+                self._size[root] += self._size.pop(other)
+
+    def _find(self, node: str) -> str:
+        parent = self._parent.get(node)
+        if parent is None:
+            self._parent[node] = node
+            self._size[node] = 1
+            return node
+        while parent != node:
+            # Path halving
+            grandparent = self._parent[parent]
+            self._parent[node] = grandparent
+            node, parent = grandparent, self._parent[grandparent]
+        return node
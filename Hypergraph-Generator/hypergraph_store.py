@@ -0,0 +1,245 @@
+"""
+Compact integer-indexed hyperedge store with stable edge IDs.
+
+Node names are interned to integer IDs; edges live in CSR-style arrays (offsets into
+one flat members array). Every edge gets a stable ID on insertion that never changes
+or gets reused, so removals neither shift other edges nor invalidate IDs an agent
+reasoned about. Removal tombstones the slot in O(1); once tombstones exceed a share
+of all slots the arrays are compacted (IDs are kept).
+
+The store is also a read-only Sequence of the live edges (as lists of node names)
+in insertion order, so len(), iteration, slicing and random.sample() keep working
+for code written against List[List[str]]. Positional access goes through a Fenwick
+tree over the alive flags (O(log E)).
+"""
+import random
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class HyperedgeStore(Sequence):
+    """Live hyperedges with O(1) add/remove by stable edge ID"""
+
+    def __init__(self, edges: Iterable[List[str]] = (), compact_ratio: float = 0.25):
+        self.compact_ratio = compact_ratio
+        self._node_ids: Dict[str, int] = {}
+        self._node_names: List[str] = []
+        self._offsets = array('q', [0])   # slot -> start in _members, plus end sentinel
+        self._members = array('i')        # interned node IDs, edge after edge
+        self._slot_ids = array('q')       # slot -> edge ID
+        self._alive = bytearray()         # slot -> 1 if live, 0 if tombstone
+        self._slot_of: Dict[int, int] = {}
+        self._tree = [0]                  # 1-based Fenwick tree over _alive
+        self._next_id = 0
+        self._live = 0
+        for edge in edges:
+            self.add(edge)
+
+    # ---- Sequence view -------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for slot in range(len(self._alive)):
+            if self._alive[slot]:
+                yield self._edge_at(slot)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._live))]
+        if position < 0:
+            position += self._live
+        if not 0 <= position < self._live:
+            raise IndexError("hyperedge position out of range")
+        return self._edge_at(self._select(position))
+
+    def __repr__(self) -> str:
+        return f"HyperedgeStore({self._live} edges, {len(self._node_names)} nodes)"
+
+    # ---- Edge ID API ---------------------------------------------------------
+
+    def add(self, edge: List[str]) -> int:
+        """Append an edge, return its stable ID"""
+        for node in edge:
+            node_id = self._node_ids.get(node)
+            if node_id is None:
+                node_id = len(self._node_names)
+                self._node_ids[node] = node_id
+                self._node_names.append(node)
+            self._members.append(node_id)
+        self._offsets.append(len(self._members))
+
+        edge_id = self._next_id
+        self._next_id += 1
+        slot = len(self._alive)
+        self._slot_ids.append(edge_id)
+        self._alive.append(1)
+        self._slot_of[edge_id] = slot
+        self._live += 1
+
+        # New Fenwick cell covers slots (i - lowbit(i), i], all of them already in _alive
+        i = slot + 1
+        self._tree.append(self._prefix_count(i - 1) - self._prefix_count(i - (i & -i)) + 1)
+        return edge_id
+
+    def remove(self, edge_id: int) -> List[str]:
+        """Tombstone an edge by ID and return it"""
+        slot = self._slot_of.pop(edge_id, None)
+        if slot is None:
+            raise KeyError(f"No live hyperedge with ID {edge_id}")
+        edge = self._edge_at(slot)
+        self._alive[slot] = 0
+        self._live -= 1
+        i = slot + 1
+        while i < len(self._tree):
+            self._tree[i] -= 1
+            i += i & -i
+
+        dead = len(self._alive) - self._live
+        if dead > 64 and dead > self.compact_ratio * len(self._alive):
+            self.compact()
+        return edge
+
+    def has_edge(self, edge_id: int) -> bool:
+        return edge_id in self._slot_of
+
+    def get(self, edge_id: int) -> List[str]:
+        return self._edge_at(self._slot_of[edge_id])
+
+    def edge_size(self, edge_id: int) -> int:
+        slot = self._slot_of[edge_id]
+        return self._offsets[slot + 1] - self._offsets[slot]
+
+    def items(self) -> Iterator[Tuple[int, List[str]]]:
+        """(edge ID, edge) of all live edges in insertion order"""
+        for slot in range(len(self._alive)):
+            if self._alive[slot]:
+                yield self._slot_ids[slot], self._edge_at(slot)
+
+    def edge_ids(self) -> List[int]:
+        return [self._slot_ids[slot] for slot in range(len(self._alive)) if self._alive[slot]]
+
+    def recent_items(self, n: int) -> List[Tuple[int, List[str]]]:
+        """Last n live (edge ID, edge) pairs, oldest first"""
+        result = []
+        slot = len(self._alive) - 1
+        while slot >= 0 and len(result) < n:
+            if self._alive[slot]:
+                result.append((self._slot_ids[slot], self._edge_at(slot)))
+            slot -= 1
+        result.reverse()
+        return result
+
+    def sample(self, k: int, rng: random.Random = None) -> List[List[str]]:
+        """k distinct live edges chosen uniformly at random"""
+        positions = (rng or random).sample(range(self._live), min(k, self._live))
+        return [self[p] for p in positions]
+
+    # ---- Interned node IDs ---------------------------------------------------
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of distinct nodes ever interned"""
+        return len(self._node_names)
+
+    def node_id(self, node: str) -> int:
+        return self._node_ids[node]
+
+    def node_name(self, node_id: int) -> str:
+        return self._node_names[node_id]
+
+    def member_ids(self, edge_id: int) -> array:
+        """Interned node IDs of an edge (no string materialization)"""
+        slot = self._slot_of[edge_id]
+        return self._members[self._offsets[slot]:self._offsets[slot + 1]]
+
+    # ---- Compaction and persistence -----------------------------------------
+
+    def compact(self):
+        """Drop tombstoned slots from the arrays; edge IDs and order are preserved"""
+        offsets = array('q', [0])
+        members = array('i')
+        slot_ids = array('q')
+        for slot in range(len(self._alive)):
+            if self._alive[slot]:
+                members.extend(self._members[self._offsets[slot]:self._offsets[slot + 1]])
+                offsets.append(len(members))
+                slot_ids.append(self._slot_ids[slot])
+        self._offsets, self._members, self._slot_ids = offsets, members, slot_ids
+        self._alive = bytearray(b'\x01' * len(slot_ids))
+        self._slot_of = {edge_id: slot for slot, edge_id in enumerate(slot_ids)}
+        self._rebuild_tree()
+
+    def to_state(self) -> Dict:
+        """Compact picklable state (copies, safe to serialize while the store keeps changing)"""
+        live = [slot for slot in range(len(self._alive)) if self._alive[slot]]
+        offsets = array('q', [0])
+        members = array('i')
+        for slot in live:
+            members.extend(self._members[self._offsets[slot]:self._offsets[slot + 1]])
+            offsets.append(len(members))
+        return {
+            'node_names': list(self._node_names),
+            'offsets': offsets,
+            'members': members,
+            'edge_ids': array('q', (self._slot_ids[slot] for slot in live)),
+            'next_id': self._next_id
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, compact_ratio: float = 0.25) -> 'HyperedgeStore':
+        store = cls(compact_ratio=compact_ratio)
+        store._node_names = list(state['node_names'])
+        store._node_ids = {name: i for i, name in enumerate(store._node_names)}
+        store._offsets = array('q', state['offsets'])
+        store._members = array('i', state['members'])
+        store._slot_ids = array('q', state['edge_ids'])
+        store._alive = bytearray(b'\x01' * len(store._slot_ids))
+        store._slot_of = {edge_id: slot for slot, edge_id in enumerate(store._slot_ids)}
+        store._next_id = state['next_id']
+        store._live = len(store._slot_ids)
+        store._rebuild_tree()
+        return store
+
+    @staticmethod
+    def state_edges(state: Dict) -> List[List[str]]:
+        """Materialize the edges of a to_state() dict as lists of node names"""
+        names, offsets, members = state['node_names'], state['offsets'], state['members']
+        return [[names[m] for m in members[offsets[i]:offsets[i + 1]]] for i in range(len(offsets) - 1)]
+
+    # ---- Internals -----------------------------------------------------------
+
+    def _edge_at(self, slot: int) -> List[str]:
+        names = self._node_names
+        return [names[m] for m in self._members[self._offsets[slot]:self._offsets[slot + 1]]]
+
+    def _rebuild_tree(self):
+        """Linear-time Fenwick construction from _alive"""
+        tree = [0] + list(self._alive)
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _prefix_count(self, i: int) -> int:
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _select(self, position: int) -> int:
+        """Slot of the live edge at 0-based position"""
+        slot = 0
+        remaining = position + 1
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_slot = slot + step
+            if next_slot < len(self._tree) and self._tree[next_slot] < remaining:
+                slot = next_slot
+                remaining -= self._tree[next_slot]
+            step >>= 1
+        return slot
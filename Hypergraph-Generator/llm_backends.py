@@ -0,0 +1,611 @@
+"""
+LLM backend layer shared by the hypergraph generators, agents and the entity generator.
+
+A backend turns a chat request (model, messages, max_tokens, temperature) into an
+LLMResponse. Agents never talk to an SDK client directly; they call
+get_backend().complete(...) (or acomplete in async code), so connection pooling,
+batching and caching only have to be added here.
+
+Agents may pass stream_cutoff=StreamCutoff(...) with a request: when streaming is enabled
+(--stream) the OpenAI backend reads the completion as a stream and closes it as soon as the
+cutoff sees everything the agent parses (a full ID line, a decisive APPROVE/REJECT token),
+so the rest of the answer is neither decoded nor billed. Other backends ignore it.
+
+Backends:
+- OpenAIBackend: any OpenAI-compatible HTTP endpoint
+- StubBackend: deterministic offline answers shaped like each agent's expected output
+- RecordReplayBackend: records responses of an inner backend to JSONL, or replays them
+- LazyBackend: defers creating another backend (and resolving credentials) to the first request
+- CachingBackend (llm_cache.py): persistent SQLite response cache shared across runs and processes
+
+Importing this module, or a generator built on it, performs no I/O: the openai package,
+the API key and the base URL are only touched when the first LLM request is made.
+"""
+import argparse
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from typing import List, Dict, Any, Optional, Callable, Iterable
+
+
+class LLMBackendError(Exception):
+    """Raised by non-HTTP backends when a request cannot be answered"""
+
+
+class LLMResponse:
+    """Completion text plus token accounting of a single chat request"""
+
+    def __init__(self, content: str, model: str = None, prompt_tokens: int = 0,
+                 completion_tokens: int = 0, cached_tokens: int = 0):
+        self.content = content
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cached_tokens = cached_tokens
+        # Time spent waiting for admission and backoff in a request scheduler (not persisted)
+        self.queue_seconds = 0.0
+        # The stream was closed early by a StreamCutoff (not persisted)
+        self.cut_off = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'content': self.content,
+            'model': self.model,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cached_tokens': self.cached_tokens
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LLMResponse':
+        return cls(data['content'], data.get('model'), data.get('prompt_tokens', 0),
+                   data.get('completion_tokens', 0), data.get('cached_tokens', 0))
+
+
+def request_key(model: str, messages: List[Dict[str, str]], max_tokens: int = None,
+                temperature: float = None, **extra) -> str:
+    """Content address of a chat request (stable across processes and runs)"""
+    # A cutoff only drops text after the part that is parsed, so it does not change the address
+    extra.pop('stream_cutoff', None)
+    payload = {
+        'model': model,
+        'messages': messages,
+        'max_tokens': max_tokens,
+        'temperature': temperature,
+        'extra': extra
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class StreamCutoff:
+    """
+    Early stop of a streamed completion: check(text) gets the text received so far and
+    returns True once everything the agent will parse has arrived.
+    """
+
+    def __init__(self, name: str, check: Callable[[str], bool]):
+        self.name = name
+        self.check = check
+
+    def __call__(self, text: str) -> bool:
+        return self.check(text)
+
+
+def id_line_cutoff(valid_ids, count: int, exclude: Iterable[str] = ()) -> StreamCutoff:
+    """
+    Stop after the first complete line that consists only of at least count valid IDs
+    (not in exclude). Lines starting with "Step" or "**" are reasoning, as in the agent parsers.
+    """
+    excluded = set(exclude)
+
+    def check(text: str) -> bool:
+        for line in text.split('\n')[:-1]:
+            line = line.strip()
+            if not line or line.startswith('Step') or line.startswith('**'):
+                continue
+            ids = line.split()
+            if len(ids) >= count and all(pid in valid_ids and pid not in excluded for pid in ids):
+                return True
+        return False
+
+    return StreamCutoff('id_line', check)
+
+
+def token_cutoff(tokens: Iterable[str], ignore_case: bool = False, whole_word: bool = False) -> StreamCutoff:
+    """Stop as soon as one of the decisive tokens (e.g. APPROVE) appears, with whole_word only as a separate word"""
+    alternatives = "|".join(re.escape(token) for token in tokens)
+    if whole_word:
+        alternatives = rf"\b(?:{alternatives})\b"
+    pattern = re.compile(alternatives, re.IGNORECASE if ignore_case else 0)
+    return StreamCutoff('token', lambda text: pattern.search(text) is not None)
+
+
+class _StreamCollector:
+    """Accumulates the chunks of a streamed chat completion into an LLMResponse"""
+
+    def __init__(self, messages: List[Dict[str, str]], cutoff: StreamCutoff):
+        self.messages = messages
+        self.cutoff = cutoff
+        self.parts = []
+        self.chunks = 0
+        self.model = None
+        self.usage = None
+        self.cut_off = False
+
+    def add(self, chunk) -> bool:
+        """Returns True once the cutoff is reached and the stream should be closed"""
+        self.model = self.model or getattr(chunk, 'model', None)
+        if getattr(chunk, 'usage', None):
+            self.usage = chunk.usage
+        choices = getattr(chunk, 'choices', None)
+        content = choices[0].delta.content if choices and choices[0].delta else None
+        if content:
+            self.parts.append(content)
+            self.chunks += 1
+            if self.cutoff("".join(self.parts)):
+                self.cut_off = True
+        return self.cut_off
+
+    def response(self) -> LLMResponse:
+        if self.usage is not None:
+            prompt_tokens, completion_tokens, cached_tokens = _usage_tokens(self.usage)
+        else:
+            # Usage is only sent at the end of a stream; estimate it when the stream was cut
+            prompt_tokens = sum(len(m.get('content') or '') for m in self.messages) // 4
+            completion_tokens, cached_tokens = self.chunks, 0
+        response = LLMResponse("".join(self.parts), self.model, prompt_tokens, completion_tokens, cached_tokens)
+        response.cut_off = self.cut_off
+        return response
+
+
+def _usage_tokens(usage):
+    """(prompt, completion, cached) token counts of an API usage object"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return (getattr(usage, 'prompt_tokens', 0) or 0,
+            getattr(usage, 'completion_tokens', 0) or 0,
+            getattr(details, 'cached_tokens', 0) or 0 if details else 0)
+
+
+class LLMBackend:
+    """Backend interface, subclasses implement complete()"""
+    name = 'base'
+
+    def complete(self, model: str, messages: List[Dict[str, str]], max_tokens: int = None,
+                 temperature: float = None, **kwargs) -> LLMResponse:
+        raise NotImplementedError
+
+    async def acomplete(self, model: str, messages: List[Dict[str, str]], max_tokens: int = None,
+                        temperature: float = None, **kwargs) -> LLMResponse:
+        """Async variant; by default runs the blocking call in the default thread pool"""
+        return await asyncio.to_thread(self.complete, model, messages, max_tokens, temperature, **kwargs)
+
+    def close(self):
+        pass
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    OpenAI-compatible HTTP backend. The openai package is imported and the pooled
+    sync client created on the first request; the async client on the first async request.
+    """
+    name = 'openai'
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = None, max_retries: int = None,
+                 stream: bool = False):
+        """
+        :param max_retries: SDK-level retries (None: SDK default; a RateLimitedBackend in front sets 0)
+        :param stream: Stream requests that carry a stream_cutoff and stop reading once it is reached
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.stream = stream
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import openai
+                    self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                                 timeout=self.timeout, **self._retry_options())
+        return self._client
+
+    def _retry_options(self) -> Dict[str, Any]:
+        return {} if self.max_retries is None else {'max_retries': self.max_retries}
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        cutoff = kwargs.pop('stream_cutoff', None)
+        if cutoff is not None and self.stream:
+            collector = _StreamCollector(messages, cutoff)
+            stream = self.client.chat.completions.create(
+                model=model, messages=messages, max_tokens=max_tokens, temperature=temperature,
+                stream=True, stream_options={'include_usage': True}, **kwargs
+            )
+            try:
+                for chunk in stream:
+                    if collector.add(chunk):
+                        break
+            finally:
+                stream.close()
+            return collector.response()
+
+        response = self.client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return self._to_response(response)
+
+    async def acomplete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        if self._async_client is None:
+            import openai
+            self._async_client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                                    timeout=self.timeout, **self._retry_options())
+        cutoff = kwargs.pop('stream_cutoff', None)
+        if cutoff is not None and self.stream:
+            collector = _StreamCollector(messages, cutoff)
+            stream = await self._async_client.chat.completions.create(
+                model=model, messages=messages, max_tokens=max_tokens, temperature=temperature,
+                stream=True, stream_options={'include_usage': True}, **kwargs
+            )
+            try:
+                async for chunk in stream:
+                    if collector.add(chunk):
+                        break
+            finally:
+                await stream.close()
+            return collector.response()
+
+        response = await self._async_client.chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        )
+        return self._to_response(response)
+
+    @staticmethod
+    def _to_response(response) -> LLMResponse:
+        usage = getattr(response, 'usage', None)
+        prompt_tokens, completion_tokens, cached_tokens = _usage_tokens(usage) if usage else (0, 0, 0)
+        return LLMResponse(
+            content=response.choices[0].message.content or "",
+            model=getattr(response, 'model', None),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens
+        )
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+OPTIMIZER_STRATEGIES = ["INCREASE_CONNECTIONS", "ENHANCE_DIVERSITY", "REDUCE_CLUSTERING", "MAINTAIN_CURRENT"]
+
+
+def detect_agent_type(messages: List[Dict[str, str]]) -> str:
+    """Classify a request by the agent prompt that produced it"""
+    system = " ".join(m['content'] for m in messages if m['role'] == 'system').lower()
+    user = " ".join(m['content'] for m in messages if m['role'] != 'system')
+    if 'remover agent' in system:
+        return 'remover'
+    if 'optimizer agent' in system:
+        return 'optimizer'
+    if 'review' in system:
+        return 'reviewer'
+    if 'Groups to Create' in user:
+        return 'batch_generator'
+    if re.search(r'Select \d+ collaborators', user):
+        return 'generator'
+    if 'hypergraph generator' in system:
+        return 'hypergraph'
+    if 'JSON' in user:
+        return 'entity'
+    return 'generic'
+
+
+def synthesize_response(messages: List[Dict[str, str]], rng: random.Random, id_space: List[str] = None) -> str:
+    """Produce a plausible answer in the output format each agent prompt asks for"""
+    user = "\n".join(m['content'] for m in messages if m['role'] != 'system')
+    agent_type = detect_agent_type(messages)
+
+    if agent_type == 'generator':
+        count = int(re.search(r'Select (\d+) collaborators', user).group(1))
+        own = re.search(r'Do not include own ID \((\w+)\)', user)
+        own_id = own.group(1) if own else None
+        return " ".join(_pick_collaborators(user, count, own_id, rng, id_space))
+
+    if agent_type == 'batch_generator':
+        items = re.findall(r'Item (\d+): ID (\w+) .*?select (\d+) collaborators', user)
+        return json.dumps([{'item': int(item), 'members': _pick_collaborators(user, int(count), own_id, rng, id_space)}
+                           for item, own_id, count in items])
+
+    if agent_type == 'reviewer':
+        if 'JSON array' in user:
+            count = len(re.findall(r'(?:Relationship|Candidate) \d+:', user))
+            return json.dumps(["APPROVE" if rng.random() < 0.85 else "REJECT" for _ in range(count)])
+        return "APPROVE" if rng.random() < 0.85 else "REJECT"
+
+    if agent_type == 'remover':
+        limit = re.search(r'Select at most (\d+) hyperedges', user)
+        listed = re.findall(r'Hyperedge(\d+):', user)
+        if not listed or rng.random() < 0.5:
+            return "NONE"
+        count = rng.randint(1, min(len(listed), int(limit.group(1)) if limit else 1))
+        return " ".join(sorted(rng.sample(listed, count), key=int))
+
+    if agent_type == 'optimizer':
+        return rng.choice(OPTIMIZER_STRATEGIES)
+
+    if agent_type == 'hypergraph':
+        nodes = re.search(r'exactly (\d+) nodes', user)
+        num_nodes = int(nodes.group(1)) if nodes else 20
+        lines = []
+        for _ in range(max(1, num_nodes // 2)):
+            size = min(num_nodes, rng.choice([2, 2, 3, 3, 4, 5]))
+            lines.append(" ".join(str(n) for n in sorted(rng.sample(range(1, num_nodes + 1), size))))
+        return "\n".join(lines)
+
+    if agent_type == 'entity':
+        keys = re.findall(r'(\w+) \((?:string|array|object)', user) or ['name', 'attributes']
+        entity = {}
+        for key in keys:
+            entity[key] = f"{key}_{rng.randrange(10000)}"
+        return json.dumps(entity)
+
+    return "OK"
+
+
+def _pick_collaborators(user: str, count: int, own_id: str, rng: random.Random, id_space: List[str] = None) -> List[str]:
+    """Mix of IDs mentioned in the prompt and random IDs, excluding own_id"""
+    # "ID 12" / "ID12" or a persona code "12:WWPD33"
+    mentioned = [a or b for a, b in re.findall(r'ID ?(\d+)|\b(\d+):[A-Z]', user) if (a or b) != own_id]
+    pool = [pid for pid in (id_space or [str(i) for i in range(1000)]) if pid != own_id]
+    selected = []
+    for _ in range(count * 20):
+        if len(selected) >= count or not (pool or mentioned):
+            break
+        source = mentioned if mentioned and (rng.random() < 0.5 or not pool) else pool
+        candidate = rng.choice(source)
+        if candidate not in selected:
+            selected.append(candidate)
+    return selected
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend. The answer depends only on the seed, the request
+    and how many times the same request was made before, so runs are reproducible
+    without network access or credentials.
+    """
+    name = 'stub'
+
+    def __init__(self, seed: int = 0, id_space: List[str] = None):
+        self.seed = seed
+        self.id_space = id_space
+        self._occurrences = {}
+        self._lock = threading.Lock()
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        key = request_key(model, messages, max_tokens, temperature)
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+        rng = random.Random(f"{self.seed}:{key}:{occurrence}")
+        content = synthesize_response(messages, rng, self.id_space)
+        prompt_tokens = sum(len(m['content']) for m in messages) // 4
+        return LLMResponse(content, model, prompt_tokens, max(1, len(content) // 4))
+
+
+class RecordReplayBackend(LLMBackend):
+    """
+    Record mode: forward to inner backend and append every response to a JSONL file.
+    Replay mode: answer from the file; identical requests are replayed in recorded order.
+    A replay miss falls through to inner if given, otherwise raises LLMBackendError.
+    """
+    name = 'record_replay'
+
+    def __init__(self, path: str, inner: LLMBackend = None, mode: str = 'replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("Record mode requires an inner backend")
+        self.path = path
+        self.inner = inner
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._recorded = {}      # key -> list of responses in recorded order
+        self._replayed = {}      # key -> number of responses already replayed
+        if mode == 'replay':
+            self._load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Replay file not found: {self.path}")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._recorded.setdefault(record['key'], []).append(LLMResponse.from_dict(record['response']))
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        key = request_key(model, messages, max_tokens, temperature)
+        if self.mode == 'replay':
+            with self._lock:
+                position = self._replayed.get(key, 0)
+                responses = self._recorded.get(key, [])
+                if position < len(responses):
+                    self._replayed[key] = position + 1
+                    return responses[position]
+            if self.inner is None:
+                raise LLMBackendError(f"No recorded response for request {key[:12]}")
+            return self.inner.complete(model, messages, max_tokens, temperature, **kwargs)
+
+        response = self.inner.complete(model, messages, max_tokens, temperature, **kwargs)
+        record = {'key': key, 'model': model, 'messages': messages, 'response': response.to_dict()}
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return response
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+
+
+class LazyBackend(LLMBackend):
+    """Create the wrapped backend with factory() on the first request, exactly once"""
+    name = 'lazy'
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> LLMBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._factory()
+        return self._backend
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        return self.resolve().complete(model, messages, max_tokens, temperature, **kwargs)
+
+    async def acomplete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        return await self.resolve().acomplete(model, messages, max_tokens, temperature, **kwargs)
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
+
+_default_backend: Optional[LLMBackend] = None
+_default_factory = None
+
+
+def set_backend(backend: LLMBackend):
+    """Install the process-wide default backend"""
+    global _default_backend
+    _default_backend = backend
+
+
+def set_default_backend_factory(factory):
+    """
+    Register how to build the default backend if none is installed explicitly.
+    Nothing is created until get_backend() is used for a request.
+    """
+    global _default_factory
+    _default_factory = factory
+
+
+def get_backend() -> LLMBackend:
+    """Return the process-wide default backend (lazily wrapping the registered factory)"""
+    global _default_backend
+    if _default_backend is None:
+        if _default_factory is None:
+            raise LLMBackendError("No LLM backend configured, call set_backend() first")
+        _default_backend = LazyBackend(_default_factory)
+    return _default_backend
+
+
+def find_backend(backend: LLMBackend, name: str) -> Optional[LLMBackend]:
+    """First backend with the given name in a wrapper chain (unresolved lazy backends are not created)"""
+    while backend is not None:
+        if backend.name == name:
+            return backend
+        backend = backend._backend if isinstance(backend, LazyBackend) else getattr(backend, 'inner', None)
+    return None
+
+
+def enable_streaming(backend: LLMBackend):
+    """Turn on streaming of the OpenAI backend in a wrapper chain, also if a LazyBackend creates it later"""
+    while backend is not None:
+        if isinstance(backend, OpenAIBackend):
+            backend.stream = True
+            return
+        if isinstance(backend, LazyBackend) and backend._backend is None:
+            factory = backend._factory
+
+            def streaming_factory():
+                created = factory()
+                enable_streaming(created)
+                return created
+
+            backend._factory = streaming_factory
+            return
+        backend = backend._backend if isinstance(backend, LazyBackend) else getattr(backend, 'inner', None)
+
+
+def add_backend_arguments(parser):
+    """Register the shared backend command line options on an argparse parser"""
+    parser.add_argument("--backend", type=str, choices=['openai', 'stub'], default='openai',
+                        help="LLM backend: OpenAI-compatible HTTP endpoint or deterministic offline stub")
+    parser.add_argument("--stub_seed", type=int, default=0, help="Seed of the offline stub backend")
+    parser.add_argument("--record", type=str, default=None, help="Record all LLM responses to this JSONL file")
+    parser.add_argument("--replay", type=str, default=None, help="Replay LLM responses from this JSONL file")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="SQLite file of the persistent LLM response cache (shared between runs and processes)")
+    parser.add_argument("--cache_max_entries", type=int, default=100000,
+                        help="Maximum number of cached responses, least recently used ones are evicted")
+    parser.add_argument("--max_rpm", type=float, default=None, help="Requests per minute allowed by the provider")
+    parser.add_argument("--max_tpm", type=float, default=None, help="Tokens per minute allowed by the provider")
+    parser.add_argument("--max_llm_concurrency", type=int, default=16,
+                        help="Upper bound of LLM requests in flight (adapted down on 429/5xx and back up)")
+    parser.add_argument("--llm_max_retries", type=int, default=6,
+                        help="Retries of rate-limited, failed or timed out requests before the agent falls back")
+    parser.add_argument("--stream", action='store_true',
+                        help="Stream completions and stop reading as soon as the agent's answer is complete")
+
+
+def backend_options(args) -> Dict[str, Any]:
+    """The add_backend_arguments() options of parsed args, e.g. to configure the backend of a worker process"""
+    parser = argparse.ArgumentParser(add_help=False)
+    add_backend_arguments(parser)
+    return {name: getattr(args, name, default) for name, default in vars(parser.parse_args([])).items()}
+
+
+def configure_backend_from_args(args, id_space: List[str] = None, openai_factory=None) -> LLMBackend:
+    """
+    Build the default backend from add_backend_arguments() options and install it.
+    openai_factory creates the HTTP backend; without it the currently installed backend is used.
+    """
+    if args.backend == 'stub':
+        backend = StubBackend(seed=args.stub_seed, id_space=id_space)
+    elif openai_factory is not None:
+        backend = LazyBackend(openai_factory)
+    else:
+        backend = get_backend()
+    if getattr(args, 'stream', False):
+        enable_streaming(backend)
+
+    # Rate limiting sits below the cache, so cache hits do not use up the provider quota
+    if not args.replay and (args.backend == 'openai' or getattr(args, 'max_rpm', None) or getattr(args, 'max_tpm', None)):
+        from request_scheduler import RequestScheduler, RateLimitedBackend
+        backend = RateLimitedBackend(backend, RequestScheduler(
+            max_rpm=getattr(args, 'max_rpm', None), max_tpm=getattr(args, 'max_tpm', None),
+            max_concurrency=getattr(args, 'max_llm_concurrency', 16), max_retries=getattr(args, 'llm_max_retries', 6)))
+        atexit.register(backend.close)
+
+    if getattr(args, 'cache', None) and not args.replay:
+        from llm_cache import LLMResponseCache, CachingBackend
+        backend = CachingBackend(backend, LLMResponseCache(args.cache, max_entries=args.cache_max_entries))
+        atexit.register(backend.close)
+
+    if args.replay:
+        backend = RecordReplayBackend(args.replay, inner=None, mode='replay')
+    elif args.record:
+        backend = RecordReplayBackend(args.record, inner=backend, mode='record')
+
+    set_backend(backend)
+    return backend
@@ -0,0 +1,157 @@
+"""
+Persistent, content-addressed cache of LLM responses.
+
+Entries live in a SQLite database keyed on request_key(model, messages, max_tokens,
+temperature, sample=...). The sample index distinguishes repeated identical requests:
+it is the explicit seed if the caller passes one, otherwise the n-th occurrence of the
+request in this process. A re-run or resumed run therefore gets the same answers in the
+same order without calling the endpoint again.
+
+The database runs in WAL mode with a busy timeout, so several processes (e.g. parallel
+ablation runs) can read and write the same cache file and share each other's hits.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from llm_backends import LLMBackend, LLMResponse, request_key
+
+
+class LLMResponseCache:
+    """SQLite key-value store of LLMResponse objects with size-bounded LRU eviction"""
+
+    def __init__(self, path: str, max_entries: int = 100000, max_bytes: int = None,
+                 evict_every: int = 64, busy_timeout: float = 30.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_every = max(1, evict_every)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return LLMResponse.from_dict(json.loads(row[0]))
+
+    def put(self, key: str, response: LLMResponse):
+        payload = json.dumps(response.to_dict(), ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= self.evict_every:
+                self._evict()
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the size bounds hold, return number removed"""
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> int:
+        self._puts_since_evict = 0
+        removed = 0
+        if self.max_entries is not None:
+            removed += self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        if self.max_bytes is not None:
+            removed += self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM "
+                "(SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running FROM responses) "
+                "WHERE running > ?)",
+                (self.max_bytes,)
+            ).rowcount
+        self.evictions += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size
+        }
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.close()
+
+
+class CachingBackend(LLMBackend):
+    """Answer from an LLMResponseCache, forwarding misses to the inner backend"""
+    name = 'cache'
+
+    def __init__(self, inner: LLMBackend, cache: LLMResponseCache):
+        self.inner = inner
+        self.cache = cache
+        self._occurrences = {}
+        self._lock = threading.Lock()
+
+    def cache_key(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> str:
+        sample = kwargs.get('seed')
+        if sample is None:
+            base = request_key(model, messages, max_tokens, temperature, **kwargs)
+            with self._lock:
+                sample = self._occurrences.get(base, 0)
+                self._occurrences[base] = sample + 1
+        return request_key(model, messages, max_tokens, temperature, sample=sample, **kwargs)
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        key = self.cache_key(model, messages, max_tokens, temperature, **kwargs)
+        response = self.cache.get(key)
+        if response is None:
+            response = self.inner.complete(model, messages, max_tokens, temperature, **kwargs)
+            self.cache.put(key, response)
+        return response
+
+    async def acomplete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        key = self.cache_key(model, messages, max_tokens, temperature, **kwargs)
+        response = self.cache.get(key)
+        if response is None:
+            response = await self.inner.acomplete(model, messages, max_tokens, temperature, **kwargs)
+            self.cache.put(key, response)
+        return response
+
+    def close(self):
+        stats = self.cache.stats()
+        print(f"💾 LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.1%}), {stats['entries']} entries")
+        self.cache.close()
+        self.inner.close()
@@ -0,0 +1,140 @@
+"""
+Background persistence writer.
+
+Snapshot, statistics, journal and checkpoint files are serialized and written by a
+single writer thread, so the LLM loop never blocks on disk I/O or JSON/pickle
+encoding. Tasks run strictly in submission order. The queue is bounded: when the
+disk falls behind, submit() blocks (back-pressure) instead of buffering without
+limit. flush() drains the queue deterministically, e.g. on KeyboardInterrupt.
+
+fsync policies:
+- 'always': fsync every file written
+- 'commit': fsync journal commits and base snapshots only (default)
+- 'never':  leave durability to the OS page cache
+"""
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, List
+
+FSYNC_POLICIES = ('always', 'commit', 'never')
+
+
+class BackgroundWriter:
+    """Bounded FIFO of persistence tasks executed on one daemon thread"""
+
+    def __init__(self, max_pending: int = 32, fsync_policy: str = 'commit', synchronous: bool = False):
+        """
+        :param max_pending: Queue capacity; submit() blocks while it is full
+        :param fsync_policy: One of FSYNC_POLICIES
+        :param synchronous: Run tasks inline in the caller (no thread), e.g. for debugging
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.fsync_policy = fsync_policy
+        self.synchronous = synchronous
+        self.tasks_done = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = None
+        if not synchronous:
+            self._thread = threading.Thread(target=self._worker, name="persistence-writer", daemon=True)
+            self._thread.start()
+
+    def should_fsync(self, durable: bool) -> bool:
+        """Whether a write should be fsynced; durable marks journal commits and base snapshots"""
+        return self.fsync_policy == 'always' or (durable and self.fsync_policy == 'commit')
+
+    def submit(self, task: Callable, *args, **kwargs):
+        """Queue task(*args, **kwargs); blocks while the queue is full"""
+        self._raise_pending_error()
+        if self.synchronous:
+            task(*args, **kwargs)
+            self.tasks_done += 1
+            return
+        self._queue.put((task, args, kwargs))
+
+    def write_json(self, path: str, data: Any, indent: int = 2):
+        self.submit(write_json_file, path, data, indent, self.should_fsync(False))
+
+    def write_edges(self, path: str, edges: List[List[str]]):
+        self.submit(write_edges_file, path, list(edges), self.should_fsync(False))
+
+    def write_text(self, path: str, text: str):
+        self.submit(write_text_file, path, text, self.should_fsync(False))
+
+    def append_lines(self, path: str, lines: List[str]):
+        self.submit(append_lines_file, path, list(lines), self.should_fsync(False))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until every submitted task has been written, re-raise the first write error"""
+        if not self.synchronous:
+            self._queue.join()
+        self._raise_pending_error()
+
+    def close(self):
+        self.flush()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                task, args, kwargs = item
+                if self._error is None:
+                    task(*args, **kwargs)
+                    self.tasks_done += 1
+            except BaseException as e:
+                # Keep draining so flush() cannot hang; the error surfaces on the next submit/flush
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Background persistence write failed: {error}") from error
+
+
+def write_json_file(path: str, data: Any, indent: int = 2, fsync: bool = False):
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def write_text_file(path: str, text: str, fsync: bool = False):
+    """Replace path atomically, so readers polling the file never see a partial write"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        f.write(text)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def append_lines_file(path: str, lines: List[str], fsync: bool = False):
+    with open(path, "a", encoding='utf-8') as f:
+        f.write("".join(line + "\n" for line in lines))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def write_edges_file(path: str, edges: List[List[str]], fsync: bool = False):
+    with open(path, "w", encoding='utf-8') as f:
+        for edge in edges:
+            f.write(" ".join(map(str, edge)) + "\n")
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,84 @@
+"""
+Compact persona encoding for agent prompts.
+
+Instead of "ID123(degree4, Woman, White, age 33)" every persona is written as its ID
+followed by one code character per categorical attribute and its numeric attributes,
+e.g. "123:WWPD33". The codes are defined once by legend(), which is identical for all
+requests of a run and therefore belongs in the static prompt prefix.
+
+Codes are assigned per attribute, most frequent value first, preferring a letter of the
+value itself (Woman -> W, Protestant -> P). Attributes with more than 36 values get two
+character codes, so every attribute has a fixed width and codes never need separators.
+Encodings are rendered on first use only.
+"""
+import itertools
+import string
+from collections import Counter
+from typing import Dict, List
+
+from persona_store import PersonaStore
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+class PersonaCodebook:
+    """Attribute codes of a persona collection and memoized persona encodings"""
+
+    def __init__(self, personas: Dict[str, Dict]):
+        self.personas = personas
+        if isinstance(personas, PersonaStore):
+            # Kinds and value frequencies straight from the columns
+            self.numeric, self.categorical = list(personas.numeric), list(personas.categorical)
+        else:
+            sample = next(iter(personas.values()), {})
+            self.numeric = [name for name in sample
+                            if all(isinstance(p.get(name), (int, float)) for p in personas.values())]
+            self.categorical = [name for name in sample if name not in self.numeric]
+        self.codes: Dict[str, Dict[str, str]] = {name: self._assign_codes(name) for name in self.categorical}
+        self._encoded: Dict[str, str] = {}
+        self._legend = None
+
+    def _assign_codes(self, attribute: str) -> Dict[str, str]:
+        if isinstance(self.personas, PersonaStore):
+            counts = Counter({str(value): count for value, count in self.personas.value_counts(attribute).items()})
+        else:
+            counts = Counter(str(p.get(attribute)) for p in self.personas.values())
+        values = sorted(counts, key=lambda value: (-counts[value], value))
+        width = 1 if len(values) <= len(CODE_ALPHABET) else 2
+        pool = ["".join(chars) for chars in itertools.product(CODE_ALPHABET, repeat=width)]
+        codes, used = {}, set()
+        for value in values:
+            letters = [c for c in value.upper() if c in CODE_ALPHABET]
+            preferred = [letters[0] + c for c in letters[1:]] if width == 2 and letters else letters
+            code = next((c for c in itertools.chain(preferred, pool) if len(c) == width and c not in used))
+            codes[value] = code
+            used.add(code)
+        return codes
+
+    def encode(self, person_id: str) -> str:
+        """ID:<one code per categorical attribute><numeric attributes>, e.g. 123:WWPD33"""
+        encoded = self._encoded.get(person_id)
+        if encoded is None:
+            person = self.personas.get(person_id)
+            if person is None:
+                encoded = str(person_id)
+            else:
+                codes = "".join(self.codes[name].get(str(person.get(name)), '?') for name in self.categorical)
+                numbers = "/".join(str(person.get(name)) for name in self.numeric)
+                encoded = f"{person_id}:{codes}{numbers}"
+            self._encoded[person_id] = encoded
+        return encoded
+
+    def encode_many(self, person_ids: List[str], separator: str = ", ") -> str:
+        return separator.join(self.encode(person_id) for person_id in person_ids)
+
+    def legend(self) -> str:
+        """Definition of the codes, the same for every request of a run"""
+        if self._legend is None:
+            layout = "".join(f"<{name}>" for name in self.categorical + self.numeric)
+            lines = [f"Persona codes ID:{layout}"
+                     + (f", e.g. {self.encode(next(iter(self.personas)))}" if self.personas else "")]
+            for name in self.categorical:
+                lines.append(f"{name}: " + " ".join(f"{code}={value}" for value, code in self.codes[name].items()))
+            self._legend = "\n".join(lines)
+        return self._legend
@@ -0,0 +1,129 @@
+"""
+Vectorized candidate scoring for the LLM-free generators (ablation baselines).
+
+PersonaScorer holds the personas as integer-encoded NumPy columns (taken as they are
+from a PersonaStore, encoded once from a JSON dict) and a degree array it keeps in sync
+as an edge index. A generator builds its score for all personas at once from
+equal(attribute, row), age_within(row, window) and degrees instead of comparing
+attribute strings persona by persona, then picks with:
+    top_k()         the k best rows in O(n) with a partition, ties in persona order
+                    (the order a stable sort of all candidates would give)
+    gumbel_top_k()  k rows weighted without replacement: the largest log(weight) +
+                    Gumbel noise keys, distributed exactly like k successive weighted
+                    draws that remove each pick
+"""
+import random
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from persona_store import PersonaStore
+
+SIMILARITY_ATTRIBUTES = ('gender', 'race/ethnicity', 'religion', 'political affiliation')
+
+
+class PersonaScorer:
+    """Encoded persona attributes and node degrees as arrays indexed by persona row"""
+
+    def __init__(self, personas: Dict[str, Dict], attributes: Iterable[str] = SIMILARITY_ATTRIBUTES,
+                 numeric: Iterable[str] = ('age',), hyperedges: Iterable[List[str]] = ()):
+        """
+        :param personas: Persona dict or PersonaStore
+        :param attributes: Categorical attributes compared by equal()
+        :param numeric: Integer attributes (age_within() reads 'age')
+        :param hyperedges: Current hyperedges, counted into the degree array
+        """
+        self.personas = personas
+        self.attributes = tuple(attributes)
+        if isinstance(personas, PersonaStore):
+            self._person_id = personas.person_id
+            self._row_of = personas.row
+            self.columns = {name: personas.column(name) for name in self.attributes + tuple(numeric)}
+        else:
+            ids = list(personas)
+            rows = {person_id: row for row, person_id in enumerate(ids)}
+            self._person_id = ids.__getitem__
+            self._row_of = rows.__getitem__
+            self.columns = {}
+            for name in self.attributes:
+                codes = {}
+                self.columns[name] = np.fromiter((codes.setdefault(p.get(name), len(codes)) for p in personas.values()),
+                                                 dtype=np.int32, count=len(ids))
+            for name in numeric:
+                self.columns[name] = np.fromiter((int(p.get(name, 0)) for p in personas.values()),
+                                                 dtype=np.int32, count=len(ids))
+        self.degrees = np.zeros(len(personas), dtype=np.int32)
+        for edge in hyperedges:
+            self.add(edge)
+
+    def __len__(self) -> int:
+        return len(self.degrees)
+
+    def row(self, person_id: str) -> int:
+        return self._row_of(person_id)
+
+    def person_ids(self, rows: Iterable[int]) -> List[str]:
+        return [self._person_id(int(row)) for row in rows]
+
+    def degree_array(self, node_degrees: Dict[str, int]) -> np.ndarray:
+        """Degrees of a node -> degree mapping other than the maintained one, as an array"""
+        degrees = np.zeros(len(self.degrees), dtype=np.int32)
+        for node, degree in node_degrees.items():
+            try:
+                degrees[self._row_of(node)] = degree
+            except KeyError:
+                continue
+        return degrees
+
+    def add(self, edge: List[str]):
+        self._update(edge, 1)
+
+    def remove(self, edge: List[str]):
+        self._update(edge, -1)
+
+    def adjust(self, node: str, delta: int):
+        self._update([node], delta)
+
+    def equal(self, attribute: str, row: int) -> np.ndarray:
+        """Boolean array: personas sharing the attribute value of the persona in row"""
+        column = self.columns[attribute]
+        return column == column[row]
+
+    def age_within(self, row: int, window: int) -> np.ndarray:
+        ages = self.columns['age']
+        return np.abs(ages - np.int32(ages[row])) <= window
+
+    def _update(self, edge: List[str], delta: int):
+        for node in edge:
+            try:
+                row = self._row_of(node)
+            except KeyError:
+                continue
+            self.degrees[row] += delta
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Rows of the k highest scores, best first, equal scores in row order"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+    rows = np.concatenate([above, tied])
+    return rows[np.lexsort((rows, -scores[rows]))]
+
+
+def gumbel_top_k(weights: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Positions of k weighted draws without replacement, in draw order"""
+    k = min(k, len(weights))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    keys = np.log(weights) + rng.gumbel(size=len(weights))
+    picked = np.argpartition(-keys, k - 1)[:k]
+    return picked[np.argsort(-keys[picked])]
+
+
+def numpy_rng(rng: random.Random = None) -> np.random.Generator:
+    """NumPy generator seeded from the random module, so random.seed() keeps runs reproducible"""
+    return np.random.default_rng((rng or random).getrandbits(64))
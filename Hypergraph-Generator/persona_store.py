@@ -0,0 +1,247 @@
+"""
+Columnar, dictionary-encoded persona store.
+
+personas.json (a dict of dicts) is converted once into a directory of NumPy arrays:
+    meta.json       attribute names, kinds, vocabularies and the source file it was built from
+    ids.npy         persona IDs, row order = order of the JSON file
+    column_<i>.npy  per categorical attribute the code of each persona (uint8/uint16 index
+                    into the vocabulary), per numeric attribute its values (age: int16)
+Arrays are opened memory-mapped, so worker processes share the pages of one copy instead
+of each holding a dict of dicts, and attribute filters run on whole columns.
+
+PersonaStore is a read-only Mapping person_id -> attribute dict, so code written against
+the JSON dict keeps working (records are decoded on access); hot paths use the columns
+through row(), column(), code(), mask() and value_counts().
+
+Convert once:
+    python persona_store.py personas.json [--output personas.columns]
+load_personas() then picks the up-to-date store next to the JSON file automatically.
+"""
+import argparse
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+STORE_SUFFIX = '.columns'
+META_FILE = 'meta.json'
+
+
+class PersonaStore(Mapping):
+    """Memory-mapped persona columns with a dict-of-dicts view"""
+
+    def __init__(self, directory: str, mmap: bool = True):
+        """
+        :param directory: Store directory written by convert_personas()
+        :param mmap: Memory-map the arrays (False: read them into memory)
+        """
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        mode = 'r' if mmap else None
+        self.ids = np.load(os.path.join(directory, 'ids.npy'), mmap_mode=mode)
+        self.attributes: List[str] = [column['name'] for column in self.meta['columns']]
+        self.categorical = [c['name'] for c in self.meta['columns'] if c['kind'] == 'categorical']
+        self.numeric = [c['name'] for c in self.meta['columns'] if c['kind'] == 'numeric']
+        self.vocabularies: Dict[str, List[Any]] = {c['name']: c['vocabulary'] for c in self.meta['columns']
+                                                   if c['kind'] == 'categorical'}
+        self._columns = {c['name']: np.load(os.path.join(directory, c['file']), mmap_mode=mode)
+                         for c in self.meta['columns']}
+        self._code_of = {name: {value: code for code, value in enumerate(vocabulary)}
+                         for name, vocabulary in self.vocabularies.items()}
+        # IDs "0".."n-1" in row order (the usual layout) need no ID -> row dict
+        self._sequential = self.meta.get('sequential_ids', False)
+        self._rows = None
+
+    def __reduce__(self):
+        # Pickled as its directory: other processes map the same files
+        return (PersonaStore, (self.directory,))
+
+    # ---- Mapping view --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids.tolist())
+
+    def __contains__(self, person_id) -> bool:
+        return self._row(person_id) is not None
+
+    def __getitem__(self, person_id: str) -> Dict[str, Any]:
+        row = self._row(person_id)
+        if row is None:
+            raise KeyError(person_id)
+        return self.record(row)
+
+    def __repr__(self) -> str:
+        return f"PersonaStore({len(self)} personas, {len(self.attributes)} attributes, {self.directory!r})"
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Attributes of the persona in the given row, as in the JSON file"""
+        record = {}
+        for name in self.attributes:
+            value = self._columns[name][row]
+            record[name] = self.vocabularies[name][value] if name in self.vocabularies else value.item()
+        return record
+
+    # ---- Columnar access -----------------------------------------------------
+
+    def row(self, person_id: str) -> int:
+        row = self._row(person_id)
+        if row is None:
+            raise KeyError(person_id)
+        return row
+
+    def rows(self, person_ids: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.row(person_id) for person_id in person_ids), dtype=np.int64)
+
+    def person_id(self, row: int) -> str:
+        return str(self.ids[row])
+
+    def column(self, attribute: str) -> np.ndarray:
+        """Codes of a categorical attribute, values of a numeric one"""
+        return self._columns[attribute]
+
+    def code(self, attribute: str, value) -> int:
+        """Code of a categorical value, -1 if no persona has it"""
+        return self._code_of[attribute].get(value, -1)
+
+    def mask(self, attribute: str, value) -> np.ndarray:
+        """Boolean row mask of the personas whose attribute equals value"""
+        if attribute in self._code_of:
+            return self._columns[attribute] == self.code(attribute, value)
+        return self._columns[attribute] == value
+
+    def value_counts(self, attribute: str, rows: np.ndarray = None) -> Dict[Any, int]:
+        """Frequency of each value of an attribute, over all personas or the given rows"""
+        column = self._columns[attribute] if rows is None else self._columns[attribute][rows]
+        if attribute in self.vocabularies:
+            counts = np.bincount(column, minlength=len(self.vocabularies[attribute]))
+            return {value: int(count) for value, count in zip(self.vocabularies[attribute], counts) if count}
+        values, counts = np.unique(column, return_counts=True)
+        return {value.item(): int(count) for value, count in zip(values, counts)}
+
+    def groups(self, attributes: Iterable[str]) -> Dict[tuple, List[str]]:
+        """Person IDs grouped by their combination of categorical attribute values"""
+        attributes = list(attributes)
+        key = np.zeros(len(self), dtype=np.int64)
+        for name in attributes:
+            key = key * len(self.vocabularies[name]) + self._columns[name]
+        order = np.argsort(key, kind='stable')
+        keys, starts = np.unique(key[order], return_index=True)
+        members = np.split(order, starts[1:])
+        groups = {}
+        # Groups in order of their first persona, as when grouping the JSON dict
+        for i in np.argsort(order[starts], kind='stable'):
+            group_key, rows = int(keys[i]), members[i]
+            values = []
+            for name in reversed(attributes):
+                group_key, code = divmod(group_key, len(self.vocabularies[name]))
+                values.append(self.vocabularies[name][code])
+            groups[tuple(reversed(values))] = [self.person_id(row) for row in rows]
+        return groups
+
+    def _row(self, person_id):
+        if self._sequential:
+            try:
+                row = int(person_id)
+            except (TypeError, ValueError):
+                return None
+            return row if 0 <= row < len(self.ids) and str(row) == str(person_id) else None
+        if self._rows is None:
+            self._rows = {person_id: row for row, person_id in enumerate(self.ids.tolist())}
+        return self._rows.get(str(person_id))
+
+
+def store_path(json_path: str) -> str:
+    """Default store directory of a personas JSON file"""
+    return os.path.splitext(json_path)[0] + STORE_SUFFIX
+
+
+def convert_personas(json_path: str, output_dir: str = None) -> str:
+    """One-time conversion of a personas JSON file into a PersonaStore directory"""
+    output_dir = output_dir or store_path(json_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        personas = json.load(f)
+    os.makedirs(output_dir, exist_ok=True)
+
+    person_ids = list(personas)
+    attributes = list(dict.fromkeys(name for person in personas.values() for name in person))
+    columns = []
+    for i, name in enumerate(attributes):
+        values = [person.get(name) for person in personas.values()]
+        file_name = f"column_{i}.npy"
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            array = np.array(values, dtype=np.int64)
+            for dtype in (np.int16, np.int32):
+                if not len(array) or (np.iinfo(dtype).min <= array.min() and array.max() <= np.iinfo(dtype).max):
+                    array = array.astype(dtype)
+                    break
+            columns.append({'name': name, 'kind': 'numeric', 'file': file_name})
+        else:
+            vocabulary = list(dict.fromkeys(values))
+            code_of = {value: code for code, value in enumerate(vocabulary)}
+            dtype = np.uint8 if len(vocabulary) <= 256 else np.uint16 if len(vocabulary) <= 65536 else np.int32
+            array = np.array([code_of[v] for v in values], dtype=dtype)
+            columns.append({'name': name, 'kind': 'categorical', 'file': file_name, 'vocabulary': vocabulary})
+        np.save(os.path.join(output_dir, file_name), array)
+
+    np.save(os.path.join(output_dir, 'ids.npy'), np.array(person_ids, dtype=str))
+    stat = os.stat(json_path)
+    meta = {
+        'source': os.path.abspath(json_path),
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime,
+        'count': len(person_ids),
+        'sequential_ids': person_ids == [str(i) for i in range(len(person_ids))],
+        'columns': columns
+    }
+    # meta.json last: a store without it is incomplete and never opened
+    with open(os.path.join(output_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    return output_dir
+
+
+def is_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def is_current(directory: str, json_path: str) -> bool:
+    """Whether the store was converted from the JSON file as it is now"""
+    if not is_store(directory):
+        return False
+    with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    stat = os.stat(json_path)
+    return meta.get('source_size') == stat.st_size and meta.get('source_mtime') == stat.st_mtime
+
+
+def load_personas(path: str):
+    """
+    Personas of a store directory or a JSON file; a JSON file with an up-to-date
+    store next to it (see store_path()) is served from the store.
+    """
+    if os.path.isdir(path):
+        return PersonaStore(path)
+    directory = store_path(path)
+    if is_current(directory, path):
+        return PersonaStore(directory)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a personas JSON file into a columnar persona store")
+    parser.add_argument("personas", type=str, help="Personas JSON file")
+    parser.add_argument("--output", type=str, default=None, help="Store directory (default: <personas>.columns)")
+    args = parser.parse_args()
+
+    directory = convert_personas(args.personas, args.output)
+    store = PersonaStore(directory)
+    print(f"✅ Converted {len(store)} personas into {directory}")
+    for name in store.attributes:
+        kind = f"{len(store.vocabularies[name])} values" if name in store.vocabularies else "numeric"
+        print(f"   {name}: {store.column(name).dtype} ({kind})")
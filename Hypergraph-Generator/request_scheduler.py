@@ -0,0 +1,301 @@
+"""
+Central scheduler of outgoing LLM requests.
+
+Every request passes through one RequestScheduler before it reaches the endpoint:
+- requests/min and tokens/min token buckets keep the client under the provider quota
+  (the token cost is estimated from the prompt and max_tokens, then corrected with the
+  reported usage)
+- the number of requests in flight follows AIMD: +1 per window of successful requests,
+  halved on 429/5xx/timeouts (at most once per cooldown)
+- Retry-After pauses admission for everyone, since the quota is shared
+- waiting requests are admitted by agent priority (generators before reviewers,
+  removers and optimizers), FIFO within a priority
+- failed requests are retried with full-jitter exponential backoff and only raised to
+  the agent (which then falls back) once the retries are exhausted
+
+RateLimitedBackend wraps any LLMBackend with a scheduler; the scheduler owns retries,
+so the SDK retries of a wrapped OpenAIBackend are switched off. stats() exposes queue
+depth, requests in flight and the current concurrency limit.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from llm_backends import LLMBackend, LLMResponse, LazyBackend, OpenAIBackend, detect_agent_type
+
+# Lower value is admitted first
+DEFAULT_PRIORITIES = {
+    'generator': 0, 'batch_generator': 0, 'hypergraph': 0, 'entity': 0,
+    'reviewer': 1, 'generic': 1, 'remover': 2, 'optimizer': 3
+}
+
+CONNECTION_ERRORS = ('APIConnectionError', 'APITimeoutError', 'Timeout', 'ConnectTimeout', 'ReadTimeout')
+
+
+def classify_error(error: Exception) -> Tuple[Optional[str], Optional[float]]:
+    """
+    (kind, retry_after seconds) of a failed request. kind is 'rate_limit', 'server' or
+    'connection' for retryable errors and None for errors a retry cannot fix.
+    """
+    status = getattr(error, 'status_code', None)
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    retry_after = None
+    try:
+        if headers.get('retry-after-ms') is not None:
+            retry_after = float(headers.get('retry-after-ms')) / 1000.0
+        elif headers.get('retry-after') is not None:
+            retry_after = float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        retry_after = None   # HTTP-date form, fall back to backoff
+
+    if status == 429:
+        return 'rate_limit', retry_after
+    if status is not None and (status >= 500 or status in (408, 409)):
+        return 'server', retry_after
+    if status is None and (isinstance(error, (TimeoutError, ConnectionError)) or
+                           type(error).__name__ in CONNECTION_ERRORS):
+        return 'connection', retry_after
+    return None, retry_after
+
+
+class TokenBucket:
+    """Refills at per_minute / 60 units per second up to one minute of budget"""
+
+    def __init__(self, per_minute: float, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount (capped at capacity) is available"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return (or, if negative, charge) the difference between estimated and actual cost"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RequestScheduler:
+    """Admission control shared by all threads and event loops of the process"""
+
+    def __init__(self, max_rpm: float = None, max_tpm: float = None, max_concurrency: int = 16,
+                 initial_concurrency: int = None, min_concurrency: int = 1, decrease_factor: float = 0.5,
+                 decrease_cooldown: float = 2.0, max_retries: int = 6, base_backoff: float = 1.0,
+                 max_backoff: float = 60.0, priorities: Dict[str, int] = None, clock=time.monotonic):
+        """
+        :param max_rpm: Requests per minute (None: unlimited)
+        :param max_tpm: Prompt + completion tokens per minute (None: unlimited)
+        :param max_concurrency: Upper bound of requests in flight
+        :param initial_concurrency: Starting limit (default max_concurrency; errors then shrink it)
+        :param decrease_factor: Multiplicative decrease of the limit on 429/5xx/timeouts
+        :param decrease_cooldown: Seconds in which repeated errors count as one congestion event
+        :param max_retries: Retries of a retryable failure before it is raised to the caller
+        :param base_backoff: Backoff ceiling of the first retry in seconds (doubles per retry)
+        :param max_backoff: Maximum backoff ceiling in seconds
+        :param priorities: Agent type -> priority, lower first (default DEFAULT_PRIORITIES)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(min(self.max_concurrency, initial_concurrency or self.max_concurrency))
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self._clock = clock
+        self._rpm = TokenBucket(max_rpm, clock) if max_rpm else None
+        self._tpm = TokenBucket(max_tpm, clock) if max_tpm else None
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._rng = random.Random()
+        self.in_flight = 0
+        self.counters = {'requests': 0, 'succeeded': 0, 'retries': 0, 'failed': 0, 'rate_limited': 0,
+                         'server_errors': 0, 'connection_errors': 0, 'wait_seconds': 0.0}
+
+    def priority_of(self, agent_type: str) -> int:
+        return self.priorities.get(agent_type, self.priorities.get('generic', 1))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def acquire(self, priority: int, estimated_tokens: int = 0) -> float:
+        """Block until this request may be sent, return the seconds waited"""
+        entry = (priority, next(self._sequence))
+        started = self._clock()
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            while True:
+                delay = self._admission_delay(estimated_tokens) if self._waiting[0] == entry else None
+                if delay == 0.0:
+                    heapq.heappop(self._waiting)
+                    if self._rpm:
+                        self._rpm.consume(1)
+                    if self._tpm:
+                        self._tpm.consume(estimated_tokens)
+                    self.in_flight += 1
+                    waited = self._clock() - started
+                    self.counters['requests'] += 1
+                    self.counters['wait_seconds'] += waited
+                    # The next waiter may be admissible too
+                    self._condition.notify_all()
+                    return waited
+                self._condition.wait(delay)
+
+    def _admission_delay(self, estimated_tokens: int = 0) -> Optional[float]:
+        """0.0 if the head request can go now, else seconds to wait (None: until a release)"""
+        if self.in_flight >= int(self.limit):
+            return None
+        delay = max(0.0, self._paused_until - self._clock())
+        if self._rpm:
+            delay = max(delay, self._rpm.wait_time(1))
+        if self._tpm:
+            delay = max(delay, self._tpm.wait_time(estimated_tokens))
+        return delay
+
+    def release(self, estimated_tokens: int = 0, error_kind: str = None, used_tokens: int = 0,
+                retry_after: float = None, exhausted: bool = False):
+        """
+        Record the outcome of an admitted request and adapt the concurrency limit.
+        error_kind is None on success, a classify_error() kind on a transient failure
+        and 'failed' on a permanent one (which does not change the limit). exhausted marks
+        a transient failure after which no retry follows; it also counts as failed.
+        """
+        with self._condition:
+            if exhausted:
+                self.counters['failed'] += 1
+            self.in_flight -= 1
+            now = self._clock()
+            if self._tpm:
+                self._tpm.refund(estimated_tokens - used_tokens)
+            if error_kind is None:
+                # Additive increase: about +1 per window of `limit` successful requests
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                self.counters['succeeded'] += 1
+            elif error_kind == 'failed':
+                self.counters['failed'] += 1
+            else:
+                self.counters[{'rate_limit': 'rate_limited', 'server': 'server_errors',
+                               'connection': 'connection_errors'}[error_kind]] += 1
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            self._condition.notify_all()
+
+    def backoff_delay(self, attempt: int, retry_after: float = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        with self._condition:
+            self.counters['retries'] += 1
+        ceiling = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return max(retry_after or 0.0, self._rng.uniform(0, ceiling))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return dict(self.counters, queue_depth=len(self._waiting), in_flight=self.in_flight,
+                        concurrency_limit=round(self.limit, 2),
+                        paused_for=round(max(0.0, self._paused_until - self._clock()), 2))
+
+
+class RateLimitedBackend(LLMBackend):
+    """Send every request of the inner backend through a RequestScheduler, retrying transient failures"""
+    name = 'scheduled'
+
+    def __init__(self, inner: LLMBackend, scheduler: RequestScheduler):
+        self.inner = inner
+        self.scheduler = scheduler
+        self._retries_disabled = False
+        self._closed = False
+
+    def _prepare(self, messages, max_tokens) -> Tuple[int, int]:
+        if not self._retries_disabled:
+            backend = self.inner.resolve() if isinstance(self.inner, LazyBackend) else self.inner
+            if isinstance(backend, OpenAIBackend) and backend.max_retries is None:
+                backend.max_retries = 0
+            self._retries_disabled = True
+        priority = self.scheduler.priority_of(detect_agent_type(messages))
+        estimated_tokens = sum(len(m.get('content') or '') for m in messages) // 4 + (max_tokens or 256)
+        return priority, estimated_tokens
+
+    def _failed(self, error: Exception, attempt: int, estimated_tokens: int) -> float:
+        """Release a failed request; return the backoff before the next attempt or re-raise"""
+        kind, retry_after = classify_error(error)
+        if kind is None:
+            self.scheduler.release(estimated_tokens, 'failed')
+            raise error
+        # A 429/5xx on the last attempt still counts as such and still shrinks the limit
+        exhausted = attempt >= self.scheduler.max_retries
+        self.scheduler.release(estimated_tokens, kind, retry_after=retry_after, exhausted=exhausted)
+        if exhausted:
+            raise error
+        return self.scheduler.backoff_delay(attempt, retry_after)
+
+    def _succeeded(self, response: LLMResponse, estimated_tokens: int):
+        self.scheduler.release(estimated_tokens, used_tokens=response.prompt_tokens + response.completion_tokens)
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        priority, estimated_tokens = self._prepare(messages, max_tokens)
+        waited = 0.0
+        for attempt in itertools.count():
+            waited += self.scheduler.acquire(priority, estimated_tokens)
+            try:
+                response = self.inner.complete(model, messages, max_tokens, temperature, **kwargs)
+            except Exception as e:
+                backoff = self._failed(e, attempt, estimated_tokens)
+                time.sleep(backoff)
+                waited += backoff
+                continue
+            self._succeeded(response, estimated_tokens)
+            response.queue_seconds = waited
+            return response
+
+    async def acomplete(self, model, messages, max_tokens=None, temperature=None, **kwargs) -> LLMResponse:
+        priority, estimated_tokens = self._prepare(messages, max_tokens)
+        waited = 0.0
+        for attempt in itertools.count():
+            waited += await asyncio.to_thread(self.scheduler.acquire, priority, estimated_tokens)
+            try:
+                response = await self.inner.acomplete(model, messages, max_tokens, temperature, **kwargs)
+            except Exception as e:
+                backoff = self._failed(e, attempt, estimated_tokens)
+                await asyncio.sleep(backoff)
+                waited += backoff
+                continue
+            self._succeeded(response, estimated_tokens)
+            response.queue_seconds = waited
+            return response
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        stats = self.scheduler.stats()
+        if stats['requests']:
+            print(f"🚦 Request scheduler: {stats['succeeded']} succeeded, {stats['retries']} retries "
+                  f"({stats['rate_limited']} rate limited, {stats['server_errors']} server errors, "
+                  f"{stats['connection_errors']} connection errors), {stats['failed']} failed, "
+                  f"concurrency limit {stats['concurrency_limit']}, queued {stats['wait_seconds']:.1f}s in total")
+        self.inner.close()
@@ -0,0 +1,90 @@
+"""
+Leveled console output and a machine-readable event stream of a generator run.
+
+Console: messages go through the 'hypergraph' logger. Per-hyperedge lines (added,
+rejected, removed, selected individual) are DEBUG, so at the default INFO level a run
+prints phase banners, iteration summaries and a progress line throttled to one per
+progress interval instead of one line per hyperedge.
+
+Event stream: consumers such as the GUI read JSON lines from a file or an inherited
+file descriptor instead of parsing console text:
+    {"event": "phase_changed", "phase": "building", "iteration": 0, "time": ...}
+    {"event": "edge_added", "edge_id": 17, "edge": ["3", "8"], "size": 2, "phase": "building", "iteration": 4, "time": ...}
+    {"event": "edge_removed", "edge_id": 5, "edge": ["1", "9"], "size": 2, "phase": "evolution", "iteration": 12, "time": ...}
+    {"event": "iteration_done", "iteration": 4, "phase": "building", "hyperedges": 120, "progress": 0.4, "time": ...}
+Events are buffered and written at the end of every iteration.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, List, Union
+
+LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+
+logger = logging.getLogger('hypergraph')
+
+
+def configure_logging(level: str = 'info', stream=None):
+    """Send the run logger to stdout (or stream) as plain messages at the given level"""
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+
+# Scripts that never call configure_logging() still get INFO output on stdout
+if not logger.handlers:
+    configure_logging()
+
+
+class ProgressReporter:
+    """Log a progress line at most once per interval seconds"""
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._last = float('-inf')
+
+    def update(self, message: Union[str, Callable[[], str]], force: bool = False):
+        """message may be a callable, so throttled updates do not even format their text"""
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            logger.info(message() if callable(message) else message)
+
+
+class EventStream:
+    """Buffered JSONL event writer; without a path or fd every call is a no-op"""
+
+    def __init__(self, path: str = None, fd: int = None):
+        self._file = None
+        self._buffer: List[str] = []
+        if fd is not None:
+            self._file = os.fdopen(fd, 'a', encoding='utf-8')
+        elif path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def emit(self, event: str, **fields):
+        if self._file is not None:
+            self._buffer.append(json.dumps({'event': event, **fields, 'time': time.time()}, ensure_ascii=False))
+
+    def flush(self):
+        if self._file is not None and self._buffer:
+            lines, self._buffer = self._buffer, []
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,179 @@
+"""
+Append-only write-ahead journal of a generator run.
+
+Persistence per iteration is O(delta): only the hyperedge add/remove events, the new
+agent decisions and a commit record of the iteration are appended. Every
+snapshot_interval iterations the generator writes a compacted base snapshot
+(checkpoint_iteration_XXX.pkl, same format as the former per-iteration checkpoints)
+and starts a new journal segment, so a resume loads the latest base snapshot and
+replays only the segment that follows it.
+
+Layout in the checkpoints directory:
+    journal_000.jsonl             iterations 0.. of a fresh run (header holds the edge size sequence)
+    checkpoint_iteration_009.pkl  compacted state after iteration 9
+    journal_010.jsonl             iterations 10.. replayed on top of checkpoint_iteration_009.pkl
+
+Events are buffered in memory and written together with their commit record,
+on the background persistence writer if one is given. Events written after the
+last commit record belong to an interrupted iteration; replay discards them and
+truncates the segment before appending again.
+"""
+import json
+import os
+import pickle
+import re
+from typing import Dict, Any, List, Optional
+
+SEGMENT_PATTERN = re.compile(r'^journal_(\d+)\.jsonl$')
+BASE_PATTERN = re.compile(r'^checkpoint_iteration_(\d+)\.pkl$')
+
+
+def segment_path(checkpoints_dir: str, start_iteration: int) -> str:
+    return os.path.join(checkpoints_dir, f"journal_{start_iteration:03d}.jsonl")
+
+
+def base_path(checkpoints_dir: str, iteration: int) -> str:
+    return os.path.join(checkpoints_dir, f"checkpoint_iteration_{iteration:03d}.pkl")
+
+
+def list_files(checkpoints_dir: str, pattern) -> Dict[int, str]:
+    """Map iteration number -> path for journal segments or base snapshots"""
+    if not os.path.exists(checkpoints_dir):
+        return {}
+    found = {}
+    for name in os.listdir(checkpoints_dir):
+        match = pattern.match(name)
+        if match:
+            found[int(match.group(1))] = os.path.join(checkpoints_dir, name)
+    return found
+
+
+def write_base_snapshot(path: str, checkpoint: Dict[str, Any], fsync: bool = True):
+    """Write a compacted base snapshot atomically (a crash never leaves a torn file)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(checkpoint, f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RunJournal:
+    """Writer of one journal segment"""
+
+    def __init__(self, path: str, header: Dict[str, Any] = None, append_at: int = None, writer=None):
+        """
+        :param path: Segment file path
+        :param header: Written as first record of a new segment
+        :param append_at: Continue an existing segment, truncated to this byte offset (end of its last commit)
+        :param writer: BackgroundWriter doing the file I/O (None: write in the calling thread)
+        """
+        self.path = path
+        self.writer = writer
+        self._file = None
+        self._buffer = []
+        self._run(self._open, header, append_at)
+
+    def log_add(self, edge_id: int, edge: List[str]):
+        self._buffer.append({'type': 'add', 'edge_id': edge_id, 'edge': edge})
+
+    def log_remove(self, edge_id: int, edge: List[str]):
+        self._buffer.append({'type': 'remove', 'edge_id': edge_id, 'edge': edge})
+
+    def log_decisions(self, agent_name: str, decisions: List[Dict[str, Any]]):
+        if decisions:
+            self._buffer.append({'type': 'decisions', 'agent': agent_name, 'decisions': decisions})
+
+    def commit(self, iteration: int, current_edge_index: int, iteration_results: Dict[str, Any]):
+        """Write all events since the previous commit, followed by the commit record of the iteration"""
+        records, self._buffer = self._buffer, []
+        records.append({'type': 'commit', 'iteration': iteration, 'current_edge_index': current_edge_index,
+                        'iteration_results': iteration_results})
+        self._run(self._write_records, records, self._fsync())
+
+    def close(self):
+        """Close the segment; buffered events of an uncommitted iteration are dropped"""
+        self._buffer = []
+        self._run(self._close)
+
+    def _run(self, task, *args):
+        if self.writer is None:
+            task(*args)
+        else:
+            self.writer.submit(task, *args)
+
+    def _fsync(self) -> bool:
+        return self.writer is None or self.writer.should_fsync(True)
+
+    def _open(self, header: Dict[str, Any], append_at: int):
+        if append_at is not None:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(append_at)
+            self._file.seek(append_at)
+        else:
+            self._file = open(self.path, "wb")
+            self._write_records([{'type': 'segment', **(header or {})}], self._fsync())
+
+    def _write_records(self, records: List[Dict[str, Any]], fsync: bool):
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode('utf-8'))
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+def read_segment(path: str):
+    """
+    Read a journal segment.
+    Returns (header, committed iterations, byte offset after the last commit), where each
+    committed iteration is (commit record, list of event records in order).
+    """
+    header = None
+    iterations = []
+    pending = []
+    committed_offset = 0
+    offset = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            offset += len(raw)
+            if not raw.endswith(b"\n"):
+                break   # torn final write
+            try:
+                record = json.loads(raw.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                break
+            if record['type'] == 'segment':
+                header = record
+                committed_offset = offset
+            elif record['type'] == 'commit':
+                iterations.append((record, pending))
+                pending = []
+                committed_offset = offset
+            else:
+                pending.append(record)
+    return header, iterations, committed_offset
+
+
+def latest_base(checkpoints_dir: str) -> Optional[int]:
+    bases = list_files(checkpoints_dir, BASE_PATTERN)
+    return max(bases) if bases else None
+
+
+def prune(checkpoints_dir: str, keep_bases: int = 2):
+    """Delete all but the newest keep_bases base snapshots and the journal segments they supersede"""
+    bases = sorted(list_files(checkpoints_dir, BASE_PATTERN))
+    if len(bases) <= keep_bases:
+        return
+    oldest_kept = bases[-keep_bases]
+    for iteration in bases[:-keep_bases]:
+        for path in (base_path(checkpoints_dir, iteration),
+                     os.path.join(checkpoints_dir, f"checkpoint_iteration_{iteration:03d}.json")):
+            if os.path.exists(path):
+                os.remove(path)
+    for start, path in list_files(checkpoints_dir, SEGMENT_PATTERN).items():
+        if start <= oldest_kept:
+            os.remove(path)
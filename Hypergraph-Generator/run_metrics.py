@@ -0,0 +1,251 @@
+"""
+Telemetry of a generator run: where its time and tokens go.
+
+Every agent LLM call is recorded with wall latency, time spent waiting in the request
+scheduler, prompt/completion/cached tokens, whether its stream was cut off early and its
+status; agents add whether their
+output could be parsed, and the pipeline whether a proposed hyperedge was accepted or
+rejected (and why). Calls that made an agent fall back to its default decision (e.g. a
+review defaulting to APPROVE once the retries are exhausted) are counted by error kind
+in agent_fallbacks_total. Pipeline stages (degree index updates, quality checks, network
+statistics, persistence, ...) are timed with stage().
+
+The share of prompt tokens served from the provider's prefix cache (cached_tokens as
+reported by the API) is part of every iteration summary as cached_token_ratio.
+
+Output files in the run directory, written on the background persistence writer:
+    metrics.jsonl   one record per LLM call and one summary per iteration, including the
+                    token and call cost per accepted hyperedge
+    metrics.prom    Prometheus text exposition of all counters and histograms, rewritten
+                    after every iteration (e.g. for the node_exporter textfile collector)
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+PREFIX = 'hypergraph_'
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class RunMetrics:
+    """Thread-safe counters and histograms with JSONL and Prometheus text output"""
+
+    def __init__(self, jsonl_path: str = None, prom_path: str = None, writer=None):
+        """
+        :param jsonl_path: Metrics stream file (None: no stream)
+        :param prom_path: Prometheus text file (None: not written)
+        :param writer: BackgroundWriter for the file output (None: write in the calling thread)
+        """
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._records: List[Dict[str, Any]] = []
+        self._last_summary: Dict[str, float] = {}
+
+    # ---- Recording -----------------------------------------------------------
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage into the stage_seconds histogram"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - started, stage=name)
+
+    def timed_complete(self, backend, agent: str, **request):
+        """backend.complete(**request), recording the call under the given agent name"""
+        started = time.perf_counter()
+        try:
+            response = backend.complete(**request)
+        except Exception as e:
+            self.record_call(agent, time.perf_counter() - started, status=type(e).__name__)
+            raise
+        self.record_call(agent, time.perf_counter() - started, response=response)
+        return response
+
+    def record_call(self, agent: str, latency: float, response=None, status: str = 'ok'):
+        queue_wait = getattr(response, 'queue_seconds', 0.0) if response is not None else 0.0
+        prompt_tokens = response.prompt_tokens if response is not None else 0
+        completion_tokens = response.completion_tokens if response is not None else 0
+        cached_tokens = response.cached_tokens if response is not None else 0
+
+        self.inc('llm_requests_total', agent=agent, status=status)
+        self.observe('llm_latency_seconds', latency, agent=agent)
+        self.observe('llm_queue_wait_seconds', queue_wait, agent=agent)
+        if response is not None:
+            self.inc('llm_prompt_tokens_total', prompt_tokens, agent=agent)
+            self.inc('llm_completion_tokens_total', completion_tokens, agent=agent)
+            self.inc('llm_cached_tokens_total', cached_tokens, agent=agent)
+            self.observe('llm_prompt_tokens', prompt_tokens, TOKEN_BUCKETS, agent=agent)
+            self.observe('llm_completion_tokens', completion_tokens, TOKEN_BUCKETS, agent=agent)
+            if getattr(response, 'cut_off', False):
+                self.inc('llm_stream_cutoffs_total', agent=agent)
+        with self._lock:
+            self._records.append({
+                'type': 'llm_call', 'time': time.time(), 'agent': agent, 'status': status,
+                'latency': round(latency, 6), 'queue_wait': round(queue_wait, 6),
+                'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                'cached_tokens': cached_tokens, 'cut_off': getattr(response, 'cut_off', False)
+            })
+
+    def record_parse(self, agent: str, ok: bool, count: int = 1):
+        """Whether an agent output could be parsed into a usable decision"""
+        if count:
+            self.inc('agent_parse_total', count, agent=agent, result='ok' if ok else 'failed')
+
+    def record_fallback(self, agent: str, error: Exception) -> str:
+        """An agent fell back to its default decision after a failed call; return the error kind"""
+        kind = error_kind(error)
+        self.inc('agent_fallbacks_total', agent=agent, kind=kind)
+        return kind
+
+    def record_outcome(self, phase: str, outcome: str):
+        """Fate of a proposed hyperedge: accepted, quality_rejected, review_rejected, duplicate, invalid, not_bridging"""
+        self.inc('hyperedge_outcomes_total', phase=phase, outcome=outcome)
+
+    # ---- Summaries and output ------------------------------------------------
+
+    def totals(self) -> Dict[str, float]:
+        """Run totals used by the per-iteration summary"""
+        with self._lock:
+            totals = {'llm_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cached_tokens': 0,
+                      'llm_seconds': 0.0, 'queue_seconds': 0.0, 'accepted_edges': 0}
+            names = {'llm_prompt_tokens_total': 'prompt_tokens', 'llm_completion_tokens_total': 'completion_tokens',
+                     'llm_cached_tokens_total': 'cached_tokens', 'llm_requests_total': 'llm_calls'}
+            for (name, labels), value in self._counters.items():
+                if name in names:
+                    totals[names[name]] += value
+                elif name == 'hyperedge_outcomes_total' and dict(labels).get('outcome') == 'accepted':
+                    totals['accepted_edges'] += value
+            for (name, labels), histogram in self._histograms.items():
+                if name == 'llm_latency_seconds':
+                    totals['llm_seconds'] += histogram.sum
+                elif name == 'llm_queue_wait_seconds':
+                    totals['queue_seconds'] += histogram.sum
+                elif name == 'stage_seconds':
+                    totals[f"stage:{dict(labels)['stage']}"] = histogram.sum
+            return totals
+
+    def iteration_summary(self, iteration: int, phase: str) -> Dict[str, Any]:
+        """Deltas since the previous summary, including the cost per accepted hyperedge"""
+        totals = self.totals()
+        delta = {name: value - self._last_summary.get(name, 0) for name, value in totals.items()}
+        self._last_summary = totals
+        accepted = delta['accepted_edges']
+        tokens = delta['prompt_tokens'] + delta['completion_tokens']
+        summary = {
+            'type': 'iteration', 'time': time.time(), 'iteration': iteration, 'phase': phase,
+            'llm_calls': int(delta['llm_calls']),
+            'prompt_tokens': int(delta['prompt_tokens']),
+            'completion_tokens': int(delta['completion_tokens']),
+            'cached_tokens': int(delta['cached_tokens']),
+            'cached_token_ratio': round(delta['cached_tokens'] / delta['prompt_tokens'], 4) if delta['prompt_tokens'] else None,
+            'llm_seconds': round(delta['llm_seconds'], 3),
+            'queue_seconds': round(delta['queue_seconds'], 3),
+            'accepted_edges': int(accepted),
+            'tokens_per_accepted_edge': round(tokens / accepted, 1) if accepted else None,
+            'calls_per_accepted_edge': round(delta['llm_calls'] / accepted, 3) if accepted else None,
+            'stage_seconds': {name[len('stage:'):]: round(value, 4)
+                              for name, value in delta.items() if name.startswith('stage:')}
+        }
+        with self._lock:
+            self._records.append(summary)
+        return summary
+
+    def flush(self):
+        """Append buffered records to metrics.jsonl and rewrite metrics.prom"""
+        with self._lock:
+            records, self._records = self._records, []
+        lines = [json.dumps(record, ensure_ascii=False) for record in records]
+        prometheus = self.to_prometheus() if self.prom_path else None
+        if self.writer is not None:
+            if self.jsonl_path and lines:
+                self.writer.append_lines(self.jsonl_path, lines)
+            if prometheus is not None:
+                self.writer.write_text(self.prom_path, prometheus)
+        else:
+            from persistence_writer import append_lines_file, write_text_file
+            if self.jsonl_path and lines:
+                append_lines_file(self.jsonl_path, lines)
+            if prometheus is not None:
+                write_text_file(self.prom_path, prometheus)
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            lines = []
+            declared = set()
+            for (name, labels), value in counters:
+                if name not in declared:
+                    lines.append(f"# TYPE {PREFIX}{name} counter")
+                    declared.add(name)
+                lines.append(f"{PREFIX}{name}{_labels(labels)} {_number(value)}")
+            for (name, labels), histogram in histograms:
+                if name not in declared:
+                    lines.append(f"# TYPE {PREFIX}{name} histogram")
+                    declared.add(name)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+                lines.append(f"{PREFIX}{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def error_kind(error: Exception) -> str:
+    """rate_limit, server, connection (transient, retries exhausted) or the exception type"""
+    from request_scheduler import classify_error
+    return classify_error(error)[0] or type(error).__name__
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,327 @@
+"""
+Local OpenAI-compatible stand-in server for offline load testing.
+
+Speaks POST /v1/chat/completions and answers every agent in its expected output
+format (generator ID lists, reviewer APPROVE/REJECT, remover index lists, optimizer
+strategy tokens) using the same synthesizer as the offline StubBackend. Latency,
+rate-limit 429s, server errors and malformed outputs can be injected so throughput,
+concurrency and retry behaviour can be measured reproducibly without a paid endpoint.
+Requests with "stream": true are answered as server-sent events, one chunk per word with
+--token_ms of decode time each; --explain_prob appends an explanation after the answer the
+way chatty models do, so the effect of closing streams early can be measured.
+Prompt prefixes seen before are reported as cached_tokens in blocks of --prefix_cache_block
+tokens, like providers with automatic prefix caching do.
+
+Usage:
+    python stub_llm_server.py --port 8000 --latency_dist lognormal --latency_ms 800 --rate_limit_prob 0.05
+    export OPENAI_BASE_URL=http://127.0.0.1:8000/v1
+
+GET /stats returns request counters as JSON.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+
+from llm_backends import request_key, synthesize_response, detect_agent_type
+
+
+class FaultProfile:
+    """Latency distribution and fault injection probabilities of the stub server"""
+
+    def __init__(self, latency_dist: str = 'fixed', latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 rate_limit_prob: float = 0.0, rpm_limit: int = None, retry_after: float = 1.0,
+                 server_error_prob: float = 0.0, malformed_prob: float = 0.0, token_ms: float = 0.0,
+                 explain_prob: float = 0.0, prefix_cache_block: int = 64):
+        if latency_dist not in ('fixed', 'uniform', 'exponential', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {latency_dist}")
+        self.latency_dist = latency_dist
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.rate_limit_prob = rate_limit_prob
+        self.rpm_limit = rpm_limit
+        self.retry_after = retry_after
+        self.server_error_prob = server_error_prob
+        self.malformed_prob = malformed_prob
+        self.token_ms = token_ms
+        self.explain_prob = explain_prob
+        self.prefix_cache_block = prefix_cache_block
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Latency in seconds"""
+        mean = self.latency_ms
+        if mean <= 0:
+            return 0.0
+        if self.latency_dist == 'uniform':
+            value = rng.uniform(max(0.0, mean - self.latency_jitter_ms), mean + self.latency_jitter_ms)
+        elif self.latency_dist == 'exponential':
+            value = rng.expovariate(1.0 / mean)
+        elif self.latency_dist == 'lognormal':
+            # jitter is the standard deviation; parameters chosen so the mean is latency_ms
+            sigma2 = math.log(1 + (self.latency_jitter_ms / mean) ** 2) if self.latency_jitter_ms else 0.25
+            value = rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        else:
+            value = mean
+        return value / 1000.0
+
+
+def malform(content: str, rng: random.Random) -> str:
+    """Corrupt a well-formed answer the way real models occasionally do"""
+    mode = rng.choice(['empty', 'chatty', 'truncated', 'garbage'])
+    if mode == 'empty':
+        return ""
+    if mode == 'chatty':
+        return f"Sure! Here is my answer based on the information provided:\n\n{content}\n\nLet me know if you need more."
+    if mode == 'truncated':
+        return content[:max(0, len(content) // 2)]
+    return " ".join(rng.choice(['lorem', 'ipsum', 'N/A', '???', 'unknown', '-']) for _ in range(rng.randint(1, 8)))
+
+
+def explain(content: str, rng: random.Random) -> str:
+    """Follow the answer with a paragraph of justification"""
+    words = ['this', 'choice', 'balances', 'shared', 'features', 'network', 'degree', 'diversity', 'and',
+             'collaboration', 'potential', 'of', 'the', 'selected', 'individuals', 'while', 'avoiding', 'clustering']
+    return f"{content}\n\nExplanation: " + " ".join(rng.choice(words) for _ in range(rng.randint(30, 80))) + "."
+
+
+def split_tokens(content: str) -> List[str]:
+    """Stream chunks: words with their trailing whitespace"""
+    return re.findall(r'\S+\s*|\s+', content)
+
+
+class StubLLMServer:
+    """Request handling state: deterministic per-request randomness, RPM window and counters"""
+
+    def __init__(self, profile: FaultProfile, seed: int = 0, id_space: List[str] = None):
+        self.profile = profile
+        self.seed = seed
+        self.id_space = id_space
+        self._occurrences = {}
+        self._recent = deque()   # request timestamps of the last 60s for rpm_limit
+        self._prefixes = set()   # hashes of prompt prefixes at block boundaries
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'completed': 0, 'rate_limited': 0, 'server_errors': 0,
+                      'malformed': 0, 'streams_closed_early': 0, 'tokens_not_sent': 0, 'cached_tokens': 0,
+                      'in_flight': 0, 'max_in_flight': 0, 'by_agent': {}}
+
+    def handle(self, body: Dict[str, Any]):
+        """Return (status, headers, payload, delay_seconds) for a chat completion request"""
+        model = body.get('model', 'stub')
+        messages = body.get('messages', [])
+        key = request_key(model, messages, body.get('max_tokens'), body.get('temperature'))
+        now = time.time()
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+            self.stats['requests'] += 1
+            agent_type = detect_agent_type(messages)
+            self.stats['by_agent'][agent_type] = self.stats['by_agent'].get(agent_type, 0) + 1
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            over_rpm = self.profile.rpm_limit is not None and len(self._recent) >= self.profile.rpm_limit
+            if not over_rpm:
+                self._recent.append(now)
+
+        rng = random.Random(f"{self.seed}:{key}:{occurrence}")
+        fault_rng = random.Random(f"{self.seed}:{key}:{occurrence}:fault")
+        delay = self.profile.sample_latency(fault_rng)
+
+        if over_rpm or fault_rng.random() < self.profile.rate_limit_prob:
+            self._count('rate_limited')
+            error = {'error': {'message': 'Rate limit reached (stub)', 'type': 'rate_limit_exceeded',
+                               'code': 'rate_limit_exceeded'}}
+            return 429, {'Retry-After': str(self.profile.retry_after)}, error, 0.0
+        if fault_rng.random() < self.profile.server_error_prob:
+            self._count('server_errors')
+            return 500, {}, {'error': {'message': 'Internal server error (stub)', 'type': 'server_error'}}, delay
+
+        content = synthesize_response(messages, rng, self.id_space)
+        if fault_rng.random() < self.profile.malformed_prob:
+            self._count('malformed')
+            content = malform(content, fault_rng)
+        elif fault_rng.random() < self.profile.explain_prob:
+            content = explain(content, fault_rng)
+
+        prompt_tokens = sum(len(m.get('content') or '') for m in messages) // 4
+        completion_tokens = max(1, len(content) // 4)
+        cached_tokens = self._cached_prefix_tokens(model, messages)
+        payload = {
+            'id': f"chatcmpl-{uuid.UUID(int=rng.getrandbits(128)).hex}",
+            'object': 'chat.completion',
+            'created': int(now),
+            'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens,
+                      'prompt_tokens_details': {'cached_tokens': cached_tokens}}
+        }
+        self._count('completed')
+        if not body.get('stream'):
+            delay += len(split_tokens(content)) * self.profile.token_ms / 1000.0
+        return 200, {}, payload, delay
+
+    def _cached_prefix_tokens(self, model: str, messages: List[Dict[str, Any]]) -> int:
+        """Tokens of the longest block-aligned prompt prefix already seen (4 characters per token)"""
+        if not self.profile.prefix_cache_block:
+            return 0
+        text = model + "".join(f"\x00{m.get('role')}\x00{m.get('content') or ''}" for m in messages)
+        block = self.profile.prefix_cache_block * 4
+        hashes = [hashlib.sha256(text[:end].encode('utf-8')).hexdigest() for end in range(block, len(text) + 1, block)]
+        with self._lock:
+            cached = 0
+            for blocks, prefix in enumerate(hashes, 1):
+                if prefix not in self._prefixes:
+                    break
+                cached = blocks
+            self._prefixes.update(hashes)
+        self._count('cached_tokens', cached * self.profile.prefix_cache_block)
+        return cached * self.profile.prefix_cache_block
+
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            self.stats[name] += delta
+            if name == 'in_flight':
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+
+def make_handler(server_state: StubLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send(404, {}, {'error': {'message': f'Unknown endpoint {self.path}'}})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except json.JSONDecodeError:
+                self._send(400, {}, {'error': {'message': 'Invalid JSON body'}})
+                return
+            server_state._count('in_flight')
+            try:
+                status, headers, payload, delay = server_state.handle(body)
+                if delay:
+                    time.sleep(delay)
+                if status == 200 and body.get('stream'):
+                    self._send_stream(payload, bool((body.get('stream_options') or {}).get('include_usage')))
+                else:
+                    self._send(status, headers, payload)
+            finally:
+                server_state._count('in_flight', -1)
+
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/stats'):
+                self._send(200, {}, server_state.snapshot())
+            else:
+                self._send(404, {}, {'error': {'message': f'Unknown endpoint {self.path}'}})
+
+        def _send(self, status: int, headers: Dict[str, str], payload: Dict[str, Any]):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, payload: Dict[str, Any], include_usage: bool):
+            """Answer as server-sent events; a client closing the stream early ends the response"""
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+            base = {'id': payload['id'], 'object': 'chat.completion.chunk', 'created': payload['created'],
+                    'model': payload['model']}
+            tokens = split_tokens(payload['choices'][0]['message']['content'])
+            events = [{**base, 'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': token},
+                                            'finish_reason': None}]} for token in tokens]
+            events.append({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+            if include_usage:
+                events.append({**base, 'choices': [], 'usage': payload['usage']})
+            try:
+                for sent, event in enumerate(events):
+                    if sent and sent <= len(tokens) and server_state.profile.token_ms:
+                        time.sleep(server_state.profile.token_ms / 1000.0)
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                server_state._count('streams_closed_early')
+                server_state._count('tokens_not_sent', max(0, len(tokens) - sent))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, profile: FaultProfile = None, seed: int = 0,
+          id_space: List[str] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) the HTTP server; call serve_forever() or run it in a thread"""
+    state = StubLLMServer(profile or FaultProfile(), seed=seed, id_space=id_space)
+    httpd = ThreadingHTTPServer((host, port), make_handler(state))
+    httpd.daemon_threads = True
+    httpd.state = state
+    return httpd
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server with latency and error injection")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of response synthesis and fault injection")
+    parser.add_argument("--personas", type=str, default=None, help="Personas JSON whose IDs the generator answers are drawn from")
+    parser.add_argument("--latency_dist", type=str, choices=['fixed', 'uniform', 'exponential', 'lognormal'], default='fixed')
+    parser.add_argument("--latency_ms", type=float, default=0.0, help="Mean latency per request in milliseconds")
+    parser.add_argument("--latency_jitter_ms", type=float, default=0.0,
+                        help="Half-width (uniform) or standard deviation (lognormal) of the latency")
+    parser.add_argument("--rate_limit_prob", type=float, default=0.0, help="Probability of answering 429")
+    parser.add_argument("--rpm_limit", type=int, default=None, help="Answer 429 above this many requests per minute")
+    parser.add_argument("--retry_after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--server_error_prob", type=float, default=0.0, help="Probability of answering 500")
+    parser.add_argument("--malformed_prob", type=float, default=0.0, help="Probability of a malformed answer")
+    parser.add_argument("--token_ms", type=float, default=0.0, help="Decode time per completion token in milliseconds")
+    parser.add_argument("--explain_prob", type=float, default=0.0,
+                        help="Probability that an answer is followed by an explanation paragraph")
+    parser.add_argument("--prefix_cache_block", type=int, default=64,
+                        help="Block size in tokens of the simulated prompt prefix cache (0: no cached tokens)")
+    args = parser.parse_args()
+
+    id_space = None
+    if args.personas:
+        with open(args.personas, 'r', encoding='utf-8') as f:
+            id_space = list(json.load(f).keys())
+
+    profile = FaultProfile(args.latency_dist, args.latency_ms, args.latency_jitter_ms, args.rate_limit_prob,
+                           args.rpm_limit, args.retry_after, args.server_error_prob, args.malformed_prob,
+                           args.token_ms, args.explain_prob, args.prefix_cache_block)
+    httpd = serve(args.host, args.port, profile, seed=args.seed, id_space=id_space)
+    print(f"🚀 Stub LLM server listening on http://{args.host}:{args.port}/v1")
+    print(f"   export OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        print(f"📊 Server stats: {json.dumps(httpd.state.snapshot())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+The generator modules are flat scripts in Hypergraph-Generator/, not a package:
+make them importable from the tests the same way the ablation scripts do.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,86 @@
+"""
+Every agent that falls back to its default decision after a failed call counts it in
+agent_fallbacks_total{agent, kind}, so fallback rates show up for all agents alike.
+"""
+import json
+import os
+
+import pytest
+
+from LLM_MAS_Hypergraph_Configuration import (NetworkOptimizerAgent, RelationshipGeneratorAgent,
+                                              RelationshipRemoverAgent, RelationshipReviewerAgent)
+from hypergraph_store import HyperedgeStore
+from llm_backends import LLMBackend
+from run_metrics import RunMetrics
+
+PERSONAS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "personas1000.json")
+
+
+@pytest.fixture(scope="module")
+def personas():
+    with open(PERSONAS_FILE, "r", encoding='utf-8') as f:
+        return json.load(f)
+
+
+class _FailingBackend(LLMBackend):
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs):
+        raise TimeoutError("request timed out")
+
+
+def _agent(cls, agent_id):
+    agent = cls(agent_id, backend=_FailingBackend())
+    agent.metrics = RunMetrics()
+    return agent
+
+
+def _fallbacks(agent):
+    return {dict(labels)['kind']: value for (name, labels), value in agent.metrics._counters.items()
+            if name == 'agent_fallbacks_total' and dict(labels)['agent'] == agent.agent_id}
+
+
+def _generator_context(personas, person_id, target_edge_size=3):
+    return {'person_id': person_id, 'person_data': personas[person_id], 'existing_hyperedges': [],
+            'personas': personas, 'max_members': 5, 'target_edge_size': target_edge_size}
+
+
+def test_generator_fallbacks_are_counted(personas):
+    agent = _agent(RelationshipGeneratorAgent, "generator")
+    ids = list(personas)
+
+    decision = agent.make_decision(_generator_context(personas, ids[0]))
+    decisions = agent.make_batch_decision([_generator_context(personas, pid) for pid in ids[1:4]])
+
+    assert decision['selected_members'] == [ids[0]]
+    assert [d['selected_members'] for d in decisions] == [[pid] for pid in ids[1:4]]
+    assert _fallbacks(agent) == {'connection': 2}
+
+
+def test_remover_fallback_is_counted(personas):
+    agent = _agent(RelationshipRemoverAgent, "remover")
+    ids = list(personas)
+    store = HyperedgeStore(ids[k:k + 3] for k in range(0, 30, 3))
+
+    decision = agent.make_decision({'all_hyperedges': store, 'personas': personas, 'iteration': 5})
+
+    assert decision['edges_to_remove'] == []
+    assert _fallbacks(agent) == {'connection': 1}
+
+
+def test_optimizer_fallback_is_counted(personas):
+    agent = _agent(NetworkOptimizerAgent, "optimizer")
+    ids = list(personas)
+
+    decision = agent.make_decision({'all_hyperedges': [ids[k:k + 3] for k in range(0, 30, 3)], 'personas': personas})
+
+    assert decision['strategy'] == 'MAINTAIN_CURRENT'
+    assert _fallbacks(agent) == {'connection': 1}
+
+
+def test_reviewer_fallback_is_counted(personas):
+    agent = _agent(RelationshipReviewerAgent, "reviewer")
+    ids = list(personas)
+
+    decision = agent.make_decision({'hyperedge': ids[:3], 'personas': personas, 'existing_hyperedges': []})
+
+    assert decision['decision'] == 'APPROVE'
+    assert _fallbacks(agent) == {'connection': 1}
@@ -0,0 +1,94 @@
+"""
+Building phase engine (ProtectedMASHypergraphGenerator._run_building_attempts): hyperedges are committed
+strictly in slot order, so a slot that can never be committed stalls the whole building phase.
+"""
+import os
+import threading
+import time
+
+from LLM_MAS_Hypergraph_Configuration import ProtectedMASHypergraphGenerator
+from llm_backends import StubBackend
+
+PERSONAS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "personas1000.json")
+
+
+def _generator(tmp_path, sizes, backend=None, **kwargs):
+    config_file = tmp_path / "config.txt"
+    node = iter(range(10 ** 6))
+    config_file.write_text("".join(" ".join(str(next(node)) for _ in range(size)) + "\n" for size in sizes))
+    return ProtectedMASHypergraphGenerator(PERSONAS_FILE, str(config_file), str(tmp_path / "out"),
+                                           groups_per_iteration=5, backend=backend or StubBackend(seed=2), **kwargs)
+
+
+def _build(generator, max_attempts=1000):
+    iteration_results = {'actions': []}
+    added = generator._run_building_attempts(iteration_results, max_attempts)
+    generator.writer.close()
+    return added, iteration_results
+
+
+def test_size_one_slots_are_committed(tmp_path):
+    sizes = [1, 2, 1, 1, 3, 2, 1, 4, 1, 2] * 3
+    generator = _generator(tmp_path, sizes)
+
+    added, iteration_results = _build(generator)
+
+    assert added == len(sizes)
+    assert generator.current_edge_index == len(sizes)
+    assert [len(edge) for edge in generator.hyperedges] == generator.edge_size_sequence
+    assert sorted(generator.edge_size_sequence) == sorted(sizes)
+    assert all(edge[0] in generator.personas for edge in generator.hyperedges if len(edge) == 1)
+    assert len(iteration_results['actions']) == len(sizes)
+
+
+def test_size_one_slots_need_no_generator_request(tmp_path):
+    generator = _generator(tmp_path, [1] * 12)
+
+    added, _ = _build(generator, max_attempts=1)
+
+    assert added == 12
+    assert generator.agents['generator'].decision_history == []
+
+
+def test_speculative_and_batched_requests_keep_slot_sizes(tmp_path):
+    sizes = [2, 1, 3, 1, 1, 2, 5, 1, 2, 3] * 3
+    generator = _generator(tmp_path, sizes, concurrency=3, speculative_candidates=2, generation_batch_size=3)
+
+    added, _ = _build(generator)
+
+    assert added == len(sizes)
+    assert [len(edge) for edge in generator.hyperedges] == generator.edge_size_sequence
+
+
+class _StuckFirstRequest(StubBackend):
+    """Stub backend whose first request hangs until released"""
+
+    def __init__(self):
+        super().__init__(seed=3)
+        self.release = threading.Event()
+        self.calls = 0
+
+    def complete(self, *args, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            self.release.wait(30)
+        return super().complete(*args, **kwargs)
+
+
+def test_abandoned_requests_do_not_hold_back_the_iteration(tmp_path):
+    backend = _StuckFirstRequest()
+    generator = _generator(tmp_path, [2, 3] * 5, backend=backend, speculative_candidates=2)
+
+    started = time.monotonic()
+    added = generator._run_building_attempts({'actions': []}, 1000)
+    elapsed = time.monotonic() - started
+    backend.release.set()
+
+    assert elapsed < 10
+    assert added == 10
+    # The released request belongs to a finished iteration: the next one neither waits for nor uses it
+    generator.edge_size_sequence.extend([2, 2])
+    assert generator._run_building_attempts({'actions': []}, 1000) == 2
+    assert [len(edge) for edge in generator.hyperedges] == generator.edge_size_sequence
+    generator.save_final_results()
+    assert generator._generation_executor is None
@@ -0,0 +1,115 @@
+"""
+HyperedgeStore: stable edge IDs, tombstones and compaction (hypergraph_store.py).
+The journal replays removals by edge ID, so an ID that shifts or gets reused removes the wrong edge.
+"""
+import pickle
+import random
+
+import pytest
+
+from hypergraph_store import HyperedgeStore
+
+
+def _edge(k):
+    return [str(k), str(k + 1), str(k + 2)][:2 + k % 2]
+
+
+def test_ids_are_stable_and_never_reused():
+    store = HyperedgeStore()
+    ids = [store.add(_edge(k)) for k in range(5)]
+    assert ids == [0, 1, 2, 3, 4]
+
+    assert store.remove(1) == _edge(1)
+    assert store.remove(3) == _edge(3)
+    assert store.add(_edge(5)) == 5
+    assert store.get(0) == _edge(0)
+    assert store.get(4) == _edge(4)
+    assert store.edge_ids() == [0, 2, 4, 5]
+    assert not store.has_edge(1)
+
+
+def test_tombstones_are_skipped_by_the_sequence_view():
+    store = HyperedgeStore(_edge(k) for k in range(6))
+    store.remove(0)
+    store.remove(4)
+
+    expected = [_edge(k) for k in (1, 2, 3, 5)]
+    assert len(store) == 4
+    assert list(store) == expected
+    assert [store[p] for p in range(4)] == expected
+    assert store[-1] == _edge(5)
+    assert store[1:3] == expected[1:3]
+    assert store.recent_items(2) == [(3, _edge(3)), (5, _edge(5))]
+    with pytest.raises(IndexError):
+        store[4]
+
+
+def test_remove_unknown_or_removed_id_raises():
+    store = HyperedgeStore([_edge(0)])
+    store.remove(0)
+    with pytest.raises(KeyError):
+        store.remove(0)
+    with pytest.raises(KeyError):
+        store.remove(7)
+
+
+def test_compaction_keeps_ids_and_order():
+    store = HyperedgeStore((_edge(k) for k in range(200)), compact_ratio=0.25)
+    for edge_id in range(0, 200, 2):
+        store.remove(edge_id)
+
+    # More than 64 tombstones and more than a quarter of all slots: the arrays were compacted
+    assert len(store._alive) < 200
+    assert list(store.items()) == [(k, _edge(k)) for k in range(1, 200, 2)]
+    assert store[50] == _edge(101)
+    assert store.add(_edge(7)) == 200
+    assert store.edge_size(199) == len(_edge(199))
+    assert [store.node_name(n) for n in store.member_ids(199)] == _edge(199)
+
+
+def test_matches_a_plain_list_under_random_adds_and_removes():
+    rng = random.Random(3)
+    store = HyperedgeStore(compact_ratio=0.25)
+    reference = []   # (edge ID, edge) in insertion order
+    next_id = 0
+    for step in range(3000):
+        if reference and rng.random() < 0.45:
+            edge_id, edge = reference.pop(rng.randrange(len(reference)))
+            assert store.remove(edge_id) == edge
+        else:
+            edge = _edge(rng.randrange(500))
+            assert store.add(edge) == next_id
+            reference.append((next_id, edge))
+            next_id += 1
+        if step % 250 == 0:
+            assert list(store.items()) == reference
+            assert [store[p] for p in range(len(store))] == [edge for _, edge in reference]
+
+    assert list(store.items()) == reference
+    sample = store.sample(10, random.Random(0))
+    assert len(sample) == 10 and all(edge in [e for _, e in reference] for edge in sample)
+
+
+def test_state_round_trip_keeps_ids_and_next_id():
+    store = HyperedgeStore(_edge(k) for k in range(10))
+    for edge_id in (2, 5, 9):
+        store.remove(edge_id)
+
+    state = pickle.loads(pickle.dumps(store.to_state()))
+    restored = HyperedgeStore.from_state(state)
+
+    assert list(restored.items()) == list(store.items())
+    assert HyperedgeStore.state_edges(state) == list(store)
+    assert restored.add(_edge(10)) == 10
+    restored.remove(6)
+    assert restored.edge_ids() == [0, 1, 3, 4, 7, 8, 10]
+    assert restored[4] == _edge(7)
+
+
+def test_to_state_is_a_copy():
+    store = HyperedgeStore(_edge(k) for k in range(3))
+    state = store.to_state()
+    store.remove(0)
+    store.add(_edge(3))
+
+    assert list(HyperedgeStore.from_state(state).items()) == [(k, _edge(k)) for k in range(3)]
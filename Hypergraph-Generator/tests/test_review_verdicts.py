@@ -0,0 +1,67 @@
+"""
+Verdict parsing of batched reviews (RelationshipReviewerAgent.parse_verdicts).
+A verdict attributed to the wrong candidate silently approves or rejects the wrong hyperedge,
+so anything that cannot be attributed must come back as None (re-asked or defaulted by the caller).
+"""
+import json
+
+import pytest
+
+from LLM_MAS_Hypergraph_Configuration import RelationshipReviewerAgent
+
+parse_verdicts = RelationshipReviewerAgent.parse_verdicts
+
+
+@pytest.mark.parametrize("output", [
+    '[{"index": 0, "decision": "APPROVE"}, {"index": 1, "decision": "REJECT"}, {"index": 2, "decision": "APPROVE"}]',
+    'Verdicts: ["APPROVE", "REJECT", "APPROVE"]',
+    "0: APPROVE\n1: REJECT\n2: APPROVE",
+    "Candidate 0: **APPROVE**\nCandidate 1 - reject\nCandidate 2) Approve",
+    "APPROVE REJECT APPROVE",
+])
+def test_complete_answers(output):
+    assert parse_verdicts(output, 3) == ['APPROVE', 'REJECT', 'APPROVE']
+
+
+def test_one_based_numbering_is_shifted():
+    assert parse_verdicts("1: REJECT\n2: APPROVE\n3: REJECT", 3) == ['REJECT', 'APPROVE', 'REJECT']
+    assert parse_verdicts(json.dumps([{"candidate": 2, "verdict": "approve"}, {"candidate": 3, "verdict": "reject"}]), 3) \
+        == [None, 'APPROVE', 'REJECT']
+
+
+def test_missing_indexed_verdicts_stay_none():
+    assert parse_verdicts("0: APPROVE\n2: REJECT", 4) == ['APPROVE', None, 'REJECT', None]
+    assert parse_verdicts('[{"index": 1, "decision": "REJECT"}]', 3) == [None, 'REJECT', None]
+
+
+def test_plain_sequence_of_wrong_length_is_not_trusted():
+    # One skipped item would shift every later verdict onto the wrong candidate
+    assert parse_verdicts("APPROVE REJECT", 3) == [None, None, None]
+    assert parse_verdicts('["APPROVE", "REJECT", "APPROVE", "APPROVE"]', 3) == [None, None, None]
+
+
+def test_conflicting_duplicates_get_no_verdict():
+    assert parse_verdicts("0: APPROVE\n1: REJECT\n0: REJECT\n2: APPROVE", 3) == [None, 'REJECT', 'APPROVE']
+    assert parse_verdicts(json.dumps([{"index": 0, "decision": "APPROVE"}, {"index": 1, "decision": "APPROVE"},
+                                      {"index": 1, "decision": "REJECT"}]), 2) == ['APPROVE', None]
+
+
+def test_repeated_identical_verdict_is_kept():
+    assert parse_verdicts("0: REJECT\n1: APPROVE\nSummary: 0: REJECT", 2) == ['REJECT', 'APPROVE']
+
+
+def test_out_of_range_indexes_are_ignored():
+    assert parse_verdicts("0: APPROVE\n1: REJECT\n7: REJECT", 2) == ['APPROVE', 'REJECT']
+    assert parse_verdicts('[{"index": 0, "decision": "REJECT"}, {"index": 5, "decision": "APPROVE"}]', 2) \
+        == ['REJECT', None]
+    assert parse_verdicts('[{"index": -1, "decision": "REJECT"}]', 2) == [None, None]
+
+
+def test_bracketed_text_without_verdicts_falls_back_to_indexes():
+    output = "Members [3, 7] share a field.\n0: APPROVE\n1: REJECT"
+    assert parse_verdicts(output, 2) == ['APPROVE', 'REJECT']
+
+
+@pytest.mark.parametrize("output", ["", "I cannot decide.", "[]", '[{"index": "first", "decision": "APPROVE"}]'])
+def test_unparseable_answers_give_no_verdicts(output):
+    assert parse_verdicts(output, 2) == [None, None]
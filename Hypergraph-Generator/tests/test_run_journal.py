@@ -0,0 +1,182 @@
+"""
+Journal replay, pruning and resume from base snapshot + journal segment (run_journal.py).
+A bug in any of these does not crash a run, it silently resumes from a wrong hypergraph.
+"""
+import json
+import os
+import pickle
+
+import pytest
+
+from run_journal import (RunJournal, BASE_PATTERN, SEGMENT_PATTERN, segment_path, base_path, list_files,
+                         latest_base, read_segment, write_base_snapshot, prune)
+
+PERSONAS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "personas1000.json")
+
+
+def _append_raw(path, text):
+    with open(path, "ab") as f:
+        f.write(text.encode('utf-8'))
+
+
+def test_read_segment_groups_events_by_commit(tmp_path):
+    path = segment_path(str(tmp_path), 0)
+    journal = RunJournal(path, header={'start_iteration': 0, 'edge_size_sequence': [2, 3]})
+    journal.log_add(0, ["1", "2"])
+    journal.log_decisions('generator', [{'action': 'generate'}])
+    journal.commit(0, 1, {'iteration': 0})
+    journal.log_add(1, ["3", "4", "5"])
+    journal.log_remove(0, ["1", "2"])
+    journal.commit(1, 2, None)
+    journal.close()
+
+    header, iterations, committed_offset = read_segment(path)
+    assert header['edge_size_sequence'] == [2, 3]
+    assert [commit['iteration'] for commit, _ in iterations] == [0, 1]
+    assert [event['type'] for event in iterations[0][1]] == ['add', 'decisions']
+    assert [(event['type'], event['edge_id']) for event in iterations[1][1]] == [('add', 1), ('remove', 0)]
+    assert iterations[1][0]['current_edge_index'] == 2
+    assert committed_offset == os.path.getsize(path)
+
+
+def test_uncommitted_events_are_dropped_and_overwritten(tmp_path):
+    path = segment_path(str(tmp_path), 0)
+    journal = RunJournal(path, header={'start_iteration': 0})
+    journal.log_add(0, ["1", "2"])
+    journal.commit(0, 1, None)
+    journal.close()
+    committed_size = os.path.getsize(path)
+
+    # Crash mid-iteration: a complete event without its commit, then a torn write
+    _append_raw(path, json.dumps({'type': 'add', 'edge_id': 1, 'edge': ["7", "8"]}) + "\n")
+    _append_raw(path, '{"type": "commit", "itera')
+
+    header, iterations, committed_offset = read_segment(path)
+    assert len(iterations) == 1
+    assert committed_offset == committed_size
+
+    journal = RunJournal(path, append_at=committed_offset)
+    journal.log_add(1, ["3", "4"])
+    journal.commit(1, 2, None)
+    journal.close()
+
+    _, iterations, _ = read_segment(path)
+    assert [commit['iteration'] for commit, _ in iterations] == [0, 1]
+    assert iterations[1][1] == [{'type': 'add', 'edge_id': 1, 'edge': ["3", "4"]}]
+
+
+def test_close_drops_buffered_events(tmp_path):
+    path = segment_path(str(tmp_path), 0)
+    journal = RunJournal(path, header={'start_iteration': 0})
+    journal.log_add(0, ["1", "2"])
+    journal.close()
+
+    header, iterations, _ = read_segment(path)
+    assert header['start_iteration'] == 0
+    assert iterations == []
+
+
+def test_write_base_snapshot_is_atomic(tmp_path):
+    path = base_path(str(tmp_path), 4)
+    write_base_snapshot(path, {'iteration': 4}, fsync=False)
+    write_base_snapshot(path, {'iteration': 4, 'current_edge_index': 9}, fsync=False)
+
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+    with open(path, "rb") as f:
+        assert pickle.load(f) == {'iteration': 4, 'current_edge_index': 9}
+    assert latest_base(str(tmp_path)) == 4
+
+
+def _touch_checkpoints(checkpoints_dir, bases, segments):
+    for iteration in bases:
+        write_base_snapshot(base_path(checkpoints_dir, iteration), {'iteration': iteration}, fsync=False)
+        _append_raw(os.path.join(checkpoints_dir, f"checkpoint_iteration_{iteration:03d}.json"), "{}")
+    for start in segments:
+        RunJournal(segment_path(checkpoints_dir, start), header={'start_iteration': start}).close()
+
+
+def test_prune_keeps_newest_bases_and_the_segments_after_them(tmp_path):
+    checkpoints_dir = str(tmp_path)
+    _touch_checkpoints(checkpoints_dir, bases=[2, 5, 8], segments=[0, 3, 6, 9])
+
+    prune(checkpoints_dir, keep_bases=2)
+
+    assert sorted(list_files(checkpoints_dir, BASE_PATTERN)) == [5, 8]
+    assert sorted(list_files(checkpoints_dir, SEGMENT_PATTERN)) == [6, 9]
+    assert not os.path.exists(os.path.join(checkpoints_dir, "checkpoint_iteration_002.json"))
+    assert os.path.exists(os.path.join(checkpoints_dir, "checkpoint_iteration_005.json"))
+
+
+def test_prune_without_enough_bases_keeps_everything(tmp_path):
+    checkpoints_dir = str(tmp_path)
+    _touch_checkpoints(checkpoints_dir, bases=[2], segments=[0, 3])
+
+    prune(checkpoints_dir, keep_bases=2)
+
+    assert sorted(list_files(checkpoints_dir, BASE_PATTERN)) == [2]
+    assert sorted(list_files(checkpoints_dir, SEGMENT_PATTERN)) == [0, 3]
+
+
+# ---- Resume through the generator ----------------------------------------------
+
+def _generator(tmp_path, output_name, iterations, snapshot_interval):
+    from LLM_MAS_Hypergraph_Configuration import ProtectedMASHypergraphGenerator
+    from llm_backends import StubBackend
+
+    config_file = tmp_path / "config.txt"
+    if not config_file.exists():
+        # 30 hyperedges of sizes 2 and 3: the building phase takes 6 iterations of 5 groups
+        config_file.write_text("".join(" ".join(str(3 * i + j) for j in range(2 + i % 2)) + "\n" for i in range(30)))
+    return ProtectedMASHypergraphGenerator(PERSONAS_FILE, str(config_file), str(tmp_path / output_name),
+                                           groups_per_iteration=5, iterations=iterations,
+                                           snapshot_interval=snapshot_interval, backend=StubBackend(seed=1))
+
+
+def _state(generator):
+    return {
+        'hyperedges': list(generator.hyperedges.items()),
+        'current_edge_index': generator.current_edge_index,
+        'edge_size_sequence': list(generator.edge_size_sequence),
+        'evolution_history': json.loads(json.dumps(generator.evolution_history, default=str)),
+        'decisions': {name: len(agent.decision_history) for name, agent in generator.agents.items()},
+    }
+
+
+def _resume(tmp_path, run_dir, iterations, snapshot_interval):
+    resumed = _generator(tmp_path, "resumed", iterations, snapshot_interval)
+    assert resumed.resume_from_directory(run_dir)
+    resumed._close_journal()
+    resumed.writer.close()
+    return resumed
+
+
+@pytest.mark.parametrize("snapshot_interval", [3, 100], ids=["base_plus_segment", "first_segment_only"])
+def test_resume_restores_the_final_state(tmp_path, snapshot_interval):
+    original = _generator(tmp_path, "original", iterations=11, snapshot_interval=snapshot_interval)
+    original.run()
+    checkpoints_dir = original.checkpoints_dir
+    if snapshot_interval == 3:
+        # Bases after iterations 5 and 8 survive pruning, iterations 9 and 10 only exist in the journal
+        assert latest_base(checkpoints_dir) == 8
+        assert sorted(list_files(checkpoints_dir, SEGMENT_PATTERN)) == [6, 9]
+    else:
+        assert latest_base(checkpoints_dir) is None
+
+    resumed = _resume(tmp_path, original.protected_run_dir, 11, snapshot_interval)
+
+    assert resumed.start_iteration == 11
+    assert _state(resumed) == _state(original)
+
+
+def test_resume_ignores_an_interrupted_iteration(tmp_path):
+    original = _generator(tmp_path, "original", iterations=11, snapshot_interval=3)
+    original.run()
+    edge_id, edge = next(iter(original.hyperedges.items()))
+    segment = segment_path(original.checkpoints_dir, 9)
+    _append_raw(segment, json.dumps({'type': 'remove', 'edge_id': edge_id, 'edge': edge}) + "\n")
+    _append_raw(segment, json.dumps({'type': 'add', 'edge_id': 10 ** 6, 'edge': ["1", "2"]}) + "\n")
+
+    resumed = _resume(tmp_path, original.protected_run_dir, 11, 3)
+
+    assert _state(resumed) == _state(original)
+    assert read_segment(segment)[2] == os.path.getsize(segment)
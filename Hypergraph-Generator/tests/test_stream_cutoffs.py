@@ -0,0 +1,92 @@
+"""
+Early stream cutoffs must not change what the agents parse: a cutoff is only given where the text
+before it already settles the answer (llm_backends.StreamCutoff).
+"""
+import json
+import os
+
+import pytest
+
+from LLM_MAS_Hypergraph_Configuration import NetworkOptimizerAgent, RelationshipGeneratorAgent
+from llm_backends import LLMBackend, LLMResponse, id_line_cutoff
+
+PERSONAS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "personas1000.json")
+
+
+@pytest.fixture(scope="module")
+def personas():
+    with open(PERSONAS_FILE, "r", encoding='utf-8') as f:
+        return json.load(f)
+
+
+class _ScriptedBackend(LLMBackend):
+    """Answers every request with the given text and remembers the stream cutoffs it was offered"""
+
+    def __init__(self, content, cut_off=False):
+        self.content = content
+        self.cut_off = cut_off
+        self.cutoffs = []
+
+    def complete(self, model, messages, max_tokens=None, temperature=None, **kwargs):
+        self.cutoffs.append(kwargs.get('stream_cutoff'))
+        response = LLMResponse(self.content, model)
+        response.cut_off = self.cut_off
+        return response
+
+
+def _generator_context(personas, existing_hyperedges, target_edge_size=3):
+    person_id = next(iter(personas))
+    return {
+        'person_id': person_id,
+        'person_data': personas[person_id],
+        'existing_hyperedges': existing_hyperedges,
+        'personas': personas,
+        'max_members': 5,
+        'target_edge_size': target_edge_size
+    }
+
+
+def test_optimizer_reads_the_whole_answer(personas):
+    answer = ("Step 1: INCREASE_CONNECTIONS would help sparse parts.\n"
+              "Step 5: REDUCE_CLUSTERING is not needed.\n"
+              "ENHANCE_DIVERSITY")
+    backend = _ScriptedBackend(answer)
+    agent = NetworkOptimizerAgent("optimizer", backend=backend)
+    edges = [list(personas)[k:k + 3] for k in range(0, 30, 3)]
+
+    result = agent.make_decision({'all_hyperedges': edges, 'personas': personas})
+
+    assert backend.cutoffs == [None]
+    assert result['strategy'] == 'ENHANCE_DIVERSITY'
+
+
+def test_evolution_generator_reads_the_whole_answer(personas):
+    ids = list(personas)
+    backend = _ScriptedBackend(f"Candidates: \n{ids[5]} {ids[6]}\nFinal:\n{ids[7]} {ids[8]}")
+    agent = RelationshipGeneratorAgent("generator", backend=backend)
+    existing = [ids[k:k + 2] for k in range(0, 40, 2)]
+
+    decision = agent.make_decision(_generator_context(personas, existing))
+
+    assert backend.cutoffs == [None]
+    assert decision['selected_members'] == [ids[0], ids[7], ids[8]]
+
+
+def test_building_generator_drops_the_partial_line_after_a_cut(personas):
+    ids = list(personas)
+    backend = _ScriptedBackend(f"{ids[3]} {ids[4]}\n{ids[1]}", cut_off=True)
+    agent = RelationshipGeneratorAgent("generator", backend=backend)
+
+    decision = agent.make_decision(_generator_context(personas, []))
+
+    assert backend.cutoffs[0] is not None and backend.cutoffs[0].name == 'id_line'
+    assert decision['selected_members'] == [ids[0], ids[3], ids[4]]
+
+
+def test_id_line_cutoff_waits_for_a_complete_line():
+    cutoff = id_line_cutoff({"3", "7", "15"}, 2, exclude=["3"])
+
+    assert not cutoff("7 15")
+    assert not cutoff("Step 1: 7 15\n")
+    assert not cutoff("3 7\n")
+    assert cutoff("Answer:\n7 15\n")